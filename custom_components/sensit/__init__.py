@@ -1,16 +1,27 @@
 
 import logging
-from homeassistant.const import EVENT_HOMEASSISTANT_START, EVENT_HOMEASSISTANT_STOP
+from homeassistant.components import webhook
+from homeassistant.const import CONF_WEBHOOK_ID
 import homeassistant.helpers.config_validation as cv
 import voluptuous as vol
-import threading
 import asyncio
 
 from homeassistant import config_entries, core
-from .const import DOMAIN
+from homeassistant.const import CONF_NAME
+from .backfill import async_setup_services
+from .const import CONF_DEVICES, CONF_DIAGNOSTICS, DOMAIN
+from .decode_pipeline import async_get_pipeline
+from .device_table import CONF_DEVICE_ID, CONF_VERSION, CONF_MODE as CONF_DEVICE_MODE
+from .dispatcher import async_get_dispatcher
+from .sigfox_api import async_setup_poller
+from .significant_change import CHANGE_OPTIONS, change_rules
+from .sigfox_webhook import async_register_webhook, async_unregister_webhook
 
 _LOGGER = logging.getLogger(__name__)
 
+# Options missing from the entries created before them
+OPTION_DEFAULTS = {CONF_DIAGNOSTICS: False}
+
 # TODO Clean this part, use const.py ? 
 CONF_URL = "backend_url"
 CONF_MODE = "local"
@@ -25,11 +36,22 @@ CONFIG_SCHEMA = vol.Schema(
 )
 
 
+async def async_setup(hass: core.HomeAssistant, config: dict) -> bool:
+    """Set up the services of the integration."""
+    async_setup_services(hass)
+    return True
+
+
 async def async_setup_entry(
     hass: core.HomeAssistant, entry: config_entries.ConfigEntry
 ) -> bool:
     """Set up platform from a ConfigEntry."""
     hass.data.setdefault(DOMAIN, {})
+    if CONF_WEBHOOK_ID not in entry.data:
+        # Entries created before the webhook was added
+        hass.config_entries.async_update_entry(
+            entry, data={**entry.data, CONF_WEBHOOK_ID: webhook.async_generate_id()}
+        )
     hass_data = dict(entry.data)
 
     # Registers update listener to update config entry when options are updated.
@@ -42,6 +64,11 @@ async def async_setup_entry(
     #     corresponding the global configuration of the device (mode, version, ...)
     # This will be used in the COnfiguration form ....
 
+    # Sigfox callbacks can be posted directly to the integration
+    async_register_webhook(hass, entry)
+    # Devices in API mode are polled from the Sigfox backend
+    await async_setup_poller(hass, entry, {**entry.data, **entry.options})
+
     # Forward the setup to the sensor platform.
     hass.async_create_task(
         hass.config_entries.async_forward_entry_setup(entry, "sensor")
@@ -52,14 +79,53 @@ async def async_setup_entry(
 async def options_update_listener(
     hass: core.HomeAssistant, config_entry: config_entries.ConfigEntry
 ):
-    """Handle options update."""
-    await hass.config_entries.async_reload(config_entry.entry_id)
+    """Handle options update, applied in place unless the entry must be rebuilt."""
+    if not async_apply_options(hass, config_entry):
+        await hass.config_entries.async_reload(config_entry.entry_id)
+
+
+@core.callback
+def async_apply_options(
+    hass: core.HomeAssistant, config_entry: config_entries.ConfigEntry
+) -> bool:
+    """Apply the options of an entry to its running devices.
+
+    Name, version and significant change rule changes are applied in place. Return
+    False when the entry must be reloaded: new device table of a hub, new mode (polling
+    starts or stops), diagnostics turned on or off, or device not running.
+    """
+    config = hass.data[DOMAIN][config_entry.entry_id]
+    changes = {
+        key: value
+        for key, value in config_entry.options.items()
+        if config.get(key, OPTION_DEFAULTS.get(key)) != value
+    }
+    if not changes:
+        return True
+    if CONF_DEVICES in changes or CONF_DEVICE_MODE in changes or CONF_DIAGNOSTICS in changes:
+        return False
+    dispatcher = async_get_dispatcher(hass)
+    rows = config[CONF_DEVICES] if CONF_DEVICES in config else [config]
+    devices = [dispatcher.async_get_device(str(row.get(CONF_DEVICE_ID))) for row in rows]
+    if None in devices:
+        return False
+    if any(key in CHANGE_OPTIONS for key in changes):
+        rules = change_rules({**config, **changes})
+        for device in devices:
+            device.async_set_change_rules(rules)
+    if CONF_DEVICES not in config:
+        devices[0].async_update_config(hass, name=changes.get(CONF_NAME), version=changes.get(CONF_VERSION))
+    config.update(changes)
+    _LOGGER.debug("Sensit %s options applied: %s", config_entry.title, changes)
+    return True
 
 
 async def async_unload_entry(
     hass: core.HomeAssistant, entry: config_entries.ConfigEntry
 ) -> bool:
     """Unload a config entry."""
+    # Frames already received are applied before the sensors are removed
+    await async_get_pipeline(hass).async_join()
     unload_ok = all(
         await asyncio.gather(
             *[hass.config_entries.async_forward_entry_unload(entry, "sensor")]
@@ -67,6 +133,7 @@ async def async_unload_entry(
     )
     # Remove options_update_listener.
     hass.data[DOMAIN][entry.entry_id]["unsub_options_update_listener"]()
+    async_unregister_webhook(hass, entry)
     # Remove config entry from domain.
     if unload_ok:
         hass.data[DOMAIN].pop(entry.entry_id)
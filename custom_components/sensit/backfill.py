@@ -0,0 +1,198 @@
+"""Backfill of Sensit history into the long-term statistics.
+
+Frames missed by Home Assistant (device added later, downtime) are read from an export
+(CSV or JSON lines) or from the Sigfox API, decoded in batches and aggregated into the
+hourly statistics of the Sensit entities. They never go through the entity states.
+Reading, decoding and aggregation run in the executor, one chunk of frames at a time, so
+only the import of the aggregated statistics runs in the event loop.
+"""
+from __future__ import annotations
+
+import csv
+from datetime import datetime
+import json
+import logging
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .dispatcher import async_get_dispatcher
+from .frame_records import DATA_KEYS, DEVICE_KEYS, TIME_KEYS, frame_time, record_value
+from .long_term_statistics import current_hour, hourly_statistics
+from .sensit_batch import decode_batch
+from .sigfox_api import api_client, api_config, message_frame
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_BACKFILL = "backfill"
+ATTR_DEVICE = "device"
+ATTR_PATH = "path"
+ATTR_START = "start"
+ATTR_END = "end"
+
+BACKFILL_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DEVICE): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_PATH): cv.string,
+        vol.Optional(ATTR_START): cv.datetime,
+        vol.Optional(ATTR_END): cv.datetime,
+    }
+)
+
+# Frames decoded per executor job, a chunk is extended to the end of its last hour
+CHUNK_SIZE = 20000
+
+
+def _records(path):
+    with open(path, encoding="utf-8", newline="") as file:
+        if path.lower().endswith(".csv"):
+            for row in csv.DictReader(file, skipinitialspace=True):
+                yield {key.strip().lower(): value for key, value in row.items() if key}
+            return
+        for line in file:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def read_frames(path, device_id=None) -> dict[str, list]:
+    """ Frames of an export, per device ID (lower case), as (time, data) tuples
+    Exports are CSV (header with device, data and time columns) or JSON lines (Sigfox
+    callbacks or API messages). The device column may be omitted when device_id is given.
+    Raise ValueError for an invalid JSON line.
+    """
+    frames = {}
+    skipped = 0
+    for record in _records(path):
+        device = record_value(record, DEVICE_KEYS) or device_id
+        # API messages: {"device": {"id": ...}}
+        if isinstance(device, dict):
+            device = device.get("id")
+        data = record_value(record, DATA_KEYS)
+        time = frame_time(record_value(record, TIME_KEYS))
+        if device is None or data is None or time is None:
+            skipped += 1
+            continue
+        frames.setdefault(str(device).lower(), []).append((time, data))
+    if skipped:
+        _LOGGER.warning("Sensit backfill: %s frame(s) of %s without device, data or time", skipped, path)
+    return frames
+
+
+def prepare_frames(frames, start=None, end=None) -> list:
+    """ Frames in [start, end) (POSIX times), without duplicates, sorted by time """
+    return sorted({
+        (time, data) for time, data in frames
+        if (start is None or time >= start) and (end is None or time < end)
+    })
+
+
+def hour_chunks(frames, size=CHUNK_SIZE):
+    """ Split sorted frames in chunks of about `size` frames
+    The frames of an hour are in the same chunk, so each hourly statistic is imported once.
+    """
+    begin = 0
+    while begin < len(frames):
+        end = min(begin + size, len(frames))
+        hour = frames[end - 1][0] // 3600
+        while end < len(frames) and frames[end][0] // 3600 == hour:
+            end += 1
+        yield frames[begin:end]
+        begin = end
+
+
+def aggregate_chunk(version, fields, frames, before: datetime | None = None) -> dict[str, list]:
+    """ Decode a chunk of frames and aggregate the fields into hourly statistics """
+    times = [time for time, _ in frames]
+    columns = decode_batch(version, [data for _, data in frames])
+    statistics = {}
+    for field in fields:
+        column = columns.get(field)
+        if column is None:
+            continue
+        if not isinstance(column, list):
+            column = column.tolist()
+        field_statistics = hourly_statistics(zip(times, column), before)
+        if field_statistics:
+            statistics[field] = field_statistics
+    return statistics
+
+
+async def async_backfill_device(hass: HomeAssistant, device, frames, before: datetime | None = None) -> dict:
+    """ Import sorted (time, data) frames of a device into its long-term statistics
+    Only complete hours (before the current one by default) are imported, hours which
+    already have statistics are left unchanged.
+    """
+    before = before or current_hour()
+    fields = device.statistic_fields
+    imported = 0
+    for chunk in hour_chunks(frames):
+        statistics = await hass.async_add_executor_job(aggregate_chunk, device.version, fields, chunk, before)
+        device.async_import_hourly_statistics(statistics)
+        imported += sum(len(field_statistics) for field_statistics in statistics.values())
+    _LOGGER.info("Sensit %s backfill: %s frame(s), %s hourly statistics", device.name, len(frames), imported)
+    return {"frames": len(frames), "statistics": imported}
+
+
+async def _async_fetch_frames(hass: HomeAssistant, device_id, start) -> list:
+    config = api_config(hass, device_id)
+    if config is None:
+        raise ServiceValidationError(f"No Sigfox API login configured for Sensit {device_id}")
+    since = int(start * 1000) - 1 if start is not None else None
+    messages = await api_client(hass, config).async_get_messages(device_id, since)
+    frames = (message_frame(message) for message in messages)
+    return [(frame["time"], frame["data"]) for frame in frames if frame is not None]
+
+
+def _timestamp(value: datetime | None) -> float | None:
+    return dt_util.as_utc(value).timestamp() if value is not None else None
+
+
+async def async_handle_backfill(hass: HomeAssistant, call: ServiceCall) -> dict:
+    """ Backfill the devices of an export (path) or, without path, from the Sigfox API """
+    device_ids = call.data.get(ATTR_DEVICE, [])
+    path = call.data.get(ATTR_PATH)
+    start = _timestamp(call.data.get(ATTR_START))
+    end = _timestamp(call.data.get(ATTR_END))
+    if path is not None:
+        if not hass.config.is_allowed_path(path):
+            raise ServiceValidationError(f"Path {path} is not allowed, see allowlist_external_dirs")
+        try:
+            frames = await hass.async_add_executor_job(
+                read_frames, path, device_ids[0] if len(device_ids) == 1 else None
+            )
+        except (OSError, ValueError) as e:
+            raise ServiceValidationError(f"Can't read Sensit frames from {path}: {e}") from e
+        if device_ids:
+            frames = {device_id.lower(): frames.get(device_id.lower(), []) for device_id in device_ids}
+    elif device_ids:
+        frames = {device_id: await _async_fetch_frames(hass, device_id, start) for device_id in device_ids}
+    else:
+        raise ServiceValidationError("A device or a path is required to backfill Sensit history")
+
+    dispatcher = async_get_dispatcher(hass)
+    results = {}
+    for device_id, device_frames in frames.items():
+        device = dispatcher.async_get_device(device_id)
+        if device is None:
+            _LOGGER.warning("Sensit backfill: device %s is not configured", device_id)
+            continue
+        device_frames = await hass.async_add_executor_job(prepare_frames, device_frames, start, end)
+        results[device.device_id] = await async_backfill_device(hass, device, device_frames)
+    return {"devices": results}
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """ Register the services of the integration """
+
+    async def async_backfill(call: ServiceCall) -> dict:
+        return await async_handle_backfill(hass, call)
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_BACKFILL, async_backfill, schema=BACKFILL_SCHEMA, supports_response=SupportsResponse.OPTIONAL
+    )
@@ -5,19 +5,26 @@ from typing import Any, Dict, Optional
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
 from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
 import homeassistant.helpers.config_validation as cv
 from homeassistant.exceptions import HomeAssistantError
-from homeassistant.const import CONF_NAME, CONF_SENSORS
-from homeassistant.helpers.entity_registry import (
-    async_entries_for_config_entry,
-    async_get,
+from homeassistant.components import webhook
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME, CONF_WEBHOOK_ID
+from homeassistant.helpers.selector import TextSelector, TextSelectorConfig
+
+from .const import CONF_DEVICES, CONF_DIAGNOSTICS, DOMAIN, MODE_API, MODE_LOCAL
+from .device_table import InvalidDeviceTable, format_device_table, parse_device_table
+from .significant_change import (
+    CHANGE_OPTIONS,
+    CONF_BATTERY_DEADBAND,
+    CONF_HEARTBEAT,
+    CONF_HUMIDITY_DEADBAND,
+    CONF_LIGHT_DEADBAND,
+    CONF_MIN_INTERVAL,
+    CONF_TEMPERATURE_DEADBAND,
 )
 
-from .const import DOMAIN
-
 _LOGGER = logging.getLogger(__name__)
 
 # TODO Clean this part, use const.py ?
@@ -31,8 +38,23 @@ SENSIT_DEVICE_SCHEMA = vol.Schema(
         vol.Required(CONF_DEVICE_NAME, default=("DEVICE_NAME")): cv.string,
         vol.Required(CONF_DEVICE_ID, default=("DEVICE_ID")): cv.string,
         vol.Required(CONF_VERSION,default=1): cv.positive_int,
-        vol.Optional(CONF_MODE, default="local"): cv.string,
-        vol.Optional(CONF_URL, default="backend.sigfox.com"): cv.string
+        vol.Optional(CONF_MODE, default=MODE_LOCAL): vol.In([MODE_LOCAL, MODE_API]),
+        vol.Optional(CONF_URL, default="backend.sigfox.com"): cv.string,
+        # Sigfox API credentials, for the api mode
+        vol.Optional(CONF_USERNAME): cv.string,
+        vol.Optional(CONF_PASSWORD): cv.string,
+    }
+)
+SENSIT_HUB_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_DEVICE_NAME, default="Sensit hub"): cv.string,
+        # CSV or JSON device table
+        vol.Required(CONF_DEVICES): TextSelector(TextSelectorConfig(multiline=True)),
+        # Mode of the devices without mode in the table
+        vol.Optional(CONF_MODE, default=MODE_LOCAL): vol.In([MODE_LOCAL, MODE_API]),
+        vol.Optional(CONF_URL, default="backend.sigfox.com"): cv.string,
+        vol.Optional(CONF_USERNAME): cv.string,
+        vol.Optional(CONF_PASSWORD): cv.string,
     }
 )
 
@@ -43,6 +65,12 @@ class CustomConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """ First step, a single device or a hub holding a table of devices."""
+        return self.async_show_menu(step_id="user", menu_options=["device", "hub"])
+
+    async def async_step_device(
+        self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
         """ Second step, allow configuration of devices."""
         errors: dict[str, str] = {}
@@ -53,11 +81,41 @@ class CustomConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             # if user_input.get("add_another", False):
             #     return await self.async_step_user()
 
-            # Create entry
+            # Create entry, with the webhook receiving the Sigfox callbacks
+            user_input[CONF_WEBHOOK_ID] = webhook.async_generate_id()
             return self.async_create_entry(title=user_input.get("name", "No name"), data=user_input)
 
         return self.async_show_form(
-            step_id="user", data_schema=SENSIT_DEVICE_SCHEMA, errors=errors
+            step_id="device", data_schema=SENSIT_DEVICE_SCHEMA, errors=errors
+        )
+
+    async def async_step_hub(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """ Hub of devices, imported from a CSV or JSON table."""
+        errors: dict[str, str] = {}
+        placeholders = {"error": ""}
+        if user_input is not None:
+            try:
+                devices = parse_device_table(user_input[CONF_DEVICES], user_input.get(CONF_MODE, MODE_LOCAL))
+            except InvalidDeviceTable as e:
+                errors[CONF_DEVICES] = "invalid_device_table"
+                placeholders["error"] = str(e)
+            else:
+                _LOGGER.info("Sensit hub %s: %s devices imported", user_input[CONF_DEVICE_NAME], len(devices))
+                data = {
+                    **user_input,
+                    CONF_DEVICES: devices,
+                    # One webhook for all the devices of the hub
+                    CONF_WEBHOOK_ID: webhook.async_generate_id(),
+                }
+                return self.async_create_entry(title=user_input[CONF_DEVICE_NAME], data=data)
+
+        return self.async_show_form(
+            step_id="hub",
+            data_schema=self.add_suggested_values_to_schema(SENSIT_HUB_SCHEMA, user_input),
+            errors=errors,
+            description_placeholders=placeholders,
         )
 
     @staticmethod
@@ -80,28 +138,87 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
 
     def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
         self.config_entry = config_entry
+        # Options of the device (or hub) step, completed by the filters step
+        self._options: Dict[str, Any] = {}
 
     async def async_step_init(
         self, user_input: Dict[str, Any] = None
     ) -> Dict[str, Any]:
         """Manage the options for the custom component."""
-        errors: Dict[str, str] = {}
-        # Collect information on configured items and devices
-        entity_registry = await async_get(self.hass)
-        logging.info(f"Entity registry: {str(entity_registry)}")
-        entries = async_entries_for_config_entry(
-            entity_registry, self.config_entry.entry_id
+        if CONF_DEVICES in self.config_entry.data:
+            return await self.async_step_hub(user_input)
+        if user_input is not None:
+            self._options.update(user_input)
+            return await self.async_step_filters()
+
+        current = {**self.config_entry.data, **self.config_entry.options}
+        options_schema = vol.Schema(
+            {
+                vol.Optional(CONF_DEVICE_NAME, default=current.get(CONF_DEVICE_NAME, "")): cv.string,
+                vol.Optional(CONF_MODE, default=current.get(CONF_MODE, MODE_LOCAL)): vol.In([MODE_LOCAL, MODE_API]),
+                vol.Optional(CONF_VERSION, default=current.get(CONF_VERSION, 1)): vol.In([1, 2, 3]),
+                vol.Optional(CONF_DIAGNOSTICS, default=current.get(CONF_DIAGNOSTICS, False)): cv.boolean,
+            }
         )
-        logging.info(f"Config Entries: {str(self.config_entry)}")
-        logging.info(f"Entries: {str(entries)}")
+        return self.async_show_form(step_id="init", data_schema=options_schema)
 
-        # TODO When the service has been added to the integration: allow  edition.
+    async def async_step_hub(
+        self, user_input: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
+        """Device table of a hub, its changes reload the entry."""
+        errors: Dict[str, str] = {}
+        placeholders = {"error": ""}
+        if user_input is not None:
+            try:
+                devices = parse_device_table(
+                    user_input[CONF_DEVICES], self.config_entry.data.get(CONF_MODE, MODE_LOCAL)
+                )
+            except InvalidDeviceTable as e:
+                errors[CONF_DEVICES] = "invalid_device_table"
+                placeholders["error"] = str(e)
+            else:
+                self._options[CONF_DEVICES] = devices
+                self._options[CONF_DIAGNOSTICS] = user_input.get(CONF_DIAGNOSTICS, False)
+                return await self.async_step_filters()
+            table = user_input[CONF_DEVICES]
+        else:
+            devices = self.config_entry.options.get(CONF_DEVICES, self.config_entry.data[CONF_DEVICES])
+            table = format_device_table(devices)
+
+        diagnostics = self.config_entry.options.get(CONF_DIAGNOSTICS, False)
         options_schema = vol.Schema(
             {
-                vol.Optional(CONF_DEVICE_NAME): cv.string,
-                vol.Optional(CONF_MODE): cv.string,
+                vol.Required(CONF_DEVICES, default=table): TextSelector(TextSelectorConfig(multiline=True)),
+                vol.Optional(CONF_DIAGNOSTICS, default=diagnostics): cv.boolean,
             }
         )
         return self.async_show_form(
-            step_id="init", data_schema=options_schema, errors=errors
+            step_id="hub", data_schema=options_schema, errors=errors, description_placeholders=placeholders
+        )
+
+    async def async_step_filters(
+        self, user_input: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
+        """Significant change rules of the sensors, see significant_change.py."""
+        if user_input is not None:
+            name = self._options.get(CONF_DEVICE_NAME)
+            if name and name != self.config_entry.title:
+                # Entries of a single device are listed under its name
+                self.hass.config_entries.async_update_entry(self.config_entry, title=name)
+            # Applied in place by the options update listener
+            return self.async_create_entry(title="", data={**self._options, **user_input})
+
+        current = {**CHANGE_OPTIONS, **self.config_entry.options}
+        positive = vol.All(vol.Coerce(float), vol.Range(min=0))
+        seconds = vol.All(vol.Coerce(int), vol.Range(min=0))
+        options_schema = vol.Schema(
+            {
+                vol.Optional(CONF_TEMPERATURE_DEADBAND, default=current[CONF_TEMPERATURE_DEADBAND]): positive,
+                vol.Optional(CONF_HUMIDITY_DEADBAND, default=current[CONF_HUMIDITY_DEADBAND]): positive,
+                vol.Optional(CONF_BATTERY_DEADBAND, default=current[CONF_BATTERY_DEADBAND]): positive,
+                vol.Optional(CONF_LIGHT_DEADBAND, default=current[CONF_LIGHT_DEADBAND]): positive,
+                vol.Optional(CONF_MIN_INTERVAL, default=current[CONF_MIN_INTERVAL]): seconds,
+                vol.Optional(CONF_HEARTBEAT, default=current[CONF_HEARTBEAT]): seconds,
+            }
         )
+        return self.async_show_form(step_id="filters", data_schema=options_schema)
@@ -3,3 +3,20 @@
 DOMAIN = "sensit"
 
 
+# Keys of hass.data[DOMAIN] shared by all the config entries
+DATA_DISPATCHER = "dispatcher"
+DATA_STORAGE = "storage"
+DATA_PIPELINE = "pipeline"
+
+# Device table of the hub config entries
+CONF_DEVICES = "devices"
+
+# Diagnostic sensors of the devices of an entry, off by default
+CONF_DIAGNOSTICS = "diagnostics"
+
+# Sigfox backend
+CONF_URL = "backend_url"
+
+# Device modes: frames pushed by callbacks (webhook or state), or polled from the Sigfox API
+MODE_LOCAL = "local"
+MODE_API = "api"
@@ -0,0 +1,77 @@
+"""Cache of decoded frames.
+
+In steady state a Sensit sends the same frame again and again (same mode, temperature and
+battery), and devices of a same site send identical frames: decoded results are cached
+by (version, frame bytes) in a bounded LRU cache shared by all the devices.
+
+Decoding a 4-byte frame (every v2 and v3 frame) is as fast as a cache hit, with its key
+hashing and lock: short frames bypass the cache, only longer v1 frames are cached.
+"""
+from collections import OrderedDict
+import threading
+
+from .frame_layout import DECODERS, payload_bytes
+
+# Decoded frames kept in the cache
+DEFAULT_MAXSIZE = 1024
+# Frames shorter than this are decoded directly, see scripts/bench_decoder.py
+DEFAULT_MIN_LENGTH = 5
+
+
+class DecodeCache:
+    """ Thread-safe LRU cache of decoded frames
+    Decoded frames are immutable records, so they can be shared by all the callers. Invalid frames are
+    not cached, the decoding error is raised on each call. Frames shorter than min_length
+    are not cached either.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, min_length=DEFAULT_MIN_LENGTH):
+        self.maxsize = maxsize
+        self.min_length = min_length
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def decode(self, version, payload):
+        """ Decoded frame of a payload, raise for unknown versions or invalid frames
+        The payload is a hex string or the frame bytes (bytes, bytearray or memoryview).
+        """
+        frame = payload_bytes(payload)
+        if len(frame) < self.min_length:
+            return DECODERS[version](frame)
+        key = (version, frame)
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data
+            self.misses += 1
+        data = DECODERS[version](frame)
+        with self._lock:
+            self._entries[key] = data
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return data
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "min_length": self.min_length,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# Cache shared by the parsers and the devices
+DECODE_CACHE = DecodeCache()
@@ -0,0 +1,159 @@
+"""Decode pipeline of the frame bursts.
+
+Bursts of frames (webhook arrays, Sigfox API polls) are queued in a bounded queue and
+applied by a single worker. The worker takes all the bursts waiting in the queue, merges
+them per device and decodes the history of the large ones in the executor, so a replay
+of thousands of frames does not block the event loop. The latest frame of each device is
+always applied in the event loop.
+
+Small bursts received while the pipeline is idle take the inline fast path: they are
+applied right away, as before. Until NumPy (used by the batch decoder) is imported, bursts
+go through the worker, which imports it in the executor first. When the queue is full, submitters wait for the worker
+(backpressure up to the Sigfox backend or the poller).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_PIPELINE, DOMAIN
+from .sensit_batch import load_numpy, numpy_loaded
+
+_LOGGER = logging.getLogger(__name__)
+
+# Bursts waiting for the worker
+QUEUE_SIZE = 64
+# History frames decoded in the event loop, larger bursts are decoded in the executor
+EXECUTOR_THRESHOLD = 32
+# Frames taken from the queue by the worker at once
+BATCH_FRAMES = 10000
+
+
+class DecodePipeline:
+    """ Bounded queue of frame bursts, and the worker applying them to their devices """
+
+    def __init__(self, hass: HomeAssistant, maxsize=QUEUE_SIZE, threshold=EXECUTOR_THRESHOLD):
+        self._hass = hass
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self._threshold = threshold
+        self._worker: asyncio.Task | None = None
+        self._busy = False
+        # Metrics
+        self.inline = 0
+        self.queued = 0
+        self.offloaded = 0
+        self.batches = 0
+        self.backpressure_waits = 0
+        self.max_queue_depth = 0
+        self.decode_latency_last = 0.0
+        self.decode_latency_max = 0.0
+        self._decode_latency_total = 0.0
+        self._decodes = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    async def async_submit(self, device, frames) -> None:
+        """ Apply a burst of frames (see SensitDevice.handle_frames) to a device
+        Waits while the queue is full.
+        """
+        if (
+            not self._busy
+            and self._queue.empty()
+            and len(frames) <= self._threshold
+            and (len(frames) < 2 or numpy_loaded())
+        ):
+            self.inline += 1
+            device.handle_frames(frames)
+            return
+        if self._worker is None:
+            self._worker = self._hass.async_create_background_task(
+                self._async_work(), "sensit decode pipeline"
+            )
+        if self._queue.full():
+            self.backpressure_waits += 1
+            _LOGGER.debug("Sensit decode queue is full (%s bursts), waiting", self._queue.maxsize)
+        await self._queue.put((device, frames))
+        self.queued += 1
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+
+    async def _async_work(self):
+        while True:
+            batch = [await self._queue.get()]
+            count = len(batch[0][1])
+            while count < BATCH_FRAMES and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                count += len(batch[-1][1])
+            self._busy = True
+            try:
+                await self._async_apply(batch)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Sensit error while applying %s frame(s)", count)
+            finally:
+                self._busy = False
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _async_apply(self, batch):
+        """ Merge the bursts of a batch per device, decode and apply them """
+        bursts = {}
+        for device, frames in batch:
+            bursts.setdefault(device, []).extend(frames)
+        self.batches += 1
+        if not numpy_loaded():
+            # Importing NumPy takes a while, it must not block the event loop
+            await self._hass.async_add_executor_job(load_numpy)
+        for device, frames in bursts.items():
+            frames = device.prepare_burst(frames)
+            if not frames:
+                continue
+            start = time.perf_counter()
+            if len(frames) > self._threshold:
+                self.offloaded += 1
+                columns = await self._hass.async_add_executor_job(device.decode_history, frames)
+            else:
+                columns = device.decode_history(frames)
+            latency = time.perf_counter() - start
+            self._record_latency(latency)
+            device.apply_burst(frames, columns, latency)
+        _LOGGER.debug(
+            "Sensit decoded %s burst(s) of %s device(s), %s left in queue, %.1f ms",
+            len(batch), len(bursts), self._queue.qsize(), self.decode_latency_last * 1000,
+        )
+
+    def _record_latency(self, latency):
+        self.decode_latency_last = latency
+        self.decode_latency_max = max(self.decode_latency_max, latency)
+        self._decode_latency_total += latency
+        self._decodes += 1
+
+    async def async_join(self) -> None:
+        """ Wait until the queued bursts are applied """
+        await self._queue.join()
+
+    def as_dict(self) -> dict:
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "inline": self.inline,
+            "queued": self.queued,
+            "offloaded": self.offloaded,
+            "batches": self.batches,
+            "backpressure_waits": self.backpressure_waits,
+            "decode_latency_last": self.decode_latency_last,
+            "decode_latency_max": self.decode_latency_max,
+            "decode_latency_avg": self._decode_latency_total / self._decodes if self._decodes else 0.0,
+        }
+
+
+@callback
+def async_get_pipeline(hass: HomeAssistant) -> DecodePipeline:
+    """Return the decode pipeline shared by all the Sensit devices."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_PIPELINE not in domain_data:
+        domain_data[DATA_PIPELINE] = DecodePipeline(hass)
+    return domain_data[DATA_PIPELINE]
@@ -0,0 +1,85 @@
+"""Device table of the hub config entries.
+
+A hub entry holds a whole fleet of Sensit: its devices are set up together, in a single
+sensor platform setup. The table is imported from CSV (a header row with device_id,
+name, version and optionally mode) or JSON (a list of objects with the same keys).
+Mode is either local (frames pushed by callbacks) or api (polled from the Sigfox API).
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+
+import voluptuous as vol
+
+import homeassistant.helpers.config_validation as cv
+
+CONF_DEVICE_ID = "device_id"
+CONF_DEVICE_NAME = "name"
+CONF_VERSION = "version"
+CONF_MODE = "mode"
+
+DEVICE_ROW_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_DEVICE_ID): vol.All(cv.string, vol.Length(min=1)),
+        vol.Optional(CONF_DEVICE_NAME): cv.string,
+        vol.Required(CONF_VERSION): vol.All(vol.Coerce(int), vol.In([1, 2, 3])),
+        vol.Optional(CONF_MODE): vol.In(["local", "api"]),
+    },
+    extra=vol.REMOVE_EXTRA,
+)
+
+
+class InvalidDeviceTable(ValueError):
+    """ Raised when a device table can't be imported """
+
+
+def _rows(text):
+    text = text.strip()
+    if text.startswith("["):
+        try:
+            rows = json.loads(text)
+        except ValueError as e:
+            raise InvalidDeviceTable(f"Invalid JSON: {e}") from e
+        if not all(isinstance(row, dict) for row in rows):
+            raise InvalidDeviceTable("JSON device table must be a list of objects")
+        return rows
+    reader = csv.DictReader(io.StringIO(text), skipinitialspace=True)
+    if reader.fieldnames is None or CONF_DEVICE_ID not in reader.fieldnames:
+        raise InvalidDeviceTable(f"CSV device table must have a header with {CONF_DEVICE_ID}")
+    # Empty cells are missing values, the defaults apply
+    return [{key: value for key, value in row.items() if value} for row in reader]
+
+
+def format_device_table(devices) -> str:
+    """ CSV table of devices, as imported by parse_device_table """
+    output = io.StringIO()
+    writer = csv.DictWriter(
+        output, [CONF_DEVICE_ID, CONF_DEVICE_NAME, CONF_VERSION, CONF_MODE], extrasaction="ignore", lineterminator="\n"
+    )
+    writer.writeheader()
+    writer.writerows(devices)
+    return output.getvalue()
+
+
+def parse_device_table(text, default_mode="local") -> list[dict]:
+    """ Devices of a CSV or JSON table, as dicts with device_id, name, version and mode
+    Raise InvalidDeviceTable if a row is invalid or a device ID is repeated.
+    """
+    devices = []
+    seen = set()
+    for line, row in enumerate(_rows(text), start=1):
+        try:
+            device = DEVICE_ROW_SCHEMA(row)
+        except vol.Invalid as e:
+            raise InvalidDeviceTable(f"Device {line}: {e}") from e
+        device.setdefault(CONF_DEVICE_NAME, device[CONF_DEVICE_ID])
+        device.setdefault(CONF_MODE, default_mode)
+        if device[CONF_DEVICE_ID].lower() in seen:
+            raise InvalidDeviceTable(f"Device {line}: {device[CONF_DEVICE_ID]} is repeated")
+        seen.add(device[CONF_DEVICE_ID].lower())
+        devices.append(device)
+    if not devices:
+        raise InvalidDeviceTable("Device table is empty")
+    return devices
@@ -0,0 +1,69 @@
+"""Diagnostics of the Sensit config entries."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME, CONF_WEBHOOK_ID
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_DEVICES
+from .decode_cache import DECODE_CACHE
+from .decode_pipeline import async_get_pipeline
+from .device_table import CONF_DEVICE_ID
+from .dispatcher import async_get_dispatcher
+from .metrics import DeviceMetrics
+
+TO_REDACT = {CONF_PASSWORD, CONF_USERNAME, CONF_WEBHOOK_ID}
+
+# Metrics of the devices without instrumentation, the frame filter counters are always kept
+METRICS_OFF = "off: turn diagnostics on in the entry options to collect them"
+
+
+def _device_diagnostics(device) -> dict[str, Any]:
+    return {
+        "name": device.name,
+        "version": device.version,
+        "mode": device.mode,
+        "instrumentation": device.metrics is not None,
+        "frame_filter": device.frame_filter.as_dict(),
+        "metrics": device.metrics.as_dict() if device.metrics is not None else METRICS_OFF,
+        "sensors": sorted(device.sensors),
+        "last_frame": device.last_frame._asdict() if device.last_frame is not None else None,
+    }
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return diagnostics of a config entry: its devices, with totals, and the shared decoders."""
+    config = {**entry.data, **entry.options}
+    rows = config[CONF_DEVICES] if CONF_DEVICES in config else [config]
+    dispatcher = async_get_dispatcher(hass)
+    devices = {}
+    total = DeviceMetrics()
+    instrumented = 0
+    frames = {"accepted": 0, "duplicates": 0, "stale": 0}
+    for row in rows:
+        device = dispatcher.async_get_device(str(row.get(CONF_DEVICE_ID)))
+        if device is None:
+            continue
+        devices[device.device_id] = _device_diagnostics(device)
+        frames["accepted"] += device.frame_filter.accepted
+        frames["duplicates"] += device.frame_filter.duplicates
+        frames["stale"] += device.frame_filter.stale
+        if device.metrics is not None:
+            instrumented += 1
+            total.merge(device.metrics)
+    return {
+        "config": async_redact_data(config, TO_REDACT),
+        "devices": devices,
+        "total": {
+            # Counted for every device
+            "frames": frames,
+            "instrumented_devices": instrumented,
+            # Metrics of the devices with instrumentation on
+            "metrics": total.as_dict() if instrumented else METRICS_OFF,
+        },
+        "decode_pipeline": async_get_pipeline(hass).as_dict(),
+        "decode_cache": DECODE_CACHE.stats(),
+    }
@@ -0,0 +1,101 @@
+"""Single state change listener routing raw data updates to the Sensit devices."""
+from __future__ import annotations
+
+import logging
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+
+from .const import DATA_DISPATCHER, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SensitDispatcher:
+    """Route state changes of the `sensor.<device_id>` raw data entities to their device.
+
+    One listener is registered on the bus for all the Sensit devices, whatever the number
+    of config entries. Its event filter drops the state changes of the other entities with
+    a single dict lookup on the entity ID, and the devices are called immediately, without
+    scheduling a job per event.
+    Frames received without a state change (webhook) are routed with the device ID, and
+    only to the devices of the config entry owning the webhook.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._hass = hass
+        # Raw data entity ID -> SensitDevice
+        self._devices = {}
+        # Device ID (lower case) -> SensitDevice
+        self._devices_by_id = {}
+        # Device ID (lower case) -> ID of the config entry of the device, None from YAML
+        self._entry_ids = {}
+        self._unsub_listener: CALLBACK_TYPE | None = None
+
+    @staticmethod
+    def raw_entity_id(device_id) -> str:
+        """Entity ID of the sensor holding the raw data of a device."""
+        return ("sensor." + device_id).lower()
+
+    @callback
+    def async_add_device(self, device, entry_id: str | None = None) -> CALLBACK_TYPE:
+        """Route the raw data of a device of a config entry, return a callback removing it."""
+        self._devices[self.raw_entity_id(device.device_id)] = device
+        self._devices_by_id[device.device_id.lower()] = device
+        self._entry_ids[device.device_id.lower()] = entry_id
+        if self._unsub_listener is None:
+            self._unsub_listener = self._hass.bus.async_listen(
+                EVENT_STATE_CHANGED,
+                self._async_handle_event,
+                event_filter=self._async_filter_event,
+                run_immediately=True,
+            )
+
+        @callback
+        def remove_device() -> None:
+            self.async_remove_device(device)
+
+        return remove_device
+
+    @callback
+    def async_remove_device(self, device) -> None:
+        """Stop routing the raw data of a device."""
+        entity_id = self.raw_entity_id(device.device_id)
+        if self._devices.get(entity_id) is device:
+            del self._devices[entity_id]
+            del self._devices_by_id[device.device_id.lower()]
+            del self._entry_ids[device.device_id.lower()]
+        if not self._devices and self._unsub_listener is not None:
+            self._unsub_listener()
+            self._unsub_listener = None
+
+    @callback
+    def async_get_device(self, device_id: str, entry_id: str | None = None):
+        """Return the device with this Sigfox ID, None if it is not configured.
+
+        With an entry ID, only a device of this config entry is returned.
+        """
+        device_id = device_id.lower()
+        if entry_id is not None and self._entry_ids.get(device_id) != entry_id:
+            return None
+        return self._devices_by_id.get(device_id)
+
+    @callback
+    def _async_filter_event(self, event: Event) -> bool:
+        # Run by the bus for every state change, no job is scheduled for other entities
+        return event.data["entity_id"] in self._devices
+
+    @callback
+    def _async_handle_event(self, event: Event) -> None:
+        device = self._devices.get(event.data["entity_id"])
+        if device is not None:
+            device.handle_event(event)
+
+
+@callback
+def async_get_dispatcher(hass: HomeAssistant) -> SensitDispatcher:
+    """Return the dispatcher shared by all the Sensit devices."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_DISPATCHER not in domain_data:
+        domain_data[DATA_DISPATCHER] = SensitDispatcher(hass)
+    return domain_data[DATA_DISPATCHER]
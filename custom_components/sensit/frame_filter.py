@@ -0,0 +1,71 @@
+"""Duplicate and out of order frame filtering.
+
+Sigfox delivers the same uplink through several base stations and retries callbacks, so
+a device may receive the same frame more than once, or an old frame after a newer one.
+"""
+from collections import deque
+
+# Sequence numbers remembered per device
+DEFAULT_WINDOW = 32
+
+
+def as_int(value):
+    """ Sigfox time and seqNumber as integers, None when missing or invalid """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class FrameFilter:
+    """ Filter of the frames of one device
+    Keeps a bounded window of the recently accepted seqNumbers and the time of the
+    latest accepted frame. Frames without seqNumber or time are not filtered on it.
+    """
+    __slots__ = ("_recent", "last_time", "last_seq_number", "accepted", "duplicates", "stale")
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self._recent = deque(maxlen=window)
+        self.last_time = None
+        self.last_seq_number = None
+        self.accepted = 0
+        self.duplicates = 0
+        self.stale = 0
+
+    def accept(self, seq_number=None, time=None) -> bool:
+        """ Check a frame, return False if it must be dropped """
+        if seq_number is not None and seq_number in self._recent:
+            self.duplicates += 1
+            return False
+        if time is not None and self.last_time is not None and time < self.last_time:
+            self.stale += 1
+            return False
+        if seq_number is not None:
+            self._recent.append(seq_number)
+            self.last_seq_number = seq_number
+        if time is not None:
+            self.last_time = time
+        self.accepted += 1
+        return True
+
+    def restore(self, time=None, seq_number=None):
+        """ Carry on from the latest frame accepted before a restart """
+        if seq_number is not None:
+            self._recent.append(seq_number)
+            self.last_seq_number = seq_number
+        if time is not None:
+            self.last_time = time
+
+    @property
+    def dropped(self) -> int:
+        """ Number of frames dropped (duplicate or stale) """
+        return self.duplicates + self.stale
+
+    def as_dict(self) -> dict:
+        return {
+            "accepted": self.accepted,
+            "duplicates": self.duplicates,
+            "stale": self.stale,
+            "last_time": self.last_time,
+            "last_seq_number": self.last_seq_number,
+        }
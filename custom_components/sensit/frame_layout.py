@@ -0,0 +1,291 @@
+"""Declarative frame layouts of the Sensit versions.
+
+Layouts are data: version -> mode -> list of fields. On first use of a version, each of
+its (version, mode) layouts is compiled into one flat decoder function building the frame
+record of the version (see sensit_frame.py), so decoding a frame costs one dict lookup on
+the mode plus a single function call. Decoders read the fields by indexing the frame buffer
+they are given (bytes, bytearray or memoryview). The entry points taking payloads (parser,
+decode cache, webhook, batch decoder) first convert them with payload_bytes: hex strings are
+parsed, bytearray and memoryview are copied to bytes, as cache keys and saved frames must be
+immutable.
+"""
+from __future__ import annotations
+
+from typing import NamedTuple
+
+from .sensit_frame import SensitV1Frame, SensitV2Frame, SensitV3Frame
+
+
+class Field(NamedTuple):
+    """ A decoded value
+    - name: field of the decoded frame
+    - parts: (byte, bit offset, width) tuples, most significant part first.
+      Parts are concatenated to build the raw integer value.
+    - transform: expression template applied to the raw value ({} is the raw value).
+      Fields without parts are evaluated from the transform alone.
+    """
+    name: str
+    parts: tuple = ()
+    transform: str = "{}"
+
+
+class VersionLayout(NamedTuple):
+    """ Layout of all the frames of a version
+    - mode: (byte, bit offset, width) of the mode field
+    - header: fields decoded for every mode
+    - modes: mode -> fields specific to the mode
+    - frame: decoded frame type, fields missing from a mode are left to None
+    - default: fields of undocumented modes, None if those frames are rejected
+    """
+    mode: tuple
+    header: tuple
+    modes: dict
+    frame: type
+    default: tuple | None = None
+
+
+def bits(byte, offset=0, width=8):
+    """ Part of a field: `width` bits of `byte`, starting from bit `offset` (0 is the LSB) """
+    return (byte, offset, width)
+
+
+def payload_bytes(payload) -> bytes:
+    """ Frame bytes of a payload: hex string (converted once), bytes, bytearray or memoryview
+    bytes are returned as is, bytearray and memoryview are copied.
+    Raise ValueError if a hex string is invalid, TypeError for other types.
+    """
+    if isinstance(payload, bytes):
+        return payload
+    if isinstance(payload, str):
+        return bytes.fromhex(payload)
+    if isinstance(payload, (bytearray, memoryview)):
+        return bytes(payload)
+    raise TypeError(f"Sensit payload must be a hex string or bytes, not {type(payload).__name__}")
+
+
+def v1_temperature(value):
+    """ Temperature of a v1 byte: (value + 46) / 2, value being signed """
+    if value > 128:
+        value = value - 256
+    return (value + 46) / 2
+
+
+def v2_light(value):
+    """ Light of a v2 byte: b0-b5 value, b6-b7 multiplier index """
+    return (value & 0x3F) * (1, 8, 64, 2014)[value >> 6] * 0.01
+
+
+# Conversion tables, indexed by the raw byte (or field) value
+V1_TEMPERATURE = tuple(v1_temperature(value) for value in range(256))
+V1_BATTERY = tuple(value * 0.02 for value in range(256))
+# Battery MSB and LSB joined on 5 bits
+V2_BATTERY = tuple(value * 0.05 * 2.7 for value in range(32))
+V2_LIGHT = tuple(v2_light(value) for value in range(256))
+HUMIDITY = tuple(value * 0.5 for value in range(256))
+# Indexed by the whole byte 0, battery being on bits 3-7
+V3_BATTERY = tuple((value >> 3) * 0.05 + 2.7 for value in range(256))
+
+
+# Sensit v1, see SensitParser.parse_v1
+_V1_TEMPERATURE = Field("temperature", (bits(3),), "V1_TEMPERATURE[{}]")
+V1_LAYOUT = VersionLayout(
+    mode=bits(0, 0, 2),
+    header=(
+        Field("mode", (bits(0, 0, 2),)),
+        Field("period", (bits(0, 3, 2),)),
+        Field("forced", (bits(0, 6, 1),)),
+        Field("button", (bits(0, 7, 1),)),
+        Field("battery", (bits(1),), "V1_BATTERY[{}]"),
+        Field("sent_battery", (bits(2),), "V1_BATTERY[{}]"),
+        _V1_TEMPERATURE,
+    ),
+    modes={
+        # Off
+        0: (),
+        # Temperature: history values, one per byte
+        1: (Field("values", (), "tuple(map(V1_TEMPERATURE.__getitem__, payload[4:]))"),),
+        # Motion: 1 byte for value, 3 bytes for config
+        2: (Field("motion", (bits(4),)),),
+        # All: min temperature, max temperature, motion
+        3: (
+            Field("temperature_min", (bits(4),), "V1_TEMPERATURE[{}]"),
+            Field("temperature_max", (bits(5),), "V1_TEMPERATURE[{}]"),
+            Field("motion", (bits(6),)),
+        ),
+    },
+    frame=SensitV1Frame,
+)
+
+# Sensit v2, see SensitParser.parse_v2
+_V2_TEMPERATURE = (
+    Field("temperature", (bits(1, 4, 4), bits(2, 0, 6)), "({} - 200) / 8"),
+    Field("switch_state", (bits(2, 6, 1),)),
+)
+_V2_TEMPERATURE_FROM_MSB = Field("temperature_from_msb", (bits(1, 4, 4),), "({} * 6.4) - 20")
+_V2_EVENT_COUNT = Field("event_count", (bits(3),))
+V2_LAYOUT = VersionLayout(
+    mode=bits(0, 0, 3),
+    header=(
+        Field("mode", (bits(0, 0, 3),)),
+        Field("period", (bits(0, 3, 2),)),
+        Field("type", (bits(0, 5, 2),)),
+        Field("battery", (bits(0, 7, 1), bits(1, 0, 4)), "V2_BATTERY[{}]"),
+    ),
+    modes={
+        # Button: software version
+        0: _V2_TEMPERATURE + (
+            Field("version_major", (bits(3, 4, 4),)),
+            Field("version_minor", (bits(3, 0, 4),)),
+        ),
+        # Temperature
+        1: _V2_TEMPERATURE + (Field("humidity", (bits(3),), "HUMIDITY[{}]"),),
+        # Light
+        2: (
+            Field("light", (bits(2),), "V2_LIGHT[{}]"),
+            _V2_TEMPERATURE_FROM_MSB,
+            _V2_EVENT_COUNT,
+        ),
+        # Door
+        3: (_V2_TEMPERATURE_FROM_MSB, _V2_EVENT_COUNT),
+    },
+    frame=SensitV2Frame,
+    # Move, Reed switch
+    default=_V2_TEMPERATURE + (_V2_EVENT_COUNT,),
+)
+
+# Sensit v3, see SensitParser.parse_v3
+_V3_EVENT_COUNT = Field("event_count", (bits(2), bits(3)))
+V3_LAYOUT = VersionLayout(
+    mode=bits(1, 3, 5),
+    header=(
+        Field("mode", (bits(1, 3, 5),)),
+        Field("button", (bits(1, 2, 1),)),
+        Field("battery", (bits(0),), "V3_BATTERY[{}]"),
+    ),
+    modes={
+        # Temperature
+        1: (
+            Field("temperature", (bits(1, 0, 2), bits(2)), "({} - 200) / 8"),
+            Field("humidity", (bits(3),)),
+        ),
+        # Light
+        2: (Field("brightness", (bits(2), bits(3)), "{} / 96"),),
+        # Door
+        3: (Field("door", (bits(1, 0, 2),)), _V3_EVENT_COUNT),
+        # Vibration
+        4: (Field("vibration", (bits(1, 0, 2),)), _V3_EVENT_COUNT),
+        # Magnet
+        5: (Field("magnet", (bits(1, 0, 2),)), _V3_EVENT_COUNT),
+    },
+    frame=SensitV3Frame,
+    default=(_V3_EVENT_COUNT,),
+)
+
+LAYOUTS = {
+    1: V1_LAYOUT,
+    2: V2_LAYOUT,
+    3: V3_LAYOUT,
+}
+
+# Tables available to the transform expressions
+_NAMESPACE = {
+    "V1_TEMPERATURE": V1_TEMPERATURE,
+    "V1_BATTERY": V1_BATTERY,
+    "V2_BATTERY": V2_BATTERY,
+    "V2_LIGHT": V2_LIGHT,
+    "HUMIDITY": HUMIDITY,
+    "V3_BATTERY": V3_BATTERY,
+}
+
+
+def _part_expression(byte, offset, width):
+    expression = f"b{byte}"
+    if offset:
+        expression = f"({expression} >> {offset})"
+    if offset + width < 8:
+        expression = f"{expression} & {(1 << width) - 1:#04x}"
+    return expression
+
+
+def _field_expression(field):
+    raw = ""
+    for byte, offset, width in field.parts:
+        part = _part_expression(byte, offset, width)
+        raw = f"({raw}) << {width} | {part}" if raw else part
+    # Expressions with operators are grouped before the transform is applied
+    return field.transform.format(f"({raw})" if " " in raw else raw)
+
+
+def compile_decoder(name, fields, frame):
+    """ Compile a list of fields into a flat decoder function
+    The function takes the frame buffer and returns a `frame` record, fields which are
+    not in the list are None.
+    """
+    expressions = {field.name: _field_expression(field) for field in fields}
+    unknown = set(expressions) - set(frame._fields)
+    if unknown:
+        raise ValueError(f"Fields {sorted(unknown)} of {name} are not in {frame.__name__}")
+    used_bytes = sorted({part[0] for field in fields for part in field.parts})
+    lines = [f"def {name}(payload):"]
+    lines += [f"    b{byte} = payload[{byte}]" for byte in used_bytes]
+    # Values are given in the order of the record, without going through its __new__
+    lines.append("    return _new(Frame, (")
+    lines += [f"        {expressions.get(field, 'None')}," for field in frame._fields]
+    lines.append("    ))")
+    namespace = dict(_NAMESPACE, _new=tuple.__new__, Frame=frame)
+    exec(compile("\n".join(lines), f"<sensit layout {name}>", "exec"), namespace)
+    return namespace[name]
+
+
+def _unknown_mode(version):
+    def decode(payload):
+        raise ValueError(f"Unknown mode for sensit v{version} frame {bytes(payload).hex()}")
+    return decode
+
+
+def compile_version(version, layout):
+    """ Compile the layout of a version into a decoder selecting the mode decoder """
+    decoders = {
+        mode: compile_decoder(f"decode_v{version}_mode{mode}", layout.header + fields, layout.frame)
+        for mode, fields in layout.modes.items()
+    }
+    if layout.default is not None:
+        default = compile_decoder(f"decode_v{version}_default", layout.header + layout.default, layout.frame)
+    else:
+        default = _unknown_mode(version)
+    byte, offset, width = layout.mode
+    mask = (1 << width) - 1
+    get = decoders.get
+
+    def decode(payload):
+        return get((payload[byte] >> offset) & mask, default)(payload)
+
+    decode.__name__ = f"decode_v{version}"
+    decode.decoders = decoders
+    return decode
+
+
+class Decoders(dict):
+    """ version -> decoder taking the frame buffer, compiled on first use
+    Only the versions of the configured devices are compiled. Once compiled, a lookup is a
+    plain dict lookup.
+    """
+
+    def __missing__(self, version):
+        layout = LAYOUTS.get(version)
+        if layout is None:
+            raise KeyError(version)
+        decoder = self[version] = compile_version(version, layout)
+        return decoder
+
+    def __contains__(self, version):
+        return version in LAYOUTS
+
+    def get(self, version, default=None):
+        try:
+            return self[version]
+        except (KeyError, TypeError):
+            return default
+
+
+DECODERS = Decoders()
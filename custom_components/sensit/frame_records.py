@@ -0,0 +1,45 @@
+"""Frames of the Sigfox exports and logs.
+
+Records of the Sigfox callbacks, API messages and backend CSV exports name their columns
+differently. These helpers, shared by the backfill service and scripts/decode_frames.py,
+do not depend on Home Assistant.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+# Column names of the exports: Sigfox callbacks, API messages and backend CSV exports
+DEVICE_KEYS = ("device", "device_id", "id")
+DATA_KEYS = ("data", "payload")
+TIME_KEYS = ("time", "timestamp")
+SEQ_NUMBER_KEYS = ("seqnumber", "seq_number", "seqNumber")
+
+
+def record_value(record, keys):
+    """ Value of the first of keys set in a record, None if none is """
+    for key in keys:
+        value = record.get(key)
+        if value is not None and value != "":
+            return value
+    return None
+
+
+def frame_time(value) -> int | None:
+    """ POSIX time (seconds) of an exported frame, None if missing or invalid
+    Numbers are seconds (callbacks) or milliseconds (API), strings may also be ISO 8601
+    dates, UTC when they have no time zone.
+    """
+    if value is None or value == "":
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        try:
+            date = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        if date.tzinfo is None:
+            date = date.replace(tzinfo=timezone.utc)
+        return int(date.timestamp())
+    # Milliseconds from 1973 on
+    return int(value / 1000 if value > 1e11 else value)
@@ -0,0 +1,157 @@
+"""Import of decoded readings into the recorder long-term statistics.
+
+Readings that never become an entity state (intermediate frames of a burst, history
+backfills) are aggregated into hourly mean/min/max statistics of the Sensit entities.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def hourly_statistics(samples, before: datetime | None = None) -> list[dict]:
+    """ Aggregate (timestamp, value) samples into hourly statistics
+    Arguments:
+        - samples: iterable of (POSIX timestamp, value), None or NaN values are ignored
+        - before: only hours starting before this time are returned (complete hours)
+    Returns StatisticData dicts (start, mean, min, max) sorted by start.
+    """
+    buckets = {}
+    for timestamp, value in samples:
+        if timestamp is None or value is None or value != value:
+            continue
+        hour = int(timestamp) // 3600 * 3600
+        bucket = buckets.get(hour)
+        if bucket is None:
+            buckets[hour] = [float(value), float(value), float(value), 1]
+        else:
+            bucket[0] += value
+            bucket[1] = min(bucket[1], value)
+            bucket[2] = max(bucket[2], value)
+            bucket[3] += 1
+    limit = before.timestamp() if before is not None else None
+    return [
+        {
+            "start": dt_util.utc_from_timestamp(hour),
+            "mean": total / count,
+            "min": minimum,
+            "max": maximum,
+        }
+        for hour, (total, minimum, maximum, count) in sorted(buckets.items())
+        if limit is None or hour < limit
+    ]
+
+
+def current_hour() -> datetime:
+    """Start of the current hour, statistics of this hour are compiled by the recorder."""
+    return dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+
+
+@callback
+def async_import_entity_statistics(entity, samples, before: datetime | None = None) -> int:
+    """ Import samples of an entity into its long-term statistics
+    Only complete hours (before the current one by default) are imported, the recorder
+    compiles the statistics of the current hour from the entity states.
+    Returns the number of hourly statistics imported.
+    """
+    if not can_import_statistics(entity):
+        return 0
+    return async_import_hourly_statistics(entity, hourly_statistics(samples, before or current_hour()))
+
+
+def can_import_statistics(entity) -> bool:
+    """ True if the entity is added to Home Assistant and the recorder is running """
+    hass: HomeAssistant | None = entity.hass
+    return hass is not None and entity.entity_id is not None and "recorder" in hass.config.components
+
+
+@callback
+def async_import_hourly_statistics(entity, statistics) -> int:
+    """ Import hourly statistics (as returned by hourly_statistics) of an entity
+    Hours which already have statistics, compiled by the recorder from the entity states
+    or imported before, are left unchanged: they are looked up in the recorder database
+    first, only the other hours are imported. Values are converted to the unit of the
+    entity states, nothing is imported when they can't be.
+    Returns the number of hourly statistics submitted.
+    """
+    if not statistics or not can_import_statistics(entity):
+        return 0
+    unit = entity.unit_of_measurement
+    convert = state_unit_converter(entity)
+    if convert is None:
+        _LOGGER.debug(
+            "Statistics of %s not imported, %s can't be converted to %s",
+            entity.entity_id,
+            entity.native_unit_of_measurement,
+            unit,
+        )
+        return 0
+    metadata = {
+        "has_mean": True,
+        "has_sum": False,
+        "name": None,
+        "source": "recorder",
+        "statistic_id": entity.entity_id,
+        "unit_of_measurement": unit,
+    }
+    statistics = [
+        {**row, "mean": convert(row["mean"]), "min": convert(row["min"]), "max": convert(row["max"])}
+        for row in statistics
+    ]
+    entity.hass.async_create_task(_async_import_new_hours(entity.hass, metadata, statistics))
+    return len(statistics)
+
+
+def state_unit_converter(entity):
+    """ Conversion of the decoded values of an entity to the unit of its states
+    The recorder compiles the statistics in the state unit, which differs from the native
+    unit when converted by Home Assistant (°C shown as °F for instance). Returns None when
+    the values can't be converted.
+    """
+    native_unit = entity.native_unit_of_measurement
+    unit = entity.unit_of_measurement
+    if unit == native_unit:
+        return lambda value: value
+    # Imported on first use, the integration is loaded before the sensor platform
+    from homeassistant.components.sensor import UNIT_CONVERTERS
+
+    converter = UNIT_CONVERTERS.get(entity.device_class)
+    if converter is None or native_unit not in converter.VALID_UNITS or unit not in converter.VALID_UNITS:
+        return None
+    return converter.converter_factory(native_unit, unit)
+
+
+async def _async_import_new_hours(hass: HomeAssistant, metadata, statistics) -> int:
+    """ Import the statistics of the hours without statistics, return their number """
+    # Imported lazily, the recorder is an optional dependency
+    from homeassistant.components.recorder import get_instance
+    from homeassistant.components.recorder.statistics import async_import_statistics
+
+    statistic_id = metadata["statistic_id"]
+    starts = [row["start"] for row in statistics]
+    recorded = await get_instance(hass).async_add_executor_job(
+        _recorded_hours, hass, statistic_id, min(starts), max(starts) + timedelta(hours=1)
+    )
+    new_statistics = [row for row in statistics if row["start"].timestamp() not in recorded]
+    if new_statistics:
+        async_import_statistics(hass, metadata, new_statistics)
+    _LOGGER.debug(
+        "Imported %s hourly statistics for %s, %s hour(s) already recorded",
+        len(new_statistics),
+        statistic_id,
+        len(statistics) - len(new_statistics),
+    )
+    return len(new_statistics)
+
+
+def _recorded_hours(hass: HomeAssistant, statistic_id, start: datetime, end: datetime) -> set[float]:
+    """ Start (POSIX timestamp) of the hours with statistics between start and end """
+    from homeassistant.components.recorder.statistics import statistics_during_period
+
+    rows = statistics_during_period(hass, start, end, {statistic_id}, "hour", None, {"mean"})
+    return {row["start"] for row in rows.get(statistic_id, ())}
@@ -0,0 +1,95 @@
+"""Instrumentation of the Sensit devices.
+
+Counters and decode latency histograms of a device, shown in the diagnostics download
+and the diagnostic sensors. A device only keeps metrics while instrumentation is on
+(one of its diagnostic sensors is enabled): otherwise its `metrics` is None and the hot
+path costs a single `is not None` check.
+"""
+from __future__ import annotations
+
+from bisect import bisect_left
+
+# Upper bounds (microseconds) of the latency histogram buckets, the last one is unbounded
+LATENCY_BUCKETS = (5, 10, 20, 50, 100, 200, 500, 1000, 5000, 10000, 50000)
+
+
+class LatencyHistogram:
+    """ Fixed buckets histogram of latencies """
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, latency_us):
+        self.counts[bisect_left(LATENCY_BUCKETS, latency_us)] += 1
+        self.count += 1
+        self.total += latency_us
+        if latency_us > self.max:
+            self.max = latency_us
+
+    @property
+    def mean(self) -> float | None:
+        return self.total / self.count if self.count else None
+
+    def merge(self, other: LatencyHistogram):
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_us": self.mean,
+            "max_us": self.max,
+            # Bucket upper bound (us, None for the last one) -> count
+            "buckets": [
+                [bound, count]
+                for bound, count in zip(LATENCY_BUCKETS + (None,), self.counts)
+            ],
+        }
+
+
+class DeviceMetrics:
+    """ Counters of the frames of one device
+    Duplicate and stale frames are counted by the frame filter of the device.
+    """
+    __slots__ = ("received", "decoded", "failed", "writes", "last_seen", "frame_latency", "batch_latency")
+
+    def __init__(self):
+        self.received = 0
+        self.decoded = 0
+        self.failed = 0
+        # State writes of the sensors
+        self.writes = 0
+        # Time (aware UTC datetime) of the latest frame received
+        self.last_seen = None
+        # Decoding of one frame, and of the history of a burst
+        self.frame_latency = LatencyHistogram()
+        self.batch_latency = LatencyHistogram()
+
+    def merge(self, other: DeviceMetrics):
+        """ Add the counters of another device, for the totals """
+        self.received += other.received
+        self.decoded += other.decoded
+        self.failed += other.failed
+        self.writes += other.writes
+        if other.last_seen is not None and (self.last_seen is None or other.last_seen > self.last_seen):
+            self.last_seen = other.last_seen
+        self.frame_latency.merge(other.frame_latency)
+        self.batch_latency.merge(other.batch_latency)
+
+    def as_dict(self) -> dict:
+        return {
+            "received": self.received,
+            "decoded": self.decoded,
+            "failed": self.failed,
+            "writes": self.writes,
+            "last_seen": self.last_seen,
+            "frame_latency": self.frame_latency.as_dict(),
+            "batch_latency": self.batch_latency.as_dict(),
+        }
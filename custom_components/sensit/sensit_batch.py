@@ -0,0 +1,137 @@
+"""Batch decoding of Sensit payloads.
+
+Decodes many payloads of one version at once into columns, for backfills and analytics.
+With NumPy installed, fields are extracted with vectorized bit operations over the whole
+batch; without it, each payload goes through the scalar decoder. NumPy is slow to import,
+it is only imported by the first batch.
+"""
+import logging
+
+from .frame_layout import DECODERS, HUMIDITY, V1_TEMPERATURE, payload_bytes
+
+# NumPy module once loaded (None if not installed), see load_numpy
+np = None
+_numpy_loaded = False
+
+_LOGGER = logging.getLogger(__name__)
+
+# Columns of a decoded batch
+COLUMNS = ("valid", "mode", "battery", "temperature", "humidity", "event_count")
+
+# Frame length (in bytes) required by each v1 mode
+_V1_LENGTHS = (4, 4, 5, 7)
+
+
+def load_numpy():
+    """ NumPy module, imported on first call, None when it is not installed """
+    global np, _numpy_loaded
+    if not _numpy_loaded:
+        try:
+            import numpy
+        except ImportError:  # pragma: no cover - NumPy is optional
+            numpy = None
+        np = numpy
+        _numpy_loaded = True
+    return np
+
+
+def numpy_loaded() -> bool:
+    """ True once load_numpy was called, it then returns without importing """
+    return _numpy_loaded
+
+
+def _frame_payloads(payloads):
+    """ Frame bytes of each payload, None for invalid hex strings """
+    # NumPy array (checked without importing NumPy)
+    if hasattr(payloads, "tolist"):
+        payloads = payloads.tolist()
+    frames = []
+    for payload in payloads:
+        try:
+            frames.append(payload_bytes(payload))
+        except (TypeError, ValueError):
+            frames.append(None)
+    return frames
+
+
+def decode_batch(version, payloads, use_numpy=True):
+    """ Decode a sequence of payloads of one sensit version
+    Arguments:
+        - version: Version of the sensit (1, 2 or 3)
+        - payloads: Sequence or NumPy array of hex strings or frame bytes (bytes, bytearray
+          or memoryview, read without per-field conversion)
+        - use_numpy: Use the vectorized decoder when NumPy is available
+    Returns a dict with one column per name of COLUMNS, each column holding one value per
+    payload. Columns are NumPy arrays (missing values are NaN, mode is -1 for invalid
+    payloads) or lists when decoded without NumPy (missing values are None).
+    Values are the same as the ones returned by the scalar parsers.
+    """
+    if version not in DECODERS:
+        raise ValueError(f"Sensit version is incorrect ({str(version)}). Should be either 1, 2 or 3.")
+    frames = _frame_payloads(payloads)
+    if use_numpy and load_numpy() is not None:
+        return _decode_numpy(version, frames)
+    return _decode_python(version, frames)
+
+
+def _decode_python(version, frames):
+    decoder = DECODERS[version]
+    columns = {name: [] for name in COLUMNS}
+    for frame in frames:
+        try:
+            data = decoder(frame) if frame is not None else None
+        except Exception:
+            data = None
+        columns["valid"].append(data is not None)
+        for name in COLUMNS[1:]:
+            columns[name].append(getattr(data, name, None))
+    return columns
+
+
+def _frames(frames):
+    """ First 4 bytes of each frame as an (n, 4) integer array, with frame lengths and validity """
+    count = len(frames)
+    lengths = np.fromiter((len(frame) if frame is not None else 0 for frame in frames), dtype=np.int64, count=count)
+    valid = lengths >= 4
+    padding = bytes(4)
+    raw = b"".join(frame[:4] if ok else padding for frame, ok in zip(frames, valid.tolist()))
+    heads = np.frombuffer(raw, dtype=np.uint8).reshape(count, 4).astype(np.int64)
+    return heads, lengths, valid
+
+
+def _decode_numpy(version, frames):
+    heads, lengths, valid = _frames(frames)
+    b0, b1, b2, b3 = heads.T
+    nan = np.nan
+    if version == 1:
+        mode = b0 & 0x03
+        valid &= lengths >= np.asarray(_V1_LENGTHS)[mode]
+        battery = b1 * 0.02
+        temperature = np.asarray(V1_TEMPERATURE)[b3]
+        humidity = np.full(len(mode), nan)
+        event_count = np.full(len(mode), nan)
+    elif version == 2:
+        mode = b0 & 0x07
+        battery = ((b0 >> 7) << 4 | (b1 & 0x0F)) * 0.05 * 2.7
+        has_temperature = (mode != 2) & (mode != 3)
+        temperature = np.where(has_temperature, (((b1 >> 4) << 6 | (b2 & 0x3F)) - 200) / 8, nan)
+        humidity = np.where(mode == 1, np.asarray(HUMIDITY)[b3], nan)
+        event_count = np.where(mode >= 2, b3, nan)
+    else:
+        mode = b1 >> 3
+        battery = (b0 >> 3) * 0.05 + 2.7
+        temperature = np.where(mode == 1, (((b1 & 0x03) << 8 | b2) - 200) / 8, nan)
+        humidity = np.where(mode == 1, b3, nan)
+        event_count = np.where((mode != 1) & (mode != 2), b2 << 8 | b3, nan)
+    invalid = ~valid
+    columns = {
+        "valid": valid,
+        "mode": np.where(valid, mode, -1),
+        "battery": battery.astype(np.float64),
+        "temperature": temperature.astype(np.float64),
+        "humidity": humidity.astype(np.float64),
+        "event_count": event_count.astype(np.float64),
+    }
+    for name in COLUMNS[2:]:
+        columns[name][invalid] = nan
+    return columns
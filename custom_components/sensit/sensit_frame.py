@@ -0,0 +1,74 @@
+"""Decoded Sensit frames.
+
+One immutable record per Sensit version, holding the numeric values of the frame.
+Fields which are not carried by the mode of the frame are None.
+"""
+from __future__ import annotations
+
+from typing import NamedTuple
+
+
+class SensitV1Frame(NamedTuple):
+    """ Decoded frame of a sensit v1, see SensitParser.parse_v1 """
+    mode: int
+    period: int
+    forced: int
+    button: int
+    battery: float
+    sent_battery: float
+    temperature: float
+    # Temperature mode: history values
+    values: tuple | None = None
+    # Movement and full modes
+    motion: int | None = None
+    # Full mode
+    temperature_min: float | None = None
+    temperature_max: float | None = None
+
+
+class SensitV2Frame(NamedTuple):
+    """ Decoded frame of a sensit v2, see SensitParser.parse_v2 """
+    mode: int
+    period: int
+    type: int
+    battery: float
+    # All modes but light and door
+    temperature: float | None = None
+    switch_state: int | None = None
+    # Button mode: software version
+    version_major: int | None = None
+    version_minor: int | None = None
+    # Temperature mode
+    humidity: float | None = None
+    # Light mode
+    light: float | None = None
+    # Light and door modes, temperature from the MSB only
+    temperature_from_msb: float | None = None
+    # All modes but button and temperature
+    event_count: int | None = None
+
+
+class SensitV3Frame(NamedTuple):
+    """ Decoded frame of a sensit v3, see SensitParser.parse_v3 """
+    mode: int
+    button: int
+    battery: float
+    # Temperature mode
+    temperature: float | None = None
+    humidity: float | None = None
+    # Light mode
+    brightness: float | None = None
+    # Door, vibration and magnet modes: status
+    door: int | None = None
+    vibration: int | None = None
+    magnet: int | None = None
+    # All modes but temperature and light
+    event_count: int | None = None
+
+
+# version -> decoded frame type
+FRAME_TYPES = {
+    1: SensitV1Frame,
+    2: SensitV2Frame,
+    3: SensitV3Frame,
+}
@@ -1,8 +1,31 @@
 import logging
-import json
+
+from .decode_cache import DECODE_CACHE
+from .frame_layout import DECODERS, V1_BATTERY, V1_TEMPERATURE
 
 _LOGGER = logging.getLogger(__name__)
 
+
+class SensitParseError(ValueError):
+    """ Raised by the parsers for unknown versions and invalid frames """
+
+
+def __getattr__(name):
+    # Frame decoders decode_v1, decode_v2 and decode_v3, compiled from the layout tables on first use
+    if name.startswith("decode_v") and name[8:].isdigit() and int(name[8:]) in DECODERS:
+        return DECODERS[int(name[8:])]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def get_decoder(version):
+    """ Decoder of a sensit version, taking the frame bytes. None for unknown versions.
+    The decoder indexes the buffer it is given (bytes, bytearray or memoryview), it does not
+    parse hex strings: see payload_bytes.
+    Decoders return the decoded frame record and raise an exception for invalid frames.
+    """
+    return DECODERS.get(version)
+
+
 class SensitParser:
     def __init__(self):
         pass
@@ -12,7 +35,7 @@ class SensitParser:
         """
         ret = 0
         if len(data) <= 2:
-            ret = int(data, 16) * 0.02
+            ret = V1_BATTERY[int(data, 16)]
         return ret
 
     def convert_temperature(self, data):
@@ -20,16 +43,32 @@ class SensitParser:
         """
         ret = 0
         if len(data) <= 2:
-            ret = int(data, 16)
-            if ret > 128:
-                ret = ret - 256
-            ret = (ret + 46) /2
+            ret = V1_TEMPERATURE[int(data, 16)]
         return ret
 
+    def parse(self, version, data, name="sensit"):
+        """ Parse data of any sensit version
+        Arguments:
+            - version: Version of the sensit (1, 2 or 3)
+            - data: Hex string or frame bytes (bytes, bytearray or memoryview) to be parsed
+            - name: Name of device, used to display a clear log
+        Hex strings are converted to bytes once, fields are then read from the frame bytes.
+        Returns the decoded frame of the version (SensitV1Frame, SensitV2Frame or
+        SensitV3Frame), shared through the decode cache.
+        Raise SensitParseError for unknown versions and invalid frames.
+        """
+        if version not in DECODERS:
+            raise SensitParseError(f"Sensit {name} version is incorrect ({version}). Should be either 1, 2 or 3.")
+        _LOGGER.debug("Sensit %s v%s data parsing %s", name, version, data)
+        try:
+            return DECODE_CACHE.decode(version, data)
+        except Exception as e:
+            raise SensitParseError(f"Sensit {name} Error during data parsing {data!r}: {e}") from e
+
     def parse_v1(self, data, name="sensit"):
         """ Parser for sensit v1
         Arguments:
-            - data: String to be parsed
+            - data: Hex string or frame bytes to be parsed
             - name: Name of device, used to display a clear log
         b0-b2: Mode (0: off, 1: temperature, 2: movement, 3: full)
         b3-b5: Period (0: 24h, 1: 12h, 2: 6h, 3: 2h, 4: 1h, 5: 30m, 6: 15m, 7: 10m)
@@ -43,54 +82,13 @@ class SensitParser:
             - Movement: 1 byte for value, 3 bytes for config
             - Full: 1 byte min temp, 1 byte max temp, 1 byte movement value
         """
-        out_data = {}
-        try:
-            logging.debug(f"Sensit {name} v1 data parsing {data}")
-            # First byte must be split in bits
-            b = "{:08b}".format(int(data[:2], base=16))
-            # print("First byte: " + str(b))
-            out_data.update({"mode":  int(b[-2:])})
-            out_data.update({"period": int(b[len(b)-5:len(b)-3], 2)})
-            out_data.update({"forced": int(b[1])})
-            out_data.update({"button": int(b[0])})
-            # Following bytes are battery levels and temperature
-            out_data.update({"battery": self.convert_battery(data[2:4])})
-    
-            # Push battery update to sensor
-            out_data.update({"sent_battery": self.convert_battery(data[4:6])})
-            out_data.update({"temperature": self.convert_temperature(data[6:8])})
-            # Next bytes depends on mode
-            mode = out_data.get("mode")
-            out_data.update({"values": []})
-            # Not all modes are implemented for now (to implement: Motion, Sound, All and Off)
-            if mode == 1:
-                logging.info(f"Sensit {name} mode temperature")
-                for i in range(8, len(data), 2):
-                    out_data["values"].append(self.convert_temperature(data[i:i+2]))
-                logging.info(f"-- Data parsed: {str(out_data)}")
-                return out_data
-            elif mode == 2:
-                logging.info(f"Sensit {name} mode Motion")
-                # TODO Implement Motion mode message parsing for v1
-                return {"body": {"message": "Motion message not implemented yet"}, "statusCode": 500}
-            elif mode == 3:
-                logging.info(f"Sensit {name}  mode All")
-                # TODO Implement All mode message parsing for v1
-                return {"body": {"message": "All message not implemented yet"}, "statusCode": 500}
-            else:
-                logging.info(f"Sensit {name} Off")
-                # TODO Implement Off mode message parsing for v1
-                return {"body": {"message": "Off notification not implemented yet"}, "statusCode": 500}
-        except Exception as e:
-            logging.error(f"Sensit {name} Error during data parsing {str(data)}. Error: {str(e.args)}")
-            return {"body": {"message": "Error " + str(e.args)}, "statusCode": 500}
-        return {"body": {"message": "Nothing was processed"}, "statusCode": 500}
+        return self.parse(1, data, name)
 
 
     def parse_v2(self, data, name="sensit"):
         """ Parser for sensit v2
         Arguments:
-            - data: String to be parsed
+            - data: Hex string or frame bytes to be parsed
             - name: Name of device, used to display a clear log
         Bytes are read from left to right, the first byte being the most significant one
         Bits are numbered the other way, from the LSB to the MSB. Bit 0 being the LSB & bit 7 the
@@ -132,75 +130,13 @@ class SensitParser:
         For Temperature MSB: ({value} * 6.4) - 20
         OR Temperature mSB LSB ({value} - 200) / 8 
         """
-        out_data = {}
-        try:
-            logging.debug(f"Sensit {name} v2 data parsing {data}")
-            # Byte 0 - Mode, period, ...
-            b = "{:08b}".format(int(data[:2], base=16))
-            logging.info(b)
-            out_data.update({"mode":  int(b[8-1-2:8-0], 2)})
-            out_data.update({"period": int(b[8-1-4:8-3], 2)})
-            out_data.update({"type": int(b[8-1-6:8-5], 2)})
-            out_data.update({"battery_msb": b[8-1-7:8-7]})
-    
-            # Byte 1 - Temperature MSB and Battery LSB
-            b = "{:08b}".format(int(data[2:4], base=16))
-            # Temperature and Battery seem to be mis-documented
-            out_data.update({"temperature_msb": b[8-1-7:8-4]})
-            out_data.update({"battery_lsb": b[8-1-3:8-0]})
-    
-            # Byte 2 - Data depends on mode
-            b = "{:08b}".format(int(data[4:6], base=16))
-            if out_data.get("mode") == 2:
-                # Light mode
-                logging.warning("Light mode, not implemented")
-                # TODO implement Light mode data parsing
-            elif out_data.get("mode") == 3:
-                # Door mode, nothing in here
-                pass
-            else:
-                # Parse byte
-                out_data.update({"temperature_lsb": b[8-1-5:8-0]})
-                out_data.update({"switch_state": b[8-1-6:8-6]})
-                # b7 is not used
-    
-            # Byte 3 - Version or Data
-            b = "{:08b}".format(int(data[6:8], base=16))
-            if out_data.get("mode") == 0:
-                # Mode button
-                # TODO Add switch button sensor ? 
-                logger.warning(f"Sensit {name} - Button mode not implemented")
-                pass
-                # TODO Implement parsing of software version ? 
-            elif out_data.get("mode") == 1:
-                out_data.update({"humidity": int(b[8-1-7:8-0], 2)*0.5})
-            else:
-                # Other modes, data is the number of alerts
-                # TODO Implement Alert count ? 
-                pass
-    
-            # Data has been parsed, we can compute Temperature and battery      
-            battery = int(out_data.get("battery_msb") + out_data.get("battery_lsb"), 2) * 0.05 * 2.7
-            out_data.update({"battery": battery})
-            
-            if out_data.get("temperature_lsb"):
-                temperature = (int(out_data.get("temperature_msb") + out_data.get("temperature_lsb"), 2) - 200) / 8
-                out_data.update({"temperature": temperature})
-            else:
-                temperature = (int(out_data.get("temperature_msb"), 2) * 6.4 )- 20 
-                out_data.update({"temperature_from_msb": temperature})
-                # Temperature computation with MSB only is not accurate
-            return (out_data)
-        except Exception as e:
-            logging.error(f"Sensit {name} Error during data parsing {str(data)}. Error: {str(e.args)}")
-            return {"body": {"message": "Error " + str(e.args)}, "statusCode": 500}
-
+        return self.parse(2, data, name)
 
 
     def parse_v3(self, data, name="sensit"):
         """ Parser for sensit v3
         Arguments:
-            - data: String to be parsed
+            - data: Hex string or frame bytes to be parsed
             - name: Name of device, used to display a clear log
         Bytes are read from left to right, the first byte being the most significant one
         Bits are numbered the other way, from the LSB to the MSB. Bit 0 being the LSB & bit 7 the
@@ -233,60 +169,4 @@ class SensitParser:
         Magnet: no magnet detected, 1: magnet detected
         Event count: incremented every time an event is triggered, reset to 0 after a message or mode change
         """
-        out_data = {}
-        try:
-            logging.debug(f"Sensit {name} v3 data parsing {data}")
-            # Byte 0 - Mode, period, ...
-            b = "{:08b}".format(int(data[:2], base=16))
-            logging.info(b)
-            out_data.update({"battery_raw":  int(b[8-1-7:8-3], 2)})
-    
-            # Byte 1 - Temperature MSB and Battery LSB
-            b = "{:08b}".format(int(data[2:4], base=16))
-            out_data.update({"mode": int(b[8-1-7:8-3], 2)})
-            out_data.update({"button": b[8-1-2:8-2]})
-            if out_data.get("mode") == 1:
-                out_data.update({"temperature_msb": b[8-1-1:8-0]})
-            elif out_data.get("mode") == 3:
-                out_data.update({"door": b[8-1-1:8-0]})
-            elif out_data.get("mode") == 4:
-                out_data.update({"vibration": b[8-1-1:8-0]})
-            elif out_data.get("mode") == 5:
-                out_data.update({"magnet": b[8-1-1:8-0]})
-    
-            # Byte 2 - Data depends on mode
-            b = "{:08b}".format(int(data[4:6], base=16))
-            if out_data.get("mode") == 1:
-                out_data.update({"temperature_lsb": b[8-1-7:8-0]})
-            elif out_data.get("mode") == 2:
-                # Light mode
-                out_data.update({"brithness_msb": b[8-1-7:8-0]})
-                logging.warning("Light mode, not implemented")
-                # TODO implement Light mode data parsing
-            else:
-                out_data.update({"event_count_msb": b[8-1-7:8-0]})
-                
-    
-            # Byte 3 - Version or Data
-            b = "{:08b}".format(int(data[6:8], base=16))
-            if out_data.get("mode") == 1:
-                out_data.update({"humidity": int(b[8-1-7:8-0], 2)})
-            elif out_data.get("mode") == 2:
-                out_data.update({"brightness_lsb": b[8-1-7:8-0]})
-            else:
-                out_data.update({"event_count_lsb": b[8-1-7:8-0]})
-    
-            # Data has been parsed, we can compute Temperature and battery      
-            battery = out_data.get("battery_raw") * 0.05 + 2.7
-            out_data.update({"battery": battery})
-            
-            if out_data.get("temperature_lsb"):
-                temperature = (int(out_data.get("temperature_msb") + out_data.get("temperature_lsb"), 2) - 200) / 8
-                out_data.update({"temperature": temperature})
-            return (out_data)
-        except Exception as e:
-            logging.error(f"Sensit {name} Error during data parsing {str(data)}. Error: {str(e.args)}")
-            return {"body": {"message": "Error " + str(e.args)}, "statusCode": 500}
-
-
-
+        return self.parse(3, data, name)
@@ -1,82 +1,270 @@
-import logging
-import json
+from __future__ import annotations
 
-import voluptuous as vol
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import timedelta
+from functools import partial
+import logging
+from time import monotonic, perf_counter
+from typing import Any
 
-from homeassistant.components.sensor import PLATFORM_SCHEMA
-from homeassistant.const import CONF_NAME, CONF_SENSORS
-import homeassistant.helpers.config_validation as cv
-from . import DOMAIN
+from homeassistant.const import CONF_NAME, STATE_UNAVAILABLE, STATE_UNKNOWN
 
 from homeassistant.components.sensor import (
+    RestoreSensor,
     SensorDeviceClass,
     SensorEntity,
+    SensorEntityDescription,
     SensorStateClass,
 )
 
-from homeassistant.components.text import TextEntity
-
-from homeassistant.const import TEMP_CELSIUS
-from homeassistant.const import UnitOfElectricPotential
+from homeassistant.const import LIGHT_LUX, PERCENTAGE, TEMP_CELSIUS
+from homeassistant.const import EntityCategory, UnitOfElectricPotential, UnitOfTime
 
 from homeassistant import config_entries, core
-
-from .const import DOMAIN
-from .sensit_parser import SensitParser
+from homeassistant.core import callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.typing import StateType
+from homeassistant.util import dt as dt_util
+
+from .const import CONF_DEVICES, CONF_DIAGNOSTICS, DOMAIN
+from .decode_cache import DECODE_CACHE
+from .device_table import CONF_DEVICE_ID, CONF_MODE, CONF_VERSION
+from .dispatcher import async_get_dispatcher
+from .frame_filter import FrameFilter, as_int
+from .frame_layout import payload_bytes
+from .long_term_statistics import async_import_entity_statistics, async_import_hourly_statistics
+from .metrics import DeviceMetrics
+from .sensit_batch import decode_batch
+from .sensit_frame import FRAME_TYPES
+from .sensit_parser import get_decoder
+from .significant_change import HEARTBEAT, SKIP, change_rules, rule_for
+from .storage import async_get_storage
 
 _LOGGER = logging.getLogger(__name__)
 
-# TODO Clean this part, use const.py ? 
-CONF_DEVICE_ID = "device_id"
-CONF_VERSION = "version"
-CONF_MODE = "mode"
-
-DEVICE_SCHEMA = vol.Schema(
-    {
-        vol.Required(CONF_DEVICE_ID): cv.string,
-        vol.Required(CONF_VERSION): cv.positive_int,
-        vol.Optional(CONF_MODE, default="local"): cv.string,
-    }
+
+def __getattr__(name):
+    # The YAML platform schema is only built when a YAML configuration is validated
+    if name == "PLATFORM_SCHEMA":
+        from .yaml_platform import PLATFORM_SCHEMA
+        return PLATFORM_SCHEMA
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@dataclass
+class SensitSensorEntityDescription(SensorEntityDescription):
+    """ Sensor fed by a field of the decoded frames, the key is the field name """
+    # Conversion of the decoded value to the state, the value is used as is if None
+    value_fn: Callable[[Any], StateType] | None = None
+
+
+def _states(*names):
+    """ Enum sensor options and converter, the decoded value being the index of the state """
+    def value_fn(value):
+        return names[value] if value < len(names) else None
+    return {"options": list(names), "value_fn": value_fn}
+
+
+# Sensors of the decoded fields, a field missing from the frame type of a version is ignored
+SENSOR_TYPES: tuple[SensitSensorEntityDescription, ...] = (
+    SensitSensorEntityDescription(
+        key="temperature",
+        native_unit_of_measurement=TEMP_CELSIUS,
+        device_class=SensorDeviceClass.TEMPERATURE,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    SensitSensorEntityDescription(
+        key="battery",
+        native_unit_of_measurement=UnitOfElectricPotential.VOLT,
+        device_class=SensorDeviceClass.VOLTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    SensitSensorEntityDescription(
+        key="humidity",
+        native_unit_of_measurement=PERCENTAGE,
+        device_class=SensorDeviceClass.HUMIDITY,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    SensitSensorEntityDescription(
+        key="temperature_min",
+        native_unit_of_measurement=TEMP_CELSIUS,
+        device_class=SensorDeviceClass.TEMPERATURE,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    SensitSensorEntityDescription(
+        key="temperature_max",
+        native_unit_of_measurement=TEMP_CELSIUS,
+        device_class=SensorDeviceClass.TEMPERATURE,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    SensitSensorEntityDescription(
+        key="light",
+        native_unit_of_measurement=LIGHT_LUX,
+        device_class=SensorDeviceClass.ILLUMINANCE,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    SensitSensorEntityDescription(
+        key="brightness",
+        native_unit_of_measurement=LIGHT_LUX,
+        device_class=SensorDeviceClass.ILLUMINANCE,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    SensitSensorEntityDescription(
+        key="motion",
+        icon="mdi:motion-sensor",
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    SensitSensorEntityDescription(
+        key="event_count",
+        icon="mdi:counter",
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+    SensitSensorEntityDescription(
+        key="button",
+        icon="mdi:gesture-tap-button",
+        device_class=SensorDeviceClass.ENUM,
+        **_states("released", "pressed"),
+    ),
+    SensitSensorEntityDescription(
+        key="door",
+        icon="mdi:door",
+        device_class=SensorDeviceClass.ENUM,
+        **_states("not_calibrated", "unused", "closed", "open"),
+    ),
+    SensitSensorEntityDescription(
+        key="vibration",
+        icon="mdi:vibrate",
+        device_class=SensorDeviceClass.ENUM,
+        **_states("none", "detected"),
+    ),
+    SensitSensorEntityDescription(
+        key="magnet",
+        icon="mdi:magnet",
+        device_class=SensorDeviceClass.ENUM,
+        **_states("none", "detected"),
+    ),
 )
-PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
-    {
-        vol.Required(CONF_SENSORS): vol.Schema({cv.string: DEVICE_SCHEMA}),
-    }
+
+
+@dataclass
+class SensitDiagnosticEntityDescription(SensorEntityDescription):
+    """ Diagnostic sensor of a device, the value is read from the device and its metrics """
+    value_fn: Callable[[Any], StateType] = lambda device: None
+
+
+def _milliseconds(microseconds):
+    return microseconds / 1000 if microseconds is not None else None
+
+
+def _metric(read):
+    """ Diagnostic value read from the metrics of a device, None while instrumentation is off """
+    def value_fn(device):
+        return read(device.metrics) if device.metrics is not None else None
+    return value_fn
+
+
+# Diagnostic sensors, only created for the devices of the entries with diagnostics on.
+# While one of them is enabled, the instrumentation of its device is on.
+DIAGNOSTIC_TYPES: tuple[SensitDiagnosticEntityDescription, ...] = (
+    SensitDiagnosticEntityDescription(
+        key="frames_received",
+        icon="mdi:counter",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=_metric(lambda metrics: metrics.received),
+    ),
+    SensitDiagnosticEntityDescription(
+        key="frames_failed",
+        icon="mdi:alert-circle-outline",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=_metric(lambda metrics: metrics.failed),
+    ),
+    SensitDiagnosticEntityDescription(
+        key="frames_dropped",
+        icon="mdi:content-duplicate",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda device: device.frame_filter.dropped,
+    ),
+    SensitDiagnosticEntityDescription(
+        key="decode_latency",
+        # The duration device class has no microseconds unit
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=3,
+        value_fn=_metric(lambda metrics: _milliseconds(metrics.frame_latency.mean)),
+    ),
+    SensitDiagnosticEntityDescription(
+        key="entity_writes",
+        icon="mdi:database-edit-outline",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=_metric(lambda metrics: metrics.writes),
+    ),
+    SensitDiagnosticEntityDescription(
+        key="last_seen",
+        device_class=SensorDeviceClass.TIMESTAMP,
+        value_fn=_metric(lambda metrics: metrics.last_seen),
+    ),
 )
+# Diagnostic sensors are written periodically, not on each frame
+DIAGNOSTIC_INTERVAL = timedelta(seconds=60)
+
+
+def sensor_fields(version):
+    """ (index in the decoded frame, description) of the sensors of a sensit version """
+    frame_type = FRAME_TYPES.get(version)
+    if frame_type is None:
+        return ()
+    return tuple(
+        (frame_type._fields.index(description.key), description)
+        for description in SENSOR_TYPES
+        if description.key in frame_type._fields
+    )
+
+
+# Longest first, so that a key is not taken for the end of a longer one
+_SENSOR_KEYS = sorted((description.key for description in SENSOR_TYPES), key=len, reverse=True)
+
+
+def registered_sensor_keys(hass, config_entry_id=None):
+    """ Device ID -> keys of its sensors already in the entity registry
+    Sensors of a config entry, or of the YAML configuration if config_entry_id is None.
+    """
+    registry = er.async_get(hass)
+    if config_entry_id is not None:
+        entries = er.async_entries_for_config_entry(registry, config_entry_id)
+    else:
+        entries = [
+            entry for entry in registry.entities.values()
+            if entry.platform == DOMAIN and entry.config_entry_id is None
+        ]
+    registered = {}
+    for entry in entries:
+        for key in _SENSOR_KEYS:
+            if entry.unique_id.endswith(f"_{key}"):
+                registered.setdefault(entry.unique_id[:-len(key) - 1], set()).add(key)
+                break
+    return registered
 
 # Load configuration from file
-def setup_platform(hass, config, add_entities, discovery_info=None):
-    # Obtain configuration
-    sensors = config.get(CONF_SENSORS)
-    devices = []
-    # Create Device (Sensors + Sensit object)
-    for dev_name, properties in sensors.items():
-        # Device ID should be added as attr to the sensors
-        # Other fields expect name could be removed
-        temp_sensor = SensitTemperature(
-            properties.get(CONF_NAME, dev_name),
-            properties.get(CONF_DEVICE_ID),
-            properties.get(CONF_VERSION),
-            properties.get(CONF_MODE),
-        )
-        battery_sensor = SensitBattery(
-            properties.get(CONF_NAME, dev_name),
-            properties.get(CONF_DEVICE_ID),
-        )
-        sensit = SensitDevice(
-                properties.get(CONF_NAME, dev_name),
-                properties.get(CONF_DEVICE_ID),
-                properties.get(CONF_VERSION),
-                properties.get(CONF_MODE),
-                temp_sensor,
-                battery_sensor)
-        # TODO Add sensors for other metrics: Sound, Motion, Light, Magnet, Button, ...
-        # Register a callback to update value on new data reception
-        hass.helpers.event.async_track_state_change_event("sensor."+sensit.device_id, sensit.handle_event)
-        devices.append(temp_sensor)
-        devices.append( battery_sensor)
-    # Add entities to Home Assistant
-    add_entities(devices)
+async def async_setup_platform(hass, config, async_add_entities, discovery_info=None):
+    """ Set up the devices of the YAML configuration, see yaml_platform.py """
+    from .yaml_platform import async_setup_yaml_devices
+    await async_setup_yaml_devices(hass, config, async_add_entities)
+
+
+@callback
+def async_remove_diagnostic_sensors(hass, config_entry_id):
+    """ Remove the diagnostic sensors of an entry from the entity registry
+    They are left when diagnostics are turned off, and were registered for every device
+    by former versions.
+    """
+    registry = er.async_get(hass)
+    suffixes = tuple(f"_{description.key}" for description in DIAGNOSTIC_TYPES)
+    for entry in er.async_entries_for_config_entry(registry, config_entry_id):
+        if entry.domain == "sensor" and entry.unique_id.endswith(suffixes):
+            registry.async_remove(entry.entity_id)
 
 
 async def async_setup_entry(
@@ -89,48 +277,155 @@ async def async_setup_entry(
     # Update our config to include new repos and remove those that have been removed.
     if config_entry.options:
         config.update(config_entry.options)
-    devices = []
-    # Create Device (Sensors + Sensit object)
-    # Device ID should be added as attr to the sensors
-    # Other fields expect name could be removed
-    temp_sensor = SensitTemperature(
-        config.get(CONF_NAME, config.get(CONF_DEVICE_ID)),
-        config.get(CONF_DEVICE_ID),
-        config.get(CONF_VERSION),
-        config.get(CONF_MODE),
-    )
-    battery_sensor = SensitBattery(
-        config.get(CONF_NAME, config.get(CONF_DEVICE_ID)),
-        config.get(CONF_DEVICE_ID),
-    )
-    sensit = SensitDevice(
-            config.get(CONF_NAME, config.get(CONF_DEVICE_ID)),
-            config.get(CONF_DEVICE_ID),
-            config.get(CONF_VERSION),
-            config.get(CONF_MODE),
-            temp_sensor,
-            battery_sensor)
-    # Register a callback to update value on new data reception
-    hass.helpers.event.async_track_state_change_event("sensor."+sensit.device_id, sensit.handle_event)
-    devices.append(temp_sensor)
-    devices.append( battery_sensor)
-    # Add entities to Home Assistant
-    async_add_entities(devices)
+    # Hub entries hold a table of devices, other entries a single device
+    rows = config[CONF_DEVICES] if CONF_DEVICES in config else [config]
+    # Shared by the devices of the entry
+    rules = change_rules(config)
+    dispatcher = async_get_dispatcher(hass)
+    storage = await async_get_storage(hass)
+    registered = registered_sensor_keys(hass, config_entry.entry_id)
+    sensors = []
+    for row in rows:
+        # Create Device (Sensit object), its sensors are created when it first reports their field
+        # Device ID should be added as attr to the sensors
+        # Other fields expect name could be removed
+        sensit = SensitDevice(
+                row.get(CONF_NAME, row.get(CONF_DEVICE_ID)),
+                row.get(CONF_DEVICE_ID),
+                row.get(CONF_VERSION),
+                row.get(CONF_MODE),
+                async_add_entities,
+                rules)
+        # Route new data of the device to it, resuming from its last frame, until the entry is unloaded
+        sensit.restore(storage.get_frame(sensit.device_id))
+        config_entry.async_on_unload(storage.async_track_device(sensit))
+        config_entry.async_on_unload(dispatcher.async_add_device(sensit, config_entry.entry_id))
+        sensors.extend(sensit.create_sensors(registered.get(sensit.device_id, ())))
+        if config.get(CONF_DIAGNOSTICS):
+            sensors.extend(sensit.create_diagnostic_sensors())
+    if not config.get(CONF_DIAGNOSTICS):
+        async_remove_diagnostic_sensors(hass, config_entry.entry_id)
+    # Add the sensors already registered to Home Assistant, in one call for all the devices
+    async_add_entities(sensors)
+
+
+def frame_order(frame):
+    """ Sort key of Sigfox callback frames: time, then sequence number """
+    return (frame.get("time") or 0, frame.get("seqNumber") or 0)
 
 
 class SensitDevice:
     # TODO Change SensitDevice to a Registered Device
-    def __init__(self, name, device_id, version, mode, temperature_sensor, battery_sensor):
+    def __init__(self, name, device_id, version, mode, async_add_entities=None, rules=None):
         # Different attributes of the device
         self._name = name
         self.device_id = device_id
         self.version = version
         self.mode = mode
-        self.delay_limit = 5
-        # Sensors linked to the device
-        # Mostly data parsed from the raw Data
-        self.temperature_sensor = temperature_sensor
-        self.battery_sensor = battery_sensor
+        # Duplicate and out of order frames are dropped before decoding
+        self.frame_filter = FrameFilter()
+        self._set_version(version)
+        # Sensors linked to the device, created from the fields of the parsed data
+        self._async_add_entities = async_add_entities
+        # Field name -> significant change rule of its sensor, defaults if None
+        self.change_rules = rules if rules is not None else change_rules({})
+        # Field name -> sensor
+        self.sensors = {}
+        self.diagnostic_sensors = []
+        # Latest decoded frame
+        self.last_frame = None
+        # Counters and latencies, None while instrumentation is off (see metrics.py)
+        self.metrics: DeviceMetrics | None = None
+        self._metrics_users = 0
+        # SensitStorage saving the last frame, set while the device is tracked
+        self.storage = None
+
+    def _set_version(self, version):
+        self.version = version
+        # Decoder is bound once, frames are then decoded with a single call
+        self._decoder = get_decoder(version)
+        self._decode = partial(DECODE_CACHE.decode, version)
+        if self._decoder is None:
+            _LOGGER.error("Sensit %s version is incorrect (%s). Should be either 1, 2 or 3.", self._name, version)
+        self._fields = sensor_fields(version)
+        self._last_raw_data = None
+
+    @callback
+    def async_update_config(self, hass, name=None, mode=None, version=None):
+        """ Apply new options in place, without reloading the config entry
+        A new name renames the sensors, a new version swaps the decoder and removes the
+        sensors of the fields the new version does not report.
+        """
+        if mode is not None:
+            self.mode = mode
+        if version is not None and version != self.version:
+            _LOGGER.info("Sensit %s version changed from %s to %s", self._name, self.version, version)
+            self._set_version(version)
+            self._async_remove_stale_sensors(hass)
+        if name is not None and name != self._name:
+            self._name = name
+            for sensor in (*self.sensors.values(), *self.diagnostic_sensors):
+                sensor.async_rename(name)
+
+    @callback
+    def _async_remove_stale_sensors(self, hass):
+        """ Remove the sensors of the fields not reported by the version of the device
+        Their entity registry entries are removed too, which removes the entities.
+        """
+        keys = {description.key for _, description in self._fields}
+        registry = er.async_get(hass)
+        for description in SENSOR_TYPES:
+            if description.key in keys:
+                continue
+            self.sensors.pop(description.key, None)
+            entity_id = registry.async_get_entity_id("sensor", DOMAIN, f"{self.device_id}_{description.key}")
+            if entity_id is not None:
+                _LOGGER.debug("Sensit %s v%s has no %s, removing %s", self._name, self.version, description.key, entity_id)
+                registry.async_remove(entity_id)
+
+    def restore(self, state):
+        """ Resume from the last frame saved before a restart ([hex data, time, seqNumber])
+        The frame filter carries on, and the frame is decoded again for the poller, but the
+        sensors are not updated: they restore their own state.
+        """
+        if not state or self._decoder is None:
+            return
+        data, time, seq_number = state
+        self.frame_filter.restore(time, seq_number)
+        try:
+            frame = bytes.fromhex(data)
+            self.last_frame = self._decode(frame)
+        except Exception as e:
+            _LOGGER.warning("Sensit %s can't restore its last frame %s: %s", self._name, data, e)
+            return
+        self._last_raw_data = frame
+
+    def frame_state(self) -> list | None:
+        """ [hex data, time, seqNumber] of the last frame, as saved by SensitStorage """
+        if self._last_raw_data is None:
+            return None
+        return [self._last_raw_data.hex(), self.frame_filter.last_time, self.frame_filter.last_seq_number]
+
+    @callback
+    def async_set_change_rules(self, rules):
+        """ Apply new significant change rules to the sensors """
+        self.change_rules = rules
+        for field, sensor in self.sensors.items():
+            sensor.change_rule = rule_for(rules, field)
+
+    @callback
+    def async_enable_metrics(self):
+        """ Turn instrumentation on, until all the users turn it off """
+        self._metrics_users += 1
+        if self.metrics is None:
+            self.metrics = DeviceMetrics()
+
+    @callback
+    def async_disable_metrics(self):
+        self._metrics_users -= 1
+        if self._metrics_users <= 0:
+            self._metrics_users = 0
+            self.metrics = None
 
     @property
     def name(self) -> str:
@@ -149,273 +444,212 @@ class SensitDevice:
     def handle_event(self, event):
         """ Callback function called when a the state of sensor.device_id is changed
         """
-        #print(f"handle_event " + str(self.device_id) + " : " + str(event.data))
-        logging.info(f"handle_event {str(self.device_id)} : {str(event.data.get('new_state'))}")
-        # TODO Filter new events based on message age ? 
+        new_state = event.data.get("new_state")
+        _LOGGER.debug("handle_event %s : %s", self.device_id, new_state)
         # New metric is include in the new_state key as state
-        raw_data = event.data.get("new_state").state
-        parsed_data = {}
-        if raw_data:
-            # TODO Implement parsing for parsing v2 or v3
-            # Code in https://github.com/sigfox/sensit-payload
-            if self.version == 1:
-                #parsed_data = self.parse_v1(raw_data)
-                s = SensitParser()
-                parsed_data = s.parse_v1(raw_data)
-                logging.info(parsed_data)
-            elif self.version == 2:
-                s = SensitParser()
-                parsed_data = s.parse_v2(raw_data)
-                logging.info(parsed_data)
-            elif self.version == 3:
-                s = SensitParser()
-                parsed_data = s.parse_v3(raw_data)
-                logging.info(parsed_data)
-            else:
-                logging.error(f"Sensit version is incorrect ({str(self.version)}). Should be either 1, 2 or 3.")
-            if parsed_data:
-                if parsed_data.get("temperature", "") != "":
-                    self.temperature_sensor.update(parsed_data.get("temperature"))
-                if parsed_data.get("battery", "") != "":
-                    self.battery_sensor.update(parsed_data.get("battery"))
-
-    def parse_data(self, data, data_time=None):
-        """ Parse new data received
-        """
-        logging.info("Device {self.name} - Parsing data {data}")
-
-    def convert_battery(self, data):
-        ret = 0
-        if len(data) <= 2:
-            ret = int(data, 16) * 0.02
-        return ret
-
-    def convert_temperature(self, data):
-        ret = 0
-        if len(data) <= 2:
-            ret = int(data, 16)
-            if ret > 128:
-                ret = ret - 256
-            ret = (ret + 46) /2
-        return ret
-
-    def parse_v1(self, data):
-        """ Parser for sensit v1
-        b0-b2: Mode (0: off, 1: temperature, 2: movement, 3: full)
-        b3-b5: Period (0: 24h, 1: 12h, 2: 6h, 3: 2h, 4: 1h, 5: 30m, 6: 15m, 7: 10m)
-        b6: Forced message
-        b7: Button message
-        B1: Battery (voltage = 0.02 * value)
-        B2: Sent battery (voltage during previous frame)
-        B3: Temperature = (value + 46)/2
-        0-6 bytes: DATA, depend on the mode
-            - Temperature: 6 values, each on 1 byte
-            - Movement: 1 byte for value, 3 bytes for config
-            - Full: 1 byte min temp, 1 byte max temp, 1 byte movement value
+        if new_state is None or new_state.state in (STATE_UNKNOWN, STATE_UNAVAILABLE):
+            return
+        # Callbacks may push the Sigfox time and seqNumber as attributes
+        self.handle_frame(
+            new_state.state,
+            as_int(new_state.attributes.get("time")),
+            as_int(new_state.attributes.get("seqNumber")),
+        )
+
+    def handle_frame(self, raw_data, time=None, seq_number=None):
+        """ Decode a raw frame (hex string or frame bytes) and update the sensors
+        Duplicate (already seen seqNumber) and stale (older than the latest frame) frames
+        are dropped. Frames equal to the last one processed are not decoded again.
         """
-        out_data = {}
+        if self.metrics is not None:
+            self.metrics.received += 1
+            self.metrics.last_seen = dt_util.utcnow()
+        if not self.frame_filter.accept(seq_number, time):
+            _LOGGER.debug("Sensit %s dropped frame %s (time %s, seqNumber %s)", self._name, raw_data, time, seq_number)
+            return
+        self._apply_frame(raw_data)
+
+    def _apply_frame(self, raw_data):
+        if not raw_data or self._decoder is None:
+            return
+        if self.storage is not None:
+            self.storage.async_schedule_save()
+        # Frames are compared and decoded as bytes, hex strings are converted once
         try:
-            logging.debug(f"Sensit {self.name} v1 data parsing {data}")
-            # First byte must be split in bits
-            b = "{:08b}".format(int(data[:2], base=16))
-            # print("First byte: " + str(b))
-            out_data.update({"mode":  int(b[2:])})
-            out_data.update({"period": int(b[len(b)-5:len(b)-3], 2)})
-            out_data.update({"forced": int(b[1])})
-            out_data.update({"button": int(b[0])})
-            # Following bytes are battery levels and temperature
-            out_data.update({"battery": self.convert_battery(data[2:4])})
-            self.battery_sensor.update(out_data.get("battery"))
-
-            # Push battery update to sensor
-            out_data.update({"sent_battery": self.convert_battery(data[4:6])})
-            out_data.update({"temperature": self.convert_temperature(data[6:8])})
-            # Push temperature update to sensor
-            self.temperature_sensor.update(out_data.get("temperature"))
-            # Next bytes depends on mode
-            mode = out_data.get("mode")
-            out_data.update({"values": []})
-            # Not all modes are implemented for now (to implement: Motion, Sound, All and Off)
-            if mode == 1:
-                logging.info(f"Sensit {self.name} mode temperature")
-                for i in range(8, len(data), 2):
-                    out_data["values"].append(self.convert_temperature(data[i:i+2]))
-                logging.info("-- Data parsed: {str(out_data)}")
-                return {"body": {"message": "Temperature message stored " + str(out_data.get("values"))}, "statusCode": 200}
-            elif mode == 2:
-                logging.info(f"Sensit {self.name} mode Motion")
-                # TODO Implement Motion mode message parsing for v1
-                return {"body": {"message": "Motion message not implemented yet"}, "statusCode": 500}
-            elif mode == 3:
-                logging.info(f"Sensit {self.name}  mode All")
-                # TODO Implement All mode message parsing for v1
-                return {"body": {"message": "All message not implemented yet"}, "statusCode": 500}
-            else:
-                logging.info(f"Sensit {self.name} Off")
-                # TODO Implement Off mode message parsing for v1
-                return {"body": {"message": "Off notification not implemented yet"}, "statusCode": 500}
-        except Exception as e:
-            logging.error(f"Sensit {self.name} Error during data parsing {str(data)}. Error: {str(e.args)}")
-            return {"body": {"message": "Error " + str(e.args)}, "statusCode": 500}
-        return {"body": {"message": "Nothing was processed"}, "statusCode": 500}
-
-
-    def parse_v2(self, data):
-        """ Parser for sensit v2
-        Bytes are read from left to right, the first byte being the most significant one
-        Bits are numbered the other way, from the LSB to the MSB. Bit 0 being the LSB & bit 7 the
-        MSB of the said byte
-        Example : received frame is A9670d19 .
-        First byte is 0xA9 or 0b10101001 .
-        Or {bit 7}{bit 6}{bit 5}{bit 4}{bit 3}{bit 2}{bit 1}{bit 0}
-
-        --B0
-        b0-b2: Mode (0: Button, 1: Temperature, 2: Light, 3: Door, 4: Move, 5: Reed switch)
-        b3-b4: Timeframe (0: 10m, 1: 1h, 2: 6h, 3: 24h)
-        b5-b6: Type (0: regular no alert, 1: Button, 2: Alert, 3: New mode)
-        b7: Battery MSB 
-        -- B1
-        This do not seem to match the computation done in code ....
-        It appears that the value are reversed....
-        b0-b3: Temperature MSB
-        b4-b7: Battery LSB
-        Data bytes
-        -- B2
-        Classic mode (excludes Light & Door regular frames)
-        b0-b5: Temperature LSB
-        b6: Reed Switch state
-        b7: Unused
-        Lightmode, value = {final multiplier} * {value} * 0.01              
-        b0-b5: value
-        b6-b7: Multiplier (for final multiplier, 0: 1, 1: 8, 2: 64, 3: 2014)
-        Door mode: byte not used
-        -- B3
-        Button Frames
-        b0-b3: Minor version
-        b4-b7: Major version
-        Temperaturemode:
-        b0-b7: Humidity = value* 0.5
-        Other mode, bytes contains the number of alerts
-
-        Conversion details:
-        For battery: MSB LSB and {value} * 0.05 * 2.7
-        For Temperature MSB: ({value} * 6.4) - 20
-        OR Temperature mSB LSB ({value} - 200) / 8 
-        """
-        out_data = {}
+            frame = payload_bytes(raw_data)
+        except (TypeError, ValueError) as e:
+            _LOGGER.error("Sensit %s Invalid frame %s. Error: %s", self._name, raw_data, e.args)
+            if self.metrics is not None:
+                self.metrics.failed += 1
+            return
+        if frame == self._last_raw_data:
+            # Not decoded again, the sensors may still have a heartbeat due
+            self._async_write_states(self.last_frame)
+            return
+        metrics = self.metrics
+        # Code in https://github.com/sigfox/sensit-payload
         try:
-            logging.debug(f"Sensit {self.name} v2 data parsing {data}")
-            # Byte 0 - Mode, period, ...
-            b = "{:08b}".format(int(data[:2], base=16))
-            logging.info(b)
-            out_data.update({"mode":  int(b[8-1-2:8-0], 2)})
-            out_data.update({"period": int(b[8-1-4:8-3], 2)})
-            out_data.update({"type": int(b[8-1-6:8-5], 2)})
-            out_data.update({"battery_msb": b[8-1-7:8-7]})
-
-            # Byte 1 - Temperature MSB and Battery LSB
-            b = "{:08b}".format(int(data[2:4], base=16))
-            #out_data.update({"temperature_msb": b[8-1-3:8-0]})
-            #out_data.update({"battery_lsb": b[8-1-7:8-4]})
-            # Temperature and Battery seem to be mis-documented
-            out_data.update({"temperature_msb": b[8-1-7:8-4]})
-            out_data.update({"battery_lsb": b[8-1-3:8-0]})
-
-            # Byte 2 - Data depends on mode
-            b = "{:08b}".format(int(data[4:6], base=16))
-            if out_data.get("mode") == 2:
-                # Light mode
-                logging.warning("Light mode, not implemented")
-                # TODO implement Light mode data parsing
-            elif out_data.get("mode") == 3:
-                # Door mode, nothing in here
-                pass
-            else:
-                # Parse byte
-                out_data.update({"temperature_lsb": b[8-1-5:8-0]})
-                out_data.update({"switch_state": b[8-1-6:8-6]})
-                # b7 is not used
-
-            # Byte 3 - Version or Data
-            b = "{:08b}".format(int(data[6:8], base=16))
-            if out_data.get("mode") == 0:
-                # Mode button
-                # TODO Add switch button sensor ? 
-                logger.warning(f"Sensit {self.name} - Button mode not implemented")
-                pass
-                # TODO Implement parsing of software version ? 
-            elif out_data.get("mode") == 1:
-                out_data.update({"humidity": int(b[8-1-7:8-0], 2)*0.5})
+            if metrics is None:
+                parsed_data = self._decode(frame)
             else:
-                # Other modes, data is the number of alerts
-                # TODO Implement Alert count ? 
-                pass
-
-            # Data has been parsed, we can compute Temperature and battery      
-            battery = int(out_data.get("battery_msb") + out_data.get("battery_lsb"), 2) * 0.05 * 2.7
-            out_data.update({"battery": battery})
-            self.battery_sensor.update(out_data.get("battery"))
-            
-            if out_data.get("temperature_lsb"):
-                temperature = (int(out_data.get("temperature_msb") + out_data.get("temperature_lsb"), 2) - 200) / 8
-                out_data.update({"temperature": temperature})
-                self.temperature_sensor.update(out_data.get("temperature"))
-            else:
-                temperature = (int(out_data.get("temperature_msb"), 2) * 6.4 )- 20 
-                out_data.update({"temperature": temperature})
-                # Temperature computation with MSB only is not accurate
-                # We add in the dict but not update the Sensor!
-            return (out_data)
+                start = perf_counter()
+                parsed_data = self._decode(frame)
+                metrics.frame_latency.record((perf_counter() - start) * 1e6)
+                metrics.decoded += 1
         except Exception as e:
-            logging.error(f"Sensit {self.name} Error during data parsing {str(data)}. Error: {str(e.args)}")
-            return {"body": {"message": "Error " + str(e.args)}, "statusCode": 500}
-
-
-
-
-class SensitTemperature(SensorEntity):
-    _attr_native_unit_of_measurement = TEMP_CELSIUS
-    _attr_device_class = SensorDeviceClass.TEMPERATURE
-    _attr_state_class = SensorStateClass.MEASUREMENT
-
-    def __init__(self, name, device_id, version, mode):
-        self._name = name + "_temperature"
-        self.device_id = device_id + "_temperature"
-        self._version = version
-        self._mode = mode
-
-    @property
-    def name(self) -> str:
-        """Return the name of the entity."""
-        return self._name
-
-    @property
-    def unique_id(self) -> str:
-        """Return the unique ID of the sensor."""
-        return self.device_id
+            _LOGGER.error("Sensit %s Error during data parsing %s. Error: %s", self._name, raw_data, e.args)
+            if metrics is not None:
+                metrics.failed += 1
+            return
+        _LOGGER.debug("Sensit %s parsed data: %s", self._name, parsed_data)
+        self._last_raw_data = frame
+        self.last_frame = parsed_data
+        self._async_write_states(parsed_data)
+
+    def create_sensors(self, keys):
+        """ Create the sensors of some fields, return the new ones (to be added to Home Assistant)
+        Fields which are unknown or not reported by the version of the device are ignored.
+        """
+        new_sensors = []
+        for _, description in self._fields:
+            if description.key in keys and description.key not in self.sensors:
+                sensor = SensitSensor(self, description)
+                self.sensors[description.key] = sensor
+                new_sensors.append(sensor)
+        return new_sensors
+
+    def create_diagnostic_sensors(self):
+        """ Create the diagnostic sensors, return them (to be added to Home Assistant) """
+        self.diagnostic_sensors = [SensitDiagnosticSensor(self, description) for description in DIAGNOSTIC_TYPES]
+        return self.diagnostic_sensors
+
+    @callback
+    def _async_write_states(self, parsed_data):
+        """ Update the sensors from parsed data, in a single pass
+        Only the sensors whose value changed write their state. Sensors of the fields
+        reported for the first time are created and added to Home Assistant.
+        """
+        new_sensors = []
+        writes = 0
+        for index, description in self._fields:
+            value = parsed_data[index]
+            if value is None:
+                continue
+            sensor = self.sensors.get(description.key)
+            if sensor is None:
+                sensor = self.sensors[description.key] = SensitSensor(self, description)
+                new_sensors.append(sensor)
+            # Sensors not added yet get their state when they are added
+            if sensor.set_native_value(value) and sensor.hass is not None:
+                sensor.async_write_ha_state()
+                writes += 1
+        if self.metrics is not None:
+            self.metrics.writes += writes
+        self._async_add_sensors(new_sensors)
+
+    @callback
+    def _async_add_sensors(self, new_sensors):
+        if new_sensors and self._async_add_entities is not None:
+            _LOGGER.debug("Sensit %s new sensors: %s", self._name, [sensor.entity_description.key for sensor in new_sensors])
+            self._async_add_entities(new_sensors)
 
     @property
-    def should_poll(self):
-        return False
-
-    def update(self, temperature) -> None:
-        """ Update sensor value
+    def statistic_fields(self) -> list[str]:
+        """ Fields of the version recorded in the long-term statistics (measurements) """
+        return [description.key for _, description in self._fields if description.state_class is not None]
+
+    @callback
+    def async_import_hourly_statistics(self, statistics):
+        """ Import hourly statistics of some fields (field -> statistics), from a backfill
+        Sensors of the fields are created if needed, their states are left unchanged.
         """
-        logging.info(f"Update temperature for device {self.device_id}, sensor {self._name} - {str(temperature)}")
-        # TODO Add check on temperature value
-        self._attr_native_value = float(temperature)
-        self.schedule_update_ha_state()
-
-
-class SensitBattery(SensorEntity):
-    _attr_native_unit_of_measurement = UnitOfElectricPotential.VOLT
-    _attr_device_class = SensorDeviceClass.VOLTAGE
-    _attr_state_class = SensorStateClass.MEASUREMENT
-
-    def __init__(self, name, device_id):
-        self._name = name + "_battery"
-        self.device_id = device_id + "_battery"
-
+        self._async_add_sensors(self.create_sensors(statistics))
+        for field, field_statistics in statistics.items():
+            sensor = self.sensors.get(field)
+            if sensor is not None:
+                sensor.import_hourly_statistics(field_statistics)
+
+    def handle_frames(self, frames):
+        """ Apply a burst of frames (Sigfox callback dicts with data, time and seqNumber)
+        Frame data may be hex strings or frame bytes.
+        Frames are applied in order of time and seqNumber: only the latest one updates the
+        sensors, the readings of the others go into the long-term statistics.
+        Large bursts are better submitted to the decode pipeline, see decode_pipeline.py.
+        """
+        frames = self.prepare_burst(frames)
+        if not frames:
+            return
+        if self.metrics is None:
+            self.apply_burst(frames, self.decode_history(frames))
+            return
+        start = perf_counter()
+        columns = self.decode_history(frames)
+        self.apply_burst(frames, columns, perf_counter() - start)
+
+    def prepare_burst(self, frames):
+        """ Frames of a burst to apply, sorted by time and seqNumber, dropped ones removed """
+        if self.metrics is not None:
+            self.metrics.received += len(frames)
+            self.metrics.last_seen = dt_util.utcnow()
+        return [
+            frame
+            for frame in sorted(frames, key=frame_order)
+            if self.frame_filter.accept(frame.get("seqNumber"), frame.get("time"))
+        ]
+
+    def decode_history(self, frames):
+        """ Decode the frames of a prepared burst but the latest one, into columns
+        Does not touch the device state, so it may run in the executor.
+        Returns None when there is nothing to decode.
+        """
+        if len(frames) < 2 or self._decoder is None:
+            return None
+        return decode_batch(self.version, [frame["data"] for frame in frames[:-1]])
+
+    @callback
+    def apply_burst(self, frames, columns, latency=None):
+        """ Import the decoded history of a prepared burst, and apply its latest frame
+        latency is the time (seconds) spent decoding the history, for the metrics.
+        """
+        if columns is not None:
+            if self.metrics is not None:
+                self._count_history(columns["valid"], latency)
+            times = [frame.get("time") for frame in frames[:-1]]
+            # Fields only reported by the older frames get their sensor too
+            self._async_add_sensors(self.create_sensors([
+                field for field, column in columns.items()
+                if any(value is not None and value == value for value in column)
+            ]))
+            for field, sensor in self.sensors.items():
+                if field in columns:
+                    sensor.import_statistics(zip(times, columns[field]))
+        self._apply_frame(frames[-1]["data"])
+
+    def _count_history(self, valid, latency):
+        decoded = valid.count(True) if isinstance(valid, list) else int(valid.sum())
+        self.metrics.decoded += decoded
+        self.metrics.failed += len(valid) - decoded
+        if latency is not None:
+            self.metrics.batch_latency.record(latency * 1e6)
+
+
+class SensitSensor(RestoreSensor):
+    """ Sensor of a field of the frames decoded by a SensitDevice
+    Its last value is restored at startup, until the device reports a new one.
+    """
+    entity_description: SensitSensorEntityDescription
+
+    def __init__(self, device, description):
+        self.entity_description = description
+        self._name = f"{device.name}_{description.key}"
+        self.device_id = f"{device.device_id}_{description.key}"
+        self.change_rule = rule_for(device.change_rules, description.key)
+        # Last value written to the state machine, and when (monotonic)
+        self._written_value = None
+        self._written_at = None
+        # Readings and hourly statistics received before the sensor was added to Home Assistant
+        self._pending_statistics = []
+        self._pending_hourly_statistics = []
 
     @property
     def name(self) -> str:
@@ -431,12 +665,101 @@ class SensitBattery(SensorEntity):
     def should_poll(self):
         return False
 
-    def update(self, battery) -> None:
-        logging.info(f"Update battery for device {self.device_id}, sensor {self._name} - {str(battery)}")
-        # TODO Add check on value
-        self._attr_native_value = float(battery)
-        self.schedule_update_ha_state()
-
-
+    @callback
+    def async_rename(self, device_name):
+        """ Follow the new name of the device """
+        self._name = f"{device_name}_{self.entity_description.key}"
+        if self.hass is not None:
+            self.async_write_ha_state()
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        if self._attr_native_value is None:
+            last_data = await self.async_get_last_sensor_data()
+            if last_data is not None and last_data.native_value is not None:
+                self._attr_native_value = last_data.native_value
+                # The deadband applies to the restored value
+                self._written_value = last_data.native_value
+                self._written_at = monotonic()
+        if self._pending_statistics:
+            async_import_entity_statistics(self, self._pending_statistics)
+            self._pending_statistics = []
+        if self._pending_hourly_statistics:
+            async_import_hourly_statistics(self, self._pending_hourly_statistics)
+            self._pending_hourly_statistics = []
+
+    def import_statistics(self, samples):
+        """ Import (time, value) readings into the long-term statistics
+        Readings are kept until the sensor is added to Home Assistant.
+        """
+        if self.hass is None:
+            self._pending_statistics.extend(samples)
+            return
+        async_import_entity_statistics(self, samples)
+
+    def import_hourly_statistics(self, statistics):
+        """ Import hourly statistics aggregated elsewhere (backfills)
+        Statistics are kept until the sensor is added to Home Assistant.
+        """
+        if self.hass is None:
+            self._pending_hourly_statistics.extend(statistics)
+            return
+        async_import_hourly_statistics(self, statistics)
+
+    def set_native_value(self, value) -> bool:
+        """ Update sensor value, return True if its state must be written
+        The state is written by the device, once all its sensors are updated. Values which
+        are not a significant change (see significant_change.py) are kept, not written.
+        """
+        _LOGGER.debug("Update %s for device %s - %s", self.entity_description.key, self.device_id, value)
+        value_fn = self.entity_description.value_fn
+        if value_fn is not None:
+            value = value_fn(value)
+        self._attr_native_value = value
+        now = monotonic()
+        significance = self.change_rule.evaluate(value, self._written_value, self._written_at, now)
+        if significance == SKIP:
+            return False
+        self._written_value = value
+        self._written_at = now
+        # An unchanged state is only recorded when forced
+        self._attr_force_update = significance == HEARTBEAT
+        return True
+
+
+class SensitDiagnosticSensor(SensorEntity):
+    """ Diagnostic sensor of a SensitDevice, created when diagnostics are on
+    While it is enabled, the instrumentation of the device is on and the sensor state is
+    written every DIAGNOSTIC_INTERVAL.
+    """
+    entity_description: SensitDiagnosticEntityDescription
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_should_poll = False
+
+    def __init__(self, device, description):
+        self.entity_description = description
+        self._device = device
+        self._attr_name = f"{device.name}_{description.key}"
+        self._attr_unique_id = f"{device.device_id}_{description.key}"
 
+    @property
+    def native_value(self) -> StateType:
+        return self.entity_description.value_fn(self._device)
+
+    @callback
+    def async_rename(self, device_name):
+        """ Follow the new name of the device """
+        self._attr_name = f"{device_name}_{self.entity_description.key}"
+        if self.hass is not None:
+            self.async_write_ha_state()
+
+    async def async_added_to_hass(self) -> None:
+        self._device.async_enable_metrics()
+        self.async_on_remove(self._device.async_disable_metrics)
+        self.async_on_remove(
+            async_track_time_interval(self.hass, self._async_update, DIAGNOSTIC_INTERVAL)
+        )
 
+    @callback
+    def _async_update(self, _now=None):
+        self.async_write_ha_state()
@@ -0,0 +1,254 @@
+"""Polling of the Sigfox backend API.
+
+Devices in "api" mode are not pushed by callbacks: their messages are read from the
+Sigfox REST API (GET /devices/{id}/messages) through the HTTP session shared by Home
+Assistant. Each device keeps a `since` cursor, persisted across restarts (see
+storage.py), so that only new messages are fetched, and is polled when its next
+message is expected, from the reporting period decoded from its frames.
+"""
+from __future__ import annotations
+
+import asyncio
+from functools import partial
+import logging
+import time
+
+import aiohttp
+
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.start import async_at_started
+
+from .const import CONF_DEVICES, CONF_URL, DOMAIN, MODE_API
+from .decode_pipeline import async_get_pipeline
+from .device_table import CONF_DEVICE_ID, CONF_MODE
+from .dispatcher import async_get_dispatcher
+from .storage import SensitStorage, async_get_storage
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_API_URL = "https://api.sigfox.com/v2"
+# Former default of the backend URL option, the web interface of the backend
+LEGACY_BACKEND_URL = "backend.sigfox.com"
+
+# Messages per page, and requests in flight for all the devices of an entry
+PAGE_LIMIT = 100
+MAX_CONCURRENT_REQUESTS = 4
+REQUEST_TIMEOUT = 30
+
+# Reporting period (seconds) of each value of the decoded period field. The v1 period
+# is on 3 bits but only 2 are decoded (see parse_v1), v1 devices are polled every
+# DEFAULT_INTERVAL.
+REPORTING_PERIODS = {
+    # Timeframe: 10m, 1h, 6h, 24h
+    2: (600, 3600, 21600, 86400),
+}
+# Polling intervals (seconds)
+DEFAULT_INTERVAL = 900
+MIN_INTERVAL = 60
+MAX_INTERVAL = 6 * 3600
+RETRY_INTERVAL = 300
+# Delay for a message to reach the backend after its expected time
+BACKEND_DELAY = 30
+# Delay before the first poll, for the sensor platform to set up the devices, and
+# between the first polls of the devices of an entry
+STARTUP_DELAY = 5
+STARTUP_SPREAD = 0.5
+
+
+def api_url(value) -> str:
+    """ Base URL of the Sigfox API from the backend URL option """
+    if not value or value == LEGACY_BACKEND_URL:
+        return DEFAULT_API_URL
+    if "://" not in value:
+        value = f"https://{value}"
+    return value.rstrip("/")
+
+
+def message_frame(message) -> dict | None:
+    """ Frame of a Sigfox API message, as given to SensitDevice.handle_frames
+    API times are in milliseconds, frame times in seconds as in the callbacks.
+    """
+    try:
+        return {
+            "data": bytes.fromhex(message["data"]),
+            "time": int(message["time"]) // 1000,
+            "seqNumber": message.get("seqNumber"),
+        }
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def reporting_period(version, frame) -> int | None:
+    """ Reporting period (seconds) decoded from a frame, None if unknown """
+    periods = REPORTING_PERIODS.get(version)
+    period = getattr(frame, "period", None)
+    if periods is None or period is None:
+        return None
+    return periods[period]
+
+
+def poll_interval(version, frame, last_time, now) -> float:
+    """ Delay before the next poll of a device
+    The next message is expected one period after the last one (last_time, seconds).
+    When it is late, or its period is unknown, the device is polled more often.
+    """
+    period = reporting_period(version, frame)
+    if period is None:
+        return DEFAULT_INTERVAL
+    if last_time is not None:
+        delay = last_time + period + BACKEND_DELAY - now
+        if delay >= MIN_INTERVAL:
+            return min(delay, MAX_INTERVAL)
+    return min(max(period / 4, MIN_INTERVAL), MAX_INTERVAL)
+
+
+class SigfoxApiClient:
+    """ Client of the Sigfox API, on a shared aiohttp session """
+
+    def __init__(self, session: aiohttp.ClientSession, url, username, password):
+        self._session = session
+        self._url = url
+        self._auth = aiohttp.BasicAuth(username, password)
+        self._timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+        self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+    async def async_get_messages(self, device_id, since=None, pages=None) -> list[dict]:
+        """ Messages of a device after `since` (milliseconds), oldest first
+        Pages are followed until the oldest message after `since`, or for `pages` pages
+        of the newest messages.
+        """
+        url = f"{self._url}/devices/{device_id}/messages"
+        params = {"limit": PAGE_LIMIT}
+        if since is not None:
+            params["since"] = since + 1
+        messages = []
+        while url and pages != 0:
+            async with self._semaphore:
+                async with self._session.get(
+                    url, params=params, auth=self._auth, timeout=self._timeout
+                ) as response:
+                    response.raise_for_status()
+                    page = await response.json()
+            messages.extend(page.get("data") or ())
+            # The next page URL carries its query
+            url = (page.get("paging") or {}).get("next")
+            params = None
+            if pages is not None:
+                pages -= 1
+        messages.sort(key=lambda message: message.get("time") or 0)
+        return messages
+
+
+class SensitPoller:
+    """ Poll the messages of some devices and hand them to the devices """
+
+    def __init__(self, hass: HomeAssistant, client: SigfoxApiClient, storage: SensitStorage, device_ids):
+        self.hass = hass
+        self._client = client
+        self._storage = storage
+        self._device_ids = list(device_ids)
+        # Device ID -> cancel callback of its next poll
+        self._scheduled = {}
+        self._stopped = False
+
+    @callback
+    def async_start(self, hass=None):
+        """ Start polling, the first requests are spread """
+        for index, device_id in enumerate(self._device_ids):
+            self._schedule(device_id, STARTUP_DELAY + index * STARTUP_SPREAD)
+
+    @callback
+    def async_stop(self):
+        self._stopped = True
+        for cancel in self._scheduled.values():
+            cancel()
+        self._scheduled.clear()
+
+    @callback
+    def _schedule(self, device_id, delay):
+        if not self._stopped:
+            self._scheduled[device_id] = async_call_later(
+                self.hass, delay, partial(self._async_poll, device_id)
+            )
+
+    async def _async_get_new_messages(self, device, device_id) -> list[dict]:
+        """ Messages of a device since its cursor
+        Without cursor (first poll), messages are read after the last frame restored from
+        storage, or else only the latest page is read, not the whole device history.
+        """
+        since = self._storage.get_cursor(device_id)
+        if since is None and device.frame_filter.last_time is not None:
+            since = device.frame_filter.last_time * 1000
+        if since is None:
+            return await self._client.async_get_messages(device_id, pages=1)
+        return await self._client.async_get_messages(device_id, since)
+
+    async def _async_poll(self, device_id, _now=None):
+        self._scheduled.pop(device_id, None)
+        device = async_get_dispatcher(self.hass).async_get_device(device_id)
+        if device is None:
+            # Not set up yet
+            self._schedule(device_id, RETRY_INTERVAL)
+            return
+        try:
+            messages = await self._async_get_new_messages(device, device_id)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            _LOGGER.warning("Sensit %s Sigfox API request failed: %s", device.name, e)
+            self._schedule(device_id, RETRY_INTERVAL)
+            return
+        if self._stopped:
+            return
+        since = self._storage.get_cursor(device_id)
+        frames = []
+        for message in messages:
+            frame = message_frame(message)
+            if frame is not None:
+                frames.append(frame)
+                # Messages are sorted, the cursor ends on the latest one
+                since = int(message["time"])
+        _LOGGER.debug("Sensit %s %s message(s) from the Sigfox API", device.name, len(frames))
+        if frames:
+            await async_get_pipeline(self.hass).async_submit(device, frames)
+            self._storage.async_set_cursor(device_id, since)
+        self._schedule(
+            device_id,
+            poll_interval(device.version, device.last_frame, since / 1000 if since else None, time.time()),
+        )
+
+
+def api_client(hass: HomeAssistant, config) -> SigfoxApiClient:
+    """ Client of the Sigfox API with the backend URL and login of an entry """
+    return SigfoxApiClient(
+        async_get_clientsession(hass),
+        api_url(config.get(CONF_URL)),
+        config.get(CONF_USERNAME, ""),
+        config.get(CONF_PASSWORD, ""),
+    )
+
+
+def api_config(hass: HomeAssistant, device_id) -> dict | None:
+    """ Configuration of the entry holding a device, None if it has no API login """
+    device_id = str(device_id).lower()
+    for config in hass.data.get(DOMAIN, {}).values():
+        if not isinstance(config, dict) or not config.get(CONF_USERNAME):
+            continue
+        rows = config[CONF_DEVICES] if CONF_DEVICES in config else [config]
+        if any(str(row.get(CONF_DEVICE_ID)).lower() == device_id for row in rows):
+            return config
+    return None
+
+
+async def async_setup_poller(hass: HomeAssistant, entry, config) -> SensitPoller | None:
+    """ Poll the devices of an entry in API mode, until the entry is unloaded """
+    rows = config[CONF_DEVICES] if CONF_DEVICES in config else [config]
+    device_ids = [str(row[CONF_DEVICE_ID]) for row in rows if row.get(CONF_MODE) == MODE_API]
+    if not device_ids:
+        return None
+    poller = SensitPoller(hass, api_client(hass, config), await async_get_storage(hass), device_ids)
+    entry.async_on_unload(async_at_started(hass, poller.async_start))
+    entry.async_on_unload(poller.async_stop)
+    _LOGGER.info("Sensit %s: %s device(s) polled from %s", entry.title, len(device_ids), api_url(config.get(CONF_URL)))
+    return poller
@@ -0,0 +1,120 @@
+"""Webhook receiving the Sigfox callbacks of the Sensit devices.
+
+The Sigfox backend posts the callback JSON (device, data, time, seqNumber) directly to
+Home Assistant, the frame is handed to the device decoder without going through a raw
+`sensor.<device_id>` entity (no extra state write, bus event nor recorder row). The hex
+data is converted to bytes once, the decoders then read the fields from the frame bytes.
+A JSON array of callbacks, from any number of devices, is applied as one burst: only the
+latest frame of each device is written to the state machine. Frames go through the
+decode pipeline, large bursts are decoded off the event loop.
+Each config entry has its own webhook, which only updates the devices of the entry.
+"""
+from __future__ import annotations
+
+from functools import partial
+from http import HTTPStatus
+import logging
+
+from aiohttp.web import Request, Response
+
+from homeassistant.components import webhook
+from homeassistant.const import CONF_WEBHOOK_ID
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .decode_pipeline import async_get_pipeline
+from .dispatcher import async_get_dispatcher
+from .frame_filter import as_int
+from .frame_layout import payload_bytes
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def async_register_webhook(hass: HomeAssistant, entry) -> None:
+    """Register the webhook of a config entry."""
+    webhook_id = entry.data[CONF_WEBHOOK_ID]
+    webhook.async_register(
+        hass,
+        DOMAIN,
+        entry.title,
+        webhook_id,
+        partial(async_handle_webhook, entry_id=entry.entry_id),
+        allowed_methods=["POST"],
+    )
+    _LOGGER.info(
+        "Sensit %s callbacks can be posted to %s",
+        entry.title,
+        webhook.async_generate_url(hass, webhook_id),
+    )
+
+
+def async_unregister_webhook(hass: HomeAssistant, entry) -> None:
+    """Unregister the webhook of a config entry."""
+    webhook.async_unregister(hass, entry.data[CONF_WEBHOOK_ID])
+
+
+async def async_handle_webhook(
+    hass: HomeAssistant, webhook_id: str, request: Request, *, entry_id: str
+) -> Response:
+    """Handle a Sigfox callback, or an array of callbacks, for the devices of an entry."""
+    try:
+        message = await request.json()
+    except ValueError:
+        return Response(text="Invalid JSON", status=HTTPStatus.BAD_REQUEST)
+    if isinstance(message, list):
+        return await _async_handle_batch(hass, webhook_id, entry_id, message)
+    if not _is_frame(message):
+        return Response(text="Expected device and data", status=HTTPStatus.BAD_REQUEST)
+    frame = _frame_bytes(message)
+    if frame is None:
+        return Response(text="Invalid data", status=HTTPStatus.BAD_REQUEST)
+
+    device = async_get_dispatcher(hass).async_get_device(str(message["device"]), entry_id)
+    if device is None:
+        _LOGGER.debug("Webhook %s: unknown Sensit %s", webhook_id, message["device"])
+        return Response(text="Unknown device", status=HTTPStatus.NOT_FOUND)
+    await async_get_pipeline(hass).async_submit(device, [_frame(message, frame)])
+    return Response(status=HTTPStatus.OK)
+
+
+def _is_frame(message) -> bool:
+    return isinstance(message, dict) and bool(message.get("device")) and bool(message.get("data"))
+
+
+def _frame_bytes(message) -> bytes | None:
+    """Frame bytes of a callback, None if its data is not hexadecimal."""
+    try:
+        return payload_bytes(str(message["data"]))
+    except ValueError:
+        return None
+
+
+def _frame(message, frame: bytes) -> dict:
+    return {
+        "data": frame,
+        "time": as_int(message.get("time")),
+        "seqNumber": as_int(message.get("seqNumber")),
+    }
+
+
+async def _async_handle_batch(hass: HomeAssistant, webhook_id: str, entry_id: str, messages: list) -> Response:
+    """Group the frames of a burst by device and apply them."""
+    dispatcher = async_get_dispatcher(hass)
+    bursts = {}
+    ignored = 0
+    for message in messages:
+        device = dispatcher.async_get_device(str(message["device"]), entry_id) if _is_frame(message) else None
+        frame = _frame_bytes(message) if device is not None else None
+        if frame is None:
+            ignored += 1
+            continue
+        bursts.setdefault(device, []).append(_frame(message, frame))
+    pipeline = async_get_pipeline(hass)
+    for device, frames in bursts.items():
+        await pipeline.async_submit(device, frames)
+    if ignored:
+        _LOGGER.debug("Webhook %s: %s frame(s) ignored in burst", webhook_id, ignored)
+    return Response(
+        text=f"{len(messages) - ignored} frame(s) applied to {len(bursts)} device(s)",
+        status=HTTPStatus.OK,
+    )
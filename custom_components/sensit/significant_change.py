@@ -0,0 +1,115 @@
+"""Significant change rules of the Sensit sensors.
+
+A decoded value is always kept by its sensor, but its state is only written when the
+change is significant: out of the deadband (absolute or relative to the last written
+value) and at least `min_interval` seconds after the previous write. A `heartbeat`
+forces a write of an unchanged value, so that a silent sensor can be told from a
+stable one. Rules are set per field from the options of the config entry.
+"""
+from __future__ import annotations
+
+from typing import NamedTuple
+
+# Options of the config entries, and their defaults
+CONF_TEMPERATURE_DEADBAND = "temperature_deadband"
+CONF_HUMIDITY_DEADBAND = "humidity_deadband"
+CONF_BATTERY_DEADBAND = "battery_deadband"
+CONF_LIGHT_DEADBAND = "light_deadband"
+CONF_MIN_INTERVAL = "min_interval"
+CONF_HEARTBEAT = "heartbeat"
+
+# v2 and v3 temperatures have a 0.125 °C resolution: a single step is not written
+DEFAULT_TEMPERATURE_DEADBAND = 0.2
+# Humidity has a 0.5 % resolution
+DEFAULT_HUMIDITY_DEADBAND = 1.0
+# Volts, the v1 and v3 battery resolutions are 0.02 and 0.05 V
+DEFAULT_BATTERY_DEADBAND = 0.1
+# Percent of the last written value
+DEFAULT_LIGHT_DEADBAND = 10
+DEFAULT_MIN_INTERVAL = 0
+# Seconds, 0 to disable
+DEFAULT_HEARTBEAT = 6 * 3600
+
+CHANGE_OPTIONS = {
+    CONF_TEMPERATURE_DEADBAND: DEFAULT_TEMPERATURE_DEADBAND,
+    CONF_HUMIDITY_DEADBAND: DEFAULT_HUMIDITY_DEADBAND,
+    CONF_BATTERY_DEADBAND: DEFAULT_BATTERY_DEADBAND,
+    CONF_LIGHT_DEADBAND: DEFAULT_LIGHT_DEADBAND,
+    CONF_MIN_INTERVAL: DEFAULT_MIN_INTERVAL,
+    CONF_HEARTBEAT: DEFAULT_HEARTBEAT,
+}
+
+# Results of ChangeRule.evaluate
+SKIP = 0
+CHANGE = 1
+HEARTBEAT = 2
+
+
+class ChangeRule(NamedTuple):
+    """ Significant change rule of a sensor
+    - absolute: minimum change of a numeric value
+    - relative: minimum change of a numeric value, as a fraction of the last written one
+    - min_interval: minimum time (seconds) between two writes of a changed value
+    - heartbeat: time (seconds) after which an unchanged value is written again
+    Without deadband, any change is significant.
+    """
+    absolute: float | None = None
+    relative: float | None = None
+    min_interval: float = 0
+    heartbeat: float | None = None
+
+    def evaluate(self, value, written, written_at, now) -> int:
+        """ SKIP, CHANGE or HEARTBEAT for a new value
+        written is the last written value, at written_at (monotonic seconds, None if never).
+        """
+        if written_at is None:
+            return CHANGE
+        elapsed = now - written_at
+        if self.heartbeat and elapsed >= self.heartbeat:
+            return HEARTBEAT
+        if value == written or elapsed < self.min_interval:
+            return SKIP
+        if not _is_number(value) or not _is_number(written):
+            return CHANGE
+        change = abs(value - written)
+        if self.absolute is not None and change < self.absolute:
+            return SKIP
+        if self.relative is not None and change < self.relative * abs(written):
+            return SKIP
+        return CHANGE
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float))
+
+
+# Every change written
+NO_RULE = ChangeRule()
+
+
+def change_rules(options) -> dict[str, ChangeRule]:
+    """ Field -> rule, from the options of a config entry (defaults for the missing ones)
+    Fields without rule (counters, enums) only use the minimum interval and heartbeat.
+    """
+    options = {**CHANGE_OPTIONS, **{key: value for key, value in options.items() if key in CHANGE_OPTIONS}}
+    timing = {
+        "min_interval": options[CONF_MIN_INTERVAL] or 0,
+        "heartbeat": options[CONF_HEARTBEAT] or None,
+    }
+    temperature = ChangeRule(absolute=options[CONF_TEMPERATURE_DEADBAND], **timing)
+    light = ChangeRule(relative=options[CONF_LIGHT_DEADBAND] / 100, **timing)
+    return {
+        "temperature": temperature,
+        "temperature_min": temperature,
+        "temperature_max": temperature,
+        "humidity": ChangeRule(absolute=options[CONF_HUMIDITY_DEADBAND], **timing),
+        "battery": ChangeRule(absolute=options[CONF_BATTERY_DEADBAND], **timing),
+        "light": light,
+        "brightness": light,
+        None: ChangeRule(**timing),
+    }
+
+
+def rule_for(rules, field) -> ChangeRule:
+    """ Rule of a field, the default rule of the set (None key) if it has none """
+    return rules.get(field) or rules.get(None) or NO_RULE
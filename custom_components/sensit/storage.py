@@ -0,0 +1,110 @@
+"""Persistent state of the Sensit integration.
+
+A single store for the whole domain (`.storage/sensit`), shared by all the entries:
+- cursors: `since` of the devices polled from the Sigfox API (milliseconds)
+- frames: last frame of each device, as [hex data, time, seqNumber]
+
+Frames are restored at startup, so that the duplicate and stale frame filter carries
+on across restarts. They are read from the devices when the store is saved, devices
+only flag that a save is due.
+"""
+from __future__ import annotations
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DATA_STORAGE, DOMAIN
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 30
+# Cursors were stored alone before the frames
+LEGACY_CURSORS_KEY = f"{DOMAIN}.cursors"
+
+
+class SensitStorage:
+    """ Cursors and last frames of the Sensit devices, keyed by lower case device ID """
+
+    def __init__(self, hass: HomeAssistant):
+        self._hass = hass
+        self._store = Store(hass, STORAGE_VERSION, DOMAIN)
+        self._cursors = {}
+        self._frames = {}
+        # Device ID -> running SensitDevice, its last frame is read at save time
+        self._devices = {}
+        self._save_pending = False
+
+    async def async_load(self):
+        data = await self._store.async_load()
+        if data is None:
+            data = {"cursors": await self._async_load_legacy_cursors()}
+        self._cursors = data.get("cursors") or {}
+        self._frames = data.get("frames") or {}
+
+    async def _async_load_legacy_cursors(self):
+        legacy = Store(self._hass, 1, LEGACY_CURSORS_KEY)
+        cursors = await legacy.async_load()
+        if cursors is not None:
+            await legacy.async_remove()
+            self.async_schedule_save()
+        return cursors
+
+    def get_cursor(self, device_id):
+        return self._cursors.get(device_id.lower())
+
+    @callback
+    def async_set_cursor(self, device_id, since):
+        self._cursors[device_id.lower()] = since
+        self.async_schedule_save()
+
+    def get_frame(self, device_id) -> list | None:
+        """ [hex data, time, seqNumber] of the last frame of a device, None if unknown """
+        return self._frames.get(device_id.lower())
+
+    @callback
+    def async_track_device(self, device) -> CALLBACK_TYPE:
+        """ Save the last frame of a device, return a callback to stop """
+        device_id = device.device_id.lower()
+        self._devices[device_id] = device
+        device.storage = self
+
+        @callback
+        def untrack() -> None:
+            if self._devices.get(device_id) is device:
+                del self._devices[device_id]
+                self._keep_frame(device_id, device)
+            device.storage = None
+
+        return untrack
+
+    def _keep_frame(self, device_id, device):
+        state = device.frame_state()
+        if state is not None:
+            self._frames[device_id] = state
+
+    @callback
+    def async_schedule_save(self):
+        """ Save the store after SAVE_DELAY, and at the latest when Home Assistant stops """
+        if not self._save_pending:
+            self._save_pending = True
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict:
+        self._save_pending = False
+        for device_id, device in self._devices.items():
+            self._keep_frame(device_id, device)
+        return {"cursors": dict(self._cursors), "frames": dict(self._frames)}
+
+
+async def _async_load_storage(hass: HomeAssistant) -> SensitStorage:
+    storage = SensitStorage(hass)
+    await storage.async_load()
+    return storage
+
+
+async def async_get_storage(hass: HomeAssistant) -> SensitStorage:
+    """ Storage of the integration, loaded once """
+    data = hass.data.setdefault(DOMAIN, {})
+    if DATA_STORAGE not in data:
+        data[DATA_STORAGE] = hass.async_create_task(_async_load_storage(hass))
+    return await data[DATA_STORAGE]
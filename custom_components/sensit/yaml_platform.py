@@ -0,0 +1,72 @@
+"""YAML configuration of the Sensit sensors.
+
+Devices may still be configured under the sensor platform in configuration.yaml:
+```
+sensor:
+  - platform: sensit
+    sensors:
+      kitchen:
+        device_id: 1A2B3C
+        version: 3
+```
+This module is only imported when such a configuration is validated or set up, config
+entries do not load it (see the module __getattr__ of sensor.py).
+"""
+from __future__ import annotations
+
+import voluptuous as vol
+
+from homeassistant.components.sensor import PLATFORM_SCHEMA as SENSOR_PLATFORM_SCHEMA
+from homeassistant.const import CONF_NAME, CONF_SENSORS
+import homeassistant.helpers.config_validation as cv
+
+from .const import CONF_DIAGNOSTICS
+from .device_table import CONF_DEVICE_ID, CONF_MODE, CONF_VERSION
+from .dispatcher import async_get_dispatcher
+from .sensor import SensitDevice, registered_sensor_keys
+from .storage import async_get_storage
+
+DEVICE_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_DEVICE_ID): cv.string,
+        vol.Required(CONF_VERSION): cv.positive_int,
+        vol.Optional(CONF_MODE, default="local"): cv.string,
+        vol.Optional(CONF_DIAGNOSTICS, default=False): cv.boolean,
+    }
+)
+PLATFORM_SCHEMA = SENSOR_PLATFORM_SCHEMA.extend(
+    {
+        vol.Required(CONF_SENSORS): vol.Schema({cv.string: DEVICE_SCHEMA}),
+    }
+)
+
+
+async def async_setup_yaml_devices(hass, config, async_add_entities):
+    """ Create the devices of a YAML platform configuration, and add their sensors """
+    # Obtain configuration
+    sensors = config.get(CONF_SENSORS)
+    dispatcher = async_get_dispatcher(hass)
+    storage = await async_get_storage(hass)
+    registered = registered_sensor_keys(hass)
+    devices = []
+    # Create Device (Sensors + Sensit object)
+    for dev_name, properties in sensors.items():
+        # Device ID should be added as attr to the sensors
+        # Other fields expect name could be removed
+        sensit = SensitDevice(
+                properties.get(CONF_NAME, dev_name),
+                properties.get(CONF_DEVICE_ID),
+                properties.get(CONF_VERSION),
+                properties.get(CONF_MODE),
+                async_add_entities)
+        # Sensors are created when the device first reports their field,
+        # the ones already registered are created right away
+        devices.extend(sensit.create_sensors(registered.get(sensit.device_id, ())))
+        if properties.get(CONF_DIAGNOSTICS):
+            devices.extend(sensit.create_diagnostic_sensors())
+        # Route new data of the device to it, resuming from its last frame
+        sensit.restore(storage.get_frame(sensit.device_id))
+        storage.async_track_device(sensit)
+        dispatcher.async_add_device(sensit)
+    # Add entities to Home Assistant
+    async_add_entities(devices)
@@ -0,0 +1,88 @@
+"""Benchmark of the batch decoder against the scalar parsers.
+
+Usage: python scripts/bench_batch.py [--size N]
+Checks that the vectorized (NumPy) columns match the scalar decoding of every payload,
+then times the scalar parser, the pure Python batch path and the NumPy batch path.
+"""
+import argparse
+import logging
+import math
+import random
+import time
+
+import sensit_standalone
+
+sensit_standalone.load()
+from sensit.sensit_batch import COLUMNS, decode_batch, load_numpy  # noqa: E402
+from sensit.sensit_parser import SensitParseError, SensitParser  # noqa: E402
+
+
+def build_payloads(version, size, seed=42):
+    rng = random.Random(seed)
+    payloads = []
+    for _ in range(size):
+        length = 4 + rng.randint(0, 6) if version == 1 else 4
+        payloads.append(rng.randbytes(length).hex())
+    # A few malformed payloads, rejected by both paths
+    payloads[::997] = ["zz"] * len(payloads[::997])
+    return payloads
+
+
+def same(expected, value):
+    if expected is None:
+        return math.isnan(value)
+    return expected == value
+
+
+def check_parity(version, payloads):
+    expected = decode_batch(version, payloads, use_numpy=False)
+    columns = decode_batch(version, payloads)
+    mismatches = 0
+    for index in range(len(payloads)):
+        if not expected["valid"][index]:
+            mismatches += bool(columns["valid"][index])
+            continue
+        for name in COLUMNS[1:]:
+            if not same(expected[name][index], columns[name][index]):
+                mismatches += 1
+                print(f"v{version} {payloads[index]} {name}: {expected[name][index]} != {columns[name][index]}")
+    return mismatches
+
+
+def parse_all(parser, version, payloads):
+    frames = []
+    for payload in payloads:
+        try:
+            frames.append(parser.parse(version, payload))
+        except SensitParseError:
+            frames.append(None)
+    return frames
+
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--size", type=int, default=200000, help="Payloads per version")
+    args = arg_parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    parser = SensitParser()
+    for version in (1, 2, 3):
+        payloads = build_payloads(version, args.size)
+        results = {
+            "scalar": timed(lambda: parse_all(parser, version, payloads)),
+            "python": timed(lambda: decode_batch(version, payloads, use_numpy=False)),
+        }
+        if load_numpy() is not None:
+            print(f"v{version} parity check: {check_parity(version, payloads)} mismatch(es)")
+            results["numpy"] = timed(lambda: decode_batch(version, payloads))
+        for label, elapsed in results.items():
+            print(f"v{version} {label:7s} {args.size / elapsed:12.0f} frames/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Micro-benchmark of the integer decoding core against the legacy string parser.
+
+Usage: python scripts/bench_decoder.py [--number N]
+The script first checks that both parsers return the same data for every frame of the
+corpus, then times the legacy parser entry points against the decoders, called directly
+on the hex payloads. The decode cache is timed apart, on a corpus of repeated frames.
+Frames rejected by the legacy parser are skipped (modes it did not implement are now
+decoded) and new fields are ignored. Legacy bit fragments without a field are ignored too,
+binary string flags are compared as integers.
+"""
+import argparse
+import logging
+import random
+import timeit
+
+import sensit_standalone
+from legacy_parser import LegacySensitParser
+
+sensit_standalone.load()
+from sensit.decode_cache import DecodeCache  # noqa: E402
+from sensit.frame_layout import DECODERS  # noqa: E402
+from sensit.sensit_parser import SensitParseError, SensitParser  # noqa: E402
+
+
+def build_corpus(size=2000, seed=42):
+    """Random payloads for each version, v1 frames carry up to 6 history values."""
+    rng = random.Random(seed)
+    corpus = {1: [], 2: [], 3: []}
+    for _ in range(size):
+        corpus[1].append(rng.randbytes(4 + rng.randint(0, 6)).hex())
+        corpus[2].append(rng.randbytes(4).hex())
+        corpus[3].append(rng.randbytes(4).hex())
+    return corpus
+
+
+def is_error(result):
+    return "statusCode" in result
+
+
+# Keys converted differently on purpose: (version, key) -> legacy value conversion
+CONVERSION_FIXES = {}
+
+
+def normalize(value):
+    # Decoded frames are read-only, lists are returned as tuples
+    return list(value) if isinstance(value, tuple) else value
+
+
+def legacy_value(value):
+    # Flags were returned as binary strings
+    return int(value, 2) if isinstance(value, str) else value
+
+
+def safe_parse(parse):
+    def wrapper(payload):
+        try:
+            return parse(payload)
+        except SensitParseError:
+            return None
+    return wrapper
+
+
+def safe_decode(version):
+    decode = DECODERS[version]
+
+    def wrapper(payload):
+        try:
+            return decode(bytes.fromhex(payload))
+        except (IndexError, KeyError, ValueError):
+            return None
+    return wrapper
+
+
+def check_parity(corpus):
+    legacy = LegacySensitParser()
+    parser = SensitParser()
+    mismatches = 0
+    for version, payloads in corpus.items():
+        legacy_parse = getattr(legacy, f"parse_v{version}")
+        parse = safe_parse(getattr(parser, f"parse_v{version}"))
+        for payload in payloads:
+            expected = legacy_parse(payload)
+            result = parse(payload)
+            if is_error(expected):
+                continue
+            for (fixed_version, key), fix in CONVERSION_FIXES.items():
+                if fixed_version == version and key in expected:
+                    expected[key] = fix(expected[key])
+            if result is None or any(
+                normalize(getattr(result, key)) != legacy_value(value)
+                for key, value in expected.items()
+                if key in result._fields
+            ):
+                mismatches += 1
+                print(f"v{version} {payload}: {expected} != {result}")
+    return mismatches
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--number", type=int, default=5, help="Passes over the corpus")
+    args = arg_parser.parse_args()
+    # Parsers log through the root logger, keep the benchmark output readable
+    logging.disable(logging.CRITICAL)
+
+    corpus = build_corpus()
+    mismatches = check_parity(corpus)
+    print(f"Parity check: {mismatches} mismatch(es)")
+
+    legacy = LegacySensitParser()
+    for version, payloads in corpus.items():
+        frames = len(payloads) * args.number
+        legacy_parse = safe_parse(getattr(legacy, f"parse_v{version}"))
+        decode = safe_decode(version)
+        for label, parse in (("legacy", legacy_parse), ("decoder", decode)):
+            elapsed = timeit.timeit(lambda: [parse(p) for p in payloads], number=args.number)
+            print(f"v{version} {label:8s} {elapsed / frames * 1e6:8.2f} us/frame")
+
+    # Steady state: a few distinct frames received again and again, all cache hits
+    print("Decode cache, frame bytes:")
+    rng = random.Random(1)
+    for version, length in ((1, 4), (1, 10), (2, 4), (3, 4)):
+        frames = []
+        while len(frames) < 50:
+            frame = rng.randbytes(length)
+            try:
+                DECODERS[version](frame)
+            except (IndexError, KeyError, ValueError):
+                continue
+            frames.append(frame)
+        decoder = DECODERS[version]
+        cached = DecodeCache(min_length=0)
+        for label, decode in (("decoder", decoder), ("cached", lambda frame: cached.decode(version, frame))):
+            elapsed = min(timeit.repeat(lambda: [decode(f) for f in frames], number=args.number * 40, repeat=5))
+            print(f"v{version} {length:2d} bytes {label:8s} {elapsed / (len(frames) * args.number * 40) * 1e6:8.2f} us/frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""Benchmark suite of the Sensit decode hot path.
+
+Runs every parser entry point over the payload corpus (see corpus.py) and reports, for
+each of them: frames per second, per-frame latency percentiles and memory allocations
+(tracemalloc). Home Assistant is not required; SensitDevice.handle_frame is measured
+too when it is installed.
+
+Usage:
+    python scripts/bench_parser.py [--size N] [--output results.json] [--compare baseline.json]
+Results are written as JSON, --compare prints the throughput change against a previous run.
+"""
+import argparse
+import gc
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import sensit_standalone
+from corpus import build_corpus
+
+# Frames per decode_batch call
+BATCH_SIZE = 100
+
+sensit_standalone.load()
+from sensit.sensit_batch import decode_batch  # noqa: E402
+from sensit.sensit_parser import SensitParser, get_decoder  # noqa: E402
+
+
+def measure(function, inputs, repeat):
+    """ Throughput, latency percentiles and allocations of function over inputs """
+    # Throughput, best of `repeat` passes over the inputs
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in inputs:
+            function(item)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    # Latency of each call
+    clock = time.perf_counter_ns
+    latencies = []
+    gc.disable()
+    try:
+        for item in inputs:
+            start = clock()
+            function(item)
+            latencies.append(clock() - start)
+    finally:
+        gc.enable()
+    latencies.sort()
+    quantiles = statistics.quantiles(latencies * (2 if len(latencies) == 1 else 1), n=100, method="inclusive")
+
+    # Allocations, results are kept to account for their size
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    results = [function(item) for item in inputs]
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del results
+
+    return {
+        "calls": len(inputs),
+        "calls_per_second": len(inputs) / best,
+        "latency_ns": {
+            "p50": quantiles[49],
+            "p90": quantiles[89],
+            "p99": quantiles[98],
+            "max": latencies[-1],
+        },
+        "allocated_bytes_per_call": (after - before) / len(inputs),
+        "peak_bytes": peak - before,
+    }
+
+
+def device_entry_points(corpus):
+    """ SensitDevice.handle_frame of each version, when Home Assistant is installed """
+    try:
+        from sensit.sensor import SensitDevice
+    except ImportError:
+        return {}
+    entry_points = {}
+    for version in (1, 2, 3):
+        device = SensitDevice("bench", f"bench{version}", version, "local")
+        frames = [(frame["data"], index) for index, frame in enumerate(corpus) if frame["version"] == version]
+        entry_points[f"SensitDevice.handle_frame_v{version}"] = (
+            lambda frame, device=device: device.handle_frame(frame[0], seq_number=frame[1]),
+            frames,
+            1,
+        )
+    return entry_points
+
+
+def entry_points(corpus):
+    """ name -> (function, inputs, frames per input) """
+    parser = SensitParser()
+    points = {}
+    for version in (1, 2, 3):
+        payloads = [frame["data"] for frame in corpus if frame["version"] == version]
+        decoder = get_decoder(version)
+        points[f"SensitParser.parse_v{version}"] = (getattr(parser, f"parse_v{version}"), payloads, 1)
+        # Steady state: the device sends the same frame again and again (decode cache hits)
+        points[f"SensitParser.parse_v{version}_steady"] = (
+            getattr(parser, f"parse_v{version}"), [payloads[0]] * len(payloads), 1
+        )
+        frames = [bytes.fromhex(payload) for payload in payloads]
+        points[f"SensitParser.parse_v{version}_bytes"] = (getattr(parser, f"parse_v{version}"), frames, 1)
+        points[f"decoder_v{version}"] = (decoder, frames, 1)
+        batches = [payloads[index:index + BATCH_SIZE] for index in range(0, len(payloads), BATCH_SIZE)]
+        points[f"decode_batch_v{version}"] = (
+            lambda batch, version=version: decode_batch(version, batch),
+            batches,
+            len(payloads) / len(batches),
+        )
+    return points
+
+
+def run(size, repeat):
+    corpus = build_corpus(size)
+    points = entry_points(corpus)
+    points.update(device_entry_points(corpus))
+    results = {}
+    for name, (function, inputs, frames_per_call) in points.items():
+        result = measure(function, inputs, repeat)
+        result["frames_per_second"] = result["calls_per_second"] * frames_per_call
+        results[name] = result
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "timestamp": time.time(),
+        "corpus_size": len(corpus),
+        "results": results,
+    }
+
+
+def compare(report, baseline):
+    for name, result in report["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        change = result["frames_per_second"] / previous["frames_per_second"] - 1
+        print(f"{name:36s} {result['frames_per_second']:12.0f} frames/s {change:+8.1%}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=2000, help="Frames per version")
+    parser.add_argument("--repeat", type=int, default=5, help="Passes for the throughput")
+    parser.add_argument("--output", help="JSON file for the results (default: stdout)")
+    parser.add_argument("--compare", help="JSON results of a previous run")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    report = run(args.size, args.repeat)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        with open(args.compare) as baseline:
+            compare(report, json.load(baseline))
+
+
+if __name__ == "__main__":
+    main()
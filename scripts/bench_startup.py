@@ -0,0 +1,140 @@
+"""Benchmark of the Sensit integration startup.
+
+Measures, on the Home Assistant test harness (pytest-homeassistant-custom-component):
+- import: wall time of importing the integration and its sensor platform, in fresh
+  interpreters with Home Assistant already imported, and the optional modules it loaded
+- setup: wall time of setting up a hub config entry of 1, 100 and 1000 devices, until
+  the sensor platform is set up
+
+Usage:
+    python scripts/bench_startup.py [--devices 1,100,1000] [--version 3] [--repeat 5] [--output results.json]
+Results are written as JSON.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Modules imported by Home Assistant before a custom integration is loaded
+HA_MODULES = (
+    "homeassistant.core",
+    "homeassistant.helpers.entity_platform",
+    "homeassistant.components.sensor",
+    "homeassistant.components.webhook",
+)
+# Modules which the integration should only import when they are used
+LAZY_MODULES = (
+    "numpy",
+    "homeassistant.components.text",
+    "custom_components.sensit.yaml_platform",
+)
+
+IMPORT_SNIPPET = """
+import json, sys, time
+{ha_imports}
+start = time.perf_counter()
+import custom_components.sensit
+import custom_components.sensit.sensor
+elapsed = time.perf_counter() - start
+from custom_components.sensit.frame_layout import DECODERS
+print(json.dumps({{
+    "seconds": elapsed,
+    "loaded": [name for name in {lazy_modules!r} if name in sys.modules],
+    "decoders": sorted(dict.keys(DECODERS)),
+}}))
+"""
+
+
+def measure_import(repeat):
+    """ Median import time of the integration over `repeat` fresh interpreters """
+    code = IMPORT_SNIPPET.format(
+        ha_imports="\n".join(f"import {name}" for name in HA_MODULES),
+        lazy_modules=LAZY_MODULES,
+    )
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", code], cwd=ROOT, check=True, capture_output=True, text=True
+        ).stdout
+        runs.append(json.loads(output.splitlines()[-1]))
+    return {
+        "median_ms": statistics.median(run["seconds"] for run in runs) * 1000,
+        "min_ms": min(run["seconds"] for run in runs) * 1000,
+        "loaded": runs[-1]["loaded"],
+        "decoders": runs[-1]["decoders"],
+    }
+
+
+def device_rows(count, version):
+    return [
+        {"device_id": f"{index:06X}", "name": f"sensit {index}", "version": version, "mode": "local"}
+        for index in range(count)
+    ]
+
+
+async def measure_setup(count, version):
+    """ Wall time of the setup of a hub entry of `count` devices, on a fresh instance """
+    # The harness imports homeassistant.core first, loader can't be imported before it
+    from pytest_homeassistant_custom_component.common import MockConfigEntry, async_test_home_assistant
+    from homeassistant import loader
+    from homeassistant.helpers import entity_registry as er
+
+    hass = await async_test_home_assistant(asyncio.get_running_loop())
+    # Custom integrations are disabled by default on the test harness
+    hass.data.pop(loader.DATA_CUSTOM_COMPONENTS, None)
+    entry = MockConfigEntry(
+        domain="sensit",
+        title="bench",
+        data={"name": "bench", "webhook_id": "bench", "devices": device_rows(count, version)},
+    )
+    entry.add_to_hass(hass)
+    try:
+        start = time.perf_counter()
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        elapsed = time.perf_counter() - start
+        # Sensors of the fields are only created with the first frames, diagnostic ones when turned on
+        entities = len(er.async_get(hass).entities)
+    finally:
+        await hass.async_stop(force=True)
+    return {"devices": count, "setup_ms": elapsed * 1000, "per_device_us": elapsed / count * 1e6, "entities": entities}
+
+
+async def run_setups(counts, version):
+    # The first setup also imports the integration, it is not reported
+    await measure_setup(1, version)
+    return [await measure_setup(count, version) for count in counts]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", default="1,100,1000", help="Comma separated device counts")
+    parser.add_argument("--version", type=int, default=3, help="Version of the devices")
+    parser.add_argument("--repeat", type=int, default=5, help="Interpreters for the import time")
+    parser.add_argument("--output", help="JSON file for the results (default: stdout)")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    sys.path.insert(0, str(ROOT))
+
+    report = {
+        "python": sys.version.split()[0],
+        "import": measure_import(args.repeat),
+        "setup": asyncio.run(run_setups([int(count) for count in args.devices.split(",")], args.version)),
+    }
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Corpus of realistic Sensit payloads, covering every mode of every version.
+
+Frames are generated from plausible readings (temperature, humidity, battery, event
+counts, ...) with a fixed seed, so the corpus is identical from one run to another.
+Usage: python scripts/corpus.py [--size N] > corpus.jsonl
+"""
+import argparse
+import json
+import random
+
+# Modes generated for each version
+MODES = {
+    1: (0, 1, 2, 3),
+    2: (0, 1, 2, 3, 4, 5),
+    3: (1, 2, 3, 4, 5),
+}
+
+
+def _v1_temperature(rng):
+    # (value + 46) / 2 with value a signed byte, 5 to 35 degrees
+    return (rng.randint(10, 70) - 46) & 0xFF
+
+
+def v1_frame(mode, rng):
+    header = bytes([
+        mode | rng.randint(0, 3) << 3 | rng.randint(0, 1) << 6 | rng.randint(0, 1) << 7,
+        rng.randint(140, 190),
+        rng.randint(140, 190),
+        _v1_temperature(rng),
+    ])
+    if mode == 1:
+        data = bytes(_v1_temperature(rng) for _ in range(6))
+    elif mode == 2:
+        data = bytes([rng.randint(0, 50)]) + rng.randbytes(3)
+    elif mode == 3:
+        data = bytes([_v1_temperature(rng), _v1_temperature(rng), rng.randint(0, 50)])
+    else:
+        data = b""
+    return header + data
+
+
+def v2_frame(mode, rng):
+    battery = rng.randint(20, 31)
+    # (value - 200) / 8, 5 to 35 degrees
+    temperature = rng.randint(240, 480)
+    byte0 = mode | rng.randint(0, 3) << 3 | rng.randint(0, 3) << 5 | (battery >> 4) << 7
+    byte1 = (temperature >> 6) << 4 | (battery & 0x0F)
+    if mode == 2:
+        byte2 = rng.randint(0, 3) << 6 | rng.randint(0, 63)
+    elif mode == 3:
+        byte2 = 0
+    else:
+        byte2 = rng.randint(0, 1) << 6 | (temperature & 0x3F)
+    if mode == 0:
+        byte3 = rng.randint(1, 3) << 4 | rng.randint(0, 15)
+    elif mode == 1:
+        byte3 = rng.randint(40, 180)
+    else:
+        byte3 = rng.randint(0, 30)
+    return bytes([byte0, byte1, byte2, byte3])
+
+
+def v3_frame(mode, rng):
+    byte0 = rng.randint(10, 31) << 3
+    if mode == 1:
+        temperature = rng.randint(240, 480)
+        status = temperature >> 8
+        data = [temperature & 0xFF, rng.randint(40, 180)]
+    elif mode == 2:
+        status = 0
+        brightness = rng.randint(0, 0xFFFF)
+        data = [brightness >> 8, brightness & 0xFF]
+    else:
+        status = rng.choice((0, 2, 3)) if mode == 3 else rng.randint(0, 1)
+        count = rng.randint(0, 300)
+        data = [count >> 8, count & 0xFF]
+    byte1 = mode << 3 | rng.randint(0, 1) << 2 | status
+    return bytes([byte0, byte1] + data)
+
+
+FRAMES = {1: v1_frame, 2: v2_frame, 3: v3_frame}
+
+
+def build_corpus(size=1000, seed=42):
+    """ Frames of every (version, mode), `size` frames per version, as dicts
+    with version, mode and data (hex payload)
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for version, modes in MODES.items():
+        for index in range(size):
+            mode = modes[index % len(modes)]
+            corpus.append({"version": version, "mode": mode, "data": FRAMES[version](mode, rng).hex()})
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=1000, help="Frames per version")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    for frame in build_corpus(args.size, args.seed):
+        print(json.dumps(frame))
+
+
+if __name__ == "__main__":
+    main()
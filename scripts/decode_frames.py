@@ -0,0 +1,352 @@
+"""Decode Sigfox frame logs of Sensit devices, without Home Assistant.
+
+Usage:
+    python scripts/decode_frames.py [FILE ...] [--version N] [--devices table.csv]
+        [--format jsonl|csv|parquet] [--output PATH] [--workers N] [--ordered]
+
+Frames are read from JSON lines (Sigfox callbacks or API messages) or CSV files (header
+with device, data, time and optionally seqNumber and version columns), or from stdin
+without FILE. Each frame is decoded with SensitParser in the version of its device: the
+version column of the frame, else the one of the device in the --devices table (CSV or
+JSON with device_id and version), else --version.
+
+Input is streamed through generators and decoded in chunks, so memory use does not
+depend on the size of the input. With --workers, chunks are decoded by a pool of
+processes, at most two chunks per worker being in flight; their results are written as
+they complete, or in input order with --ordered (always the case with a single process).
+
+Output holds one row per frame: device, time (POSIX seconds), seqNumber, version, data,
+error (invalid frames) and the decoded fields of the version. JSON lines omit the
+missing values; CSV and Parquet have a column for every field of every version.
+Parquet output requires pyarrow and an --output file.
+"""
+import argparse
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import csv
+import io
+from itertools import islice
+import json
+import os
+import sys
+import time
+
+import sensit_standalone
+
+sensit_standalone.load()
+from sensit.frame_filter import as_int  # noqa: E402
+from sensit.frame_records import (  # noqa: E402
+    DATA_KEYS,
+    DEVICE_KEYS,
+    SEQ_NUMBER_KEYS,
+    TIME_KEYS,
+    frame_time,
+    record_value,
+)
+from sensit.sensit_frame import FRAME_TYPES  # noqa: E402
+from sensit.sensit_parser import SensitParseError, SensitParser  # noqa: E402
+
+# Input lines per chunk, the unit of work of the process pool
+CHUNK_SIZE = 5000
+# Chunks in flight per worker
+CHUNKS_PER_WORKER = 2
+
+BASE_COLUMNS = ("device", "time", "seqNumber", "version", "data", "error")
+ERROR = BASE_COLUMNS.index("error")
+
+
+def _field_columns():
+    """ Fields of all the versions, in version order, with their type name (int, float or tuple) """
+    fields = {}
+    for frame_type in FRAME_TYPES.values():
+        for name in frame_type._fields:
+            # Annotations of the records are forward references, "float | None" for instance
+            annotation = frame_type.__annotations__[name]
+            fields.setdefault(name, getattr(annotation, "__forward_arg__", annotation).split(" ")[0])
+    return fields
+
+
+FIELD_TYPES = _field_columns()
+COLUMNS = BASE_COLUMNS + tuple(FIELD_TYPES)
+# version -> column index of each field of its frames
+VERSION_COLUMNS = {
+    version: [COLUMNS.index(name) for name in frame_type._fields]
+    for version, frame_type in FRAME_TYPES.items()
+}
+
+PARSER = SensitParser()
+
+
+# Input
+
+def input_chunks(paths, input_format=None, size=CHUNK_SIZE):
+    """ (format, CSV header, lines) chunks of the input files, '-' being stdin
+    The format is given, or CSV for .csv files and JSON lines otherwise. Lines are parsed
+    by the workers, the records of CSV files must hold on a single line.
+    """
+    for path in paths:
+        file = sys.stdin if path == "-" else open(path, encoding="utf-8", newline="")
+        try:
+            chunk_format = input_format or ("csv" if path.lower().endswith(".csv") else "jsonl")
+            header = None
+            if chunk_format == "csv":
+                header = next(csv.reader([file.readline()]), None)
+                if not header:
+                    continue
+                header = [name.strip().lower() for name in header]
+            while lines := list(islice(file, size)):
+                yield chunk_format, header, lines
+        finally:
+            if file is not sys.stdin:
+                file.close()
+
+
+def read_records(input_format, header, lines, stats):
+    """ Records (dicts) of the lines of a chunk, invalid JSON lines are counted in stats["invalid"] """
+    if input_format == "csv":
+        for row in csv.DictReader(lines, fieldnames=header, skipinitialspace=True):
+            yield {key: value for key, value in row.items() if key}
+        return
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            stats["invalid"] += 1
+
+
+def read_frames(records, versions, default_version, stats):
+    """ (device, time, seqNumber, version, data) of each record holding a frame
+    versions maps lower case device IDs to their version. Records without data are counted
+    in stats["invalid"].
+    """
+    for record in records:
+        data = record_value(record, DATA_KEYS) if isinstance(record, dict) else None
+        if data is None:
+            stats["invalid"] += 1
+            continue
+        device = record_value(record, DEVICE_KEYS)
+        # API messages: {"device": {"id": ...}}
+        if isinstance(device, dict):
+            device = device.get("id")
+        device = str(device) if device is not None else None
+        version = as_int(record.get("version"))
+        if version is None and device is not None:
+            version = versions.get(device.lower())
+        yield (
+            device,
+            frame_time(record_value(record, TIME_KEYS)),
+            as_int(record_value(record, SEQ_NUMBER_KEYS)),
+            version if version is not None else default_version,
+            data,
+        )
+
+
+def read_device_versions(path):
+    """ Lower case device ID -> version, from a CSV or JSON device table (device_id and version) """
+    with open(path, encoding="utf-8", newline="") as file:
+        text = file.read()
+    if text.lstrip().startswith("["):
+        rows = json.loads(text)
+    else:
+        rows = csv.DictReader(text.splitlines(), skipinitialspace=True)
+    return {
+        str(row["device_id"]).lower(): int(row["version"])
+        for row in rows
+        if row.get("device_id") and row.get("version")
+    }
+
+
+# Decoding
+
+def decode_frame(frame):
+    """ Output row (values in COLUMNS order) of a (device, time, seqNumber, version, data) frame """
+    row = [None] * len(COLUMNS)
+    row[:ERROR] = frame
+    device, _, _, version, data = frame
+    try:
+        decoded = PARSER.parse(version, data, device or "sensit")
+    except SensitParseError as e:
+        row[ERROR] = str(e)
+        return row
+    for index, value in zip(VERSION_COLUMNS[version], decoded):
+        row[index] = value
+    return row
+
+
+def format_rows(rows, output_format):
+    """ Output of decoded rows: text for JSON lines (without the missing values) and CSV
+    (tuples as space separated values), the rows themselves for Parquet
+    """
+    if output_format == "parquet":
+        return rows
+    if output_format == "csv":
+        output = io.StringIO()
+        csv.writer(output, lineterminator="\n").writerows(
+            [" ".join(map(str, value)) if isinstance(value, tuple) else value for value in row]
+            for row in rows
+        )
+        return output.getvalue()
+    return "".join(
+        json.dumps({name: value for name, value in zip(COLUMNS, row) if value is not None}) + "\n"
+        for row in rows
+    )
+
+
+# Options of the decoding, set in each process by init_decoder
+_options = {}
+
+
+def init_decoder(versions, default_version, output_format):
+    """ Set the options of decode_chunk: device versions, default version and output format """
+    _options.update(versions=versions, default_version=default_version, output_format=output_format)
+
+
+def decode_chunk(chunk):
+    """ Parse, decode and format a (format, CSV header, lines) chunk of the input
+    Returns the output of the chunk (see format_rows) and its counters.
+    """
+    stats = {"frames": 0, "errors": 0, "invalid": 0}
+    records = read_records(*chunk, stats)
+    rows = [
+        decode_frame(frame)
+        for frame in read_frames(records, _options["versions"], _options["default_version"], stats)
+    ]
+    stats["frames"] = len(rows)
+    stats["errors"] = sum(row[ERROR] is not None for row in rows)
+    return format_rows(rows, _options["output_format"]), stats
+
+
+def _next_result(pending, ordered):
+    if ordered:
+        yield pending.popleft().result()
+        return
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    for future in done:
+        pending.remove(future)
+        yield future.result()
+
+
+def decode_chunks(chunks, options, workers=1, ordered=False):
+    """ (output, counters) of each input chunk, options being the arguments of init_decoder
+    With more than one worker, chunks are decoded by a process pool, without reading more
+    than CHUNKS_PER_WORKER chunks per worker ahead. Results come in input order if ordered,
+    else as they complete.
+    """
+    if workers <= 1:
+        init_decoder(*options)
+        for chunk in chunks:
+            yield decode_chunk(chunk)
+        return
+    with ProcessPoolExecutor(workers, initializer=init_decoder, initargs=options) as pool:
+        pending = deque()
+        for chunk in chunks:
+            if len(pending) >= workers * CHUNKS_PER_WORKER:
+                yield from _next_result(pending, ordered)
+            pending.append(pool.submit(decode_chunk, chunk))
+        while pending:
+            yield from _next_result(pending, ordered)
+
+
+# Output
+
+class TextWriter:
+    """ JSON lines or CSV output, with the CSV header """
+
+    def __init__(self, file, output_format):
+        self._file = file
+        if output_format == "csv":
+            csv.writer(file, lineterminator="\n").writerow(COLUMNS)
+
+    def write(self, text):
+        self._file.write(text)
+
+    def close(self):
+        if self._file is not sys.stdout:
+            self._file.close()
+
+
+class ParquetWriter:
+    """ Parquet file with a column per field of every version, a row group per chunk """
+
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise SystemExit("Parquet output requires pyarrow (pip install pyarrow)") from e
+        types = {"int": pa.int64(), "float": pa.float64(), "tuple": pa.list_(pa.float64())}
+        self._pa = pa
+        self._schema = pa.schema(
+            [
+                ("device", pa.string()),
+                ("time", pa.int64()),
+                ("seqNumber", pa.int64()),
+                ("version", pa.int64()),
+                ("data", pa.string()),
+                ("error", pa.string()),
+            ]
+            + [(name, types[type_name]) for name, type_name in FIELD_TYPES.items()]
+        )
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def write(self, rows):
+        if not rows:
+            return
+        columns = [
+            self._pa.array(column, type=field.type)
+            for column, field in zip(zip(*rows), self._schema)
+        ]
+        self._writer.write_table(self._pa.Table.from_arrays(columns, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+def open_writer(output_format, output):
+    if output_format == "parquet":
+        if output is None or output == "-":
+            raise SystemExit("Parquet output requires an --output file")
+        return ParquetWriter(output)
+    file = sys.stdout if output is None or output == "-" else open(output, "w", encoding="utf-8", newline="")
+    return TextWriter(file, output_format)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("inputs", nargs="*", default=["-"], help="JSON lines or CSV files, - for stdin (default)")
+    parser.add_argument("--input-format", choices=("jsonl", "csv"), help="Format of the inputs (default: from the file extension)")
+    parser.add_argument("--format", choices=("jsonl", "csv", "parquet"), default="jsonl", help="Output format")
+    parser.add_argument("--output", help="Output file (default: stdout)")
+    parser.add_argument("--version", type=int, choices=sorted(FRAME_TYPES), help="Version of the devices not in the logs nor the device table")
+    parser.add_argument("--devices", help="CSV or JSON device table, with device_id and version")
+    parser.add_argument("--workers", type=int, default=1, help="Decoding processes, 0 for one per CPU")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Input lines per chunk")
+    parser.add_argument("--ordered", action="store_true", help="Write the frames in input order with several workers")
+    args = parser.parse_args()
+    workers = args.workers or os.cpu_count() or 1
+
+    versions = read_device_versions(args.devices) if args.devices else {}
+    chunks = input_chunks(args.inputs, args.input_format, args.chunk_size)
+    writer = open_writer(args.format, args.output)
+    totals = {"frames": 0, "errors": 0, "invalid": 0}
+    start = time.perf_counter()
+    try:
+        for output, stats in decode_chunks(chunks, (versions, args.version, args.format), workers, args.ordered):
+            writer.write(output)
+            for name, count in stats.items():
+                totals[name] += count
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{totals['frames']} frame(s) in {elapsed:.2f} s ({totals['frames'] / elapsed if elapsed else 0:.0f} frames/s), "
+        f"{totals['errors']} invalid frame(s), {totals['invalid']} record(s) without frame",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Fake Sigfox API backend, to run the Sensit API mode locally.
+
+Usage:
+    python scripts/fake_sigfox_backend.py --devices 1A2B3C:2,4D5E6F:3 [--port 8080] \
+        [--history 250] [--interval 600] [--username login --password secret]
+
+Serves GET /v2/devices/{id}/messages as the Sigfox API does: messages newest first,
+`since`, `before` and `limit` parameters, and a `paging.next` URL while older messages
+remain. Each device starts with `history` messages (one per `interval` seconds, ending
+now) and gets a new message every `interval` seconds. Configure the integration with
+backend URL http://localhost:PORT/v2, api mode and the same login and password.
+Requires aiohttp (installed with Home Assistant).
+"""
+import argparse
+import asyncio
+import base64
+import random
+import time
+
+from aiohttp import web
+
+from post_callbacks import synthetic_payload
+
+DEFAULT_LIMIT = 100
+
+
+class FakeBackend:
+    """ Messages of the fake devices, and request counters """
+
+    def __init__(self, devices, history=0, interval=600, seed=42):
+        self.rng = random.Random(seed)
+        self.devices = dict(devices)
+        self.interval = interval
+        # Device ID -> messages, oldest first
+        self.messages = {device_id: [] for device_id in self.devices}
+        self.requests = 0
+        now = int(time.time())
+        for device_id in self.devices:
+            for index in range(history, 0, -1):
+                self.add_message(device_id, now - index * interval)
+
+    def add_message(self, device_id, timestamp=None):
+        messages = self.messages[device_id]
+        messages.append({
+            "device": {"id": device_id},
+            "time": int((timestamp or time.time()) * 1000),
+            "data": synthetic_payload(self.devices[device_id], self.rng),
+            "seqNumber": len(messages) + 1,
+        })
+
+    def page(self, device_id, since=None, before=None, limit=DEFAULT_LIMIT):
+        """ Newest messages in (since, before), and the `before` of the next page """
+        selected = [
+            message for message in self.messages[device_id]
+            if (since is None or message["time"] >= since) and (before is None or message["time"] < before)
+        ]
+        page = selected[-limit:][::-1]
+        next_before = page[-1]["time"] if len(selected) > limit else None
+        return page, next_before
+
+
+def check_auth(request, username, password) -> bool:
+    if username is None:
+        return True
+    expected = "Basic " + base64.b64encode(f"{username}:{password}".encode()).decode()
+    return request.headers.get("Authorization") == expected
+
+
+def make_app(backend, username=None, password=None) -> web.Application:
+    async def messages(request):
+        backend.requests += 1
+        if not check_auth(request, username, password):
+            return web.json_response({"message": "Unauthorized"}, status=401)
+        device_id = request.match_info["device_id"]
+        if device_id not in backend.messages:
+            return web.json_response({"message": "Device not found"}, status=404)
+        query = request.query
+        since = int(query["since"]) if "since" in query else None
+        before = int(query["before"]) if "before" in query else None
+        limit = min(int(query.get("limit", DEFAULT_LIMIT)), DEFAULT_LIMIT)
+        page, next_before = backend.page(device_id, since, before, limit)
+        body = {"data": page, "paging": {}}
+        if next_before is not None:
+            next_query = {"limit": limit, "before": next_before}
+            if since is not None:
+                next_query["since"] = since
+            body["paging"]["next"] = str(request.url.with_query(next_query))
+        return web.json_response(body)
+
+    app = web.Application()
+    app.router.add_get("/v2/devices/{device_id}/messages", messages)
+    return app
+
+
+async def produce(backend):
+    """ New message of each device every interval """
+    while True:
+        await asyncio.sleep(backend.interval)
+        for device_id in backend.devices:
+            backend.add_message(device_id)
+
+
+def parse_devices(value):
+    devices = {}
+    for item in value.split(","):
+        device_id, _, version = item.partition(":")
+        devices[device_id.strip()] = int(version or 2)
+    return devices
+
+
+async def serve(args):
+    backend = FakeBackend(parse_devices(args.devices), args.history, args.interval)
+    runner = web.AppRunner(make_app(backend, args.username, args.password))
+    await runner.setup()
+    await web.TCPSite(runner, args.host, args.port).start()
+    print(f"Fake Sigfox API on http://{args.host}:{args.port}/v2 ({len(backend.devices)} device(s))")
+    try:
+        await produce(backend)
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", default="1A2B3C:2", help="Comma separated DEVICE_ID:VERSION")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--history", type=int, default=250, help="Messages per device at startup")
+    parser.add_argument("--interval", type=float, default=600, help="Seconds between messages")
+    parser.add_argument("--username", help="API login required by the backend")
+    parser.add_argument("--password", default="")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
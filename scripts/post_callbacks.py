@@ -0,0 +1,82 @@
+"""Post synthetic Sigfox callbacks to the Sensit webhook of a Home Assistant instance.
+
+Usage:
+    python scripts/post_callbacks.py http://localhost:8123/api/webhook/<webhook_id> \
+        --device 1A2B3C --version 2 --count 10 --interval 1
+
+Each callback carries a random temperature frame of the given version, with increasing
+time and seqNumber, as the Sigfox backend would send it. Only the standard library is used.
+"""
+import argparse
+import json
+import random
+import time
+import urllib.error
+import urllib.request
+
+
+def synthetic_payload(version, rng):
+    """ Random temperature mode frame, as a hex string """
+    if version == 1:
+        # Mode temperature, battery, sent battery, temperature and 6 history values
+        header = bytes([0x01 | rng.randint(0, 7) << 3, rng.randint(140, 190), rng.randint(140, 190)])
+        return (header + rng.randbytes(7)).hex()
+    if version == 2:
+        # Mode temperature, period 1h, regular frame
+        temperature = rng.randint(300, 500)
+        return bytes([
+            0x89,
+            (temperature >> 6) << 4 | rng.randint(0, 15),
+            temperature & 0x3F,
+            rng.randint(40, 160),
+        ]).hex()
+    # v3 - Mode temperature
+    temperature = rng.randint(300, 500)
+    return bytes([
+        rng.randint(0, 31) << 3,
+        0x08 | temperature >> 8,
+        temperature & 0xFF,
+        rng.randint(40, 160),
+    ]).hex()
+
+
+def post(url, message, token=None):
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    request = urllib.request.Request(url, data=json.dumps(message).encode(), headers=headers, method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status
+    except urllib.error.HTTPError as error:
+        return error.code
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("url", help="Webhook URL")
+    parser.add_argument("--device", default="1A2B3C", help="Sigfox device ID")
+    parser.add_argument("--version", type=int, choices=(1, 2, 3), default=2)
+    parser.add_argument("--count", type=int, default=10, help="Callbacks to post")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between callbacks")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--token", default=None, help="Long-lived access token, if required")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    seq_number = rng.randint(0, 4095)
+    for index in range(args.count):
+        message = {
+            "device": args.device,
+            "data": synthetic_payload(args.version, rng),
+            "time": int(time.time()),
+            "seqNumber": (seq_number + index) % 4096,
+        }
+        status = post(args.url, message, args.token)
+        print(f"{status} {json.dumps(message)}")
+        if index + 1 < args.count:
+            time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+"""Load the Sensit decoder modules without Home Assistant installed.
+
+The integration package __init__ imports Home Assistant, but the decoder modules do not.
+Registering a bare package for custom_components/sensit lets scripts import them
+(with their relative imports) without running the integration setup code.
+"""
+import sys
+import types
+from pathlib import Path
+
+SENSIT_DIR = Path(__file__).resolve().parent.parent / "custom_components" / "sensit"
+
+
+def load():
+    """Register the `sensit` package, skipping its __init__ module."""
+    if "sensit" not in sys.modules:
+        package = types.ModuleType("sensit")
+        package.__path__ = [str(SENSIT_DIR)]
+        sys.modules["sensit"] = package
+    return sys.modules["sensit"]
@@ -0,0 +1,43 @@
+"""Helpers of the Sensit tests."""
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.sensit.const import DOMAIN
+
+
+def v2_frame(temperature):
+    """ v2 temperature mode frame (period 1h, humidity 12.5 %), temperature in 1/8 °C from -25 °C """
+    raw = int(temperature * 8) + 200
+    return bytes([0x89, (raw >> 6) << 4 | 0x0A, raw & 0x3F, 0x19]).hex()
+
+
+def v3_frame(temperature):
+    """ v3 temperature mode frame (raw humidity 25), temperature in 1/8 °C from -25 °C """
+    raw = int(temperature * 8) + 200
+    return bytes([0xA8, 0x08 | raw >> 8, raw & 0xFF, 0x19]).hex()
+
+
+def device_entry(device_id="ABC123", name="kitchen", version=2, mode="local", **data):
+    """ Single device config entry """
+    return MockConfigEntry(
+        domain=DOMAIN,
+        title=name,
+        data={"name": name, "device_id": device_id, "version": version, "mode": mode, **data},
+    )
+
+
+def hub_entry(devices, name="fleet", **data):
+    """ Hub config entry, devices as (device_id, name, version, mode) """
+    rows = [
+        {"device_id": device_id, "name": device_name, "version": version, "mode": mode}
+        for device_id, device_name, version, mode in devices
+    ]
+    return MockConfigEntry(domain=DOMAIN, title=name, data={"name": name, "devices": rows, **data})
+
+
+async def setup_entry(hass, entry):
+    """ Set up a config entry, added to Home Assistant if needed """
+    if hass.config_entries.async_get_entry(entry.entry_id) is None:
+        entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return entry
@@ -0,0 +1,129 @@
+"""Tests of the long-term statistics imported from bursts of frames."""
+from datetime import timedelta
+
+import pytest
+
+from homeassistant.components.recorder.statistics import (
+    async_import_statistics,
+    get_metadata,
+    statistics_during_period,
+)
+from homeassistant.setup import async_setup_component
+from homeassistant.util import dt as dt_util
+from homeassistant.util.unit_system import US_CUSTOMARY_SYSTEM
+from pytest_homeassistant_custom_component.components.recorder.common import async_wait_recording_done
+
+from custom_components.sensit.long_term_statistics import current_hour
+
+from .common import device_entry, setup_entry, v2_frame
+
+
+async def async_hourly_statistics(hass, start):
+    return await hass.async_add_executor_job(
+        statistics_during_period,
+        hass,
+        start,
+        None,
+        {"sensor.kitchen_temperature"},
+        "hour",
+        None,
+        {"mean", "min", "max"},
+    )
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(recorder_mock, enable_custom_integrations):
+    """Set up the recorder before Home Assistant, then load the integration."""
+    yield
+
+
+async def test_burst_fills_hourly_statistics(hass, hass_client_no_auth):
+    assert await async_setup_component(hass, "http", {})
+    entry = await setup_entry(hass, device_entry())
+    client = await hass_client_no_auth()
+    hour = current_hour() - timedelta(hours=2)
+    start = int(hour.timestamp())
+    now = int(dt_util.utcnow().timestamp())
+    burst = [
+        {"device": "ABC123", "data": v2_frame(20), "time": start + 60, "seqNumber": 1},
+        {"device": "ABC123", "data": v2_frame(23), "time": start + 1800, "seqNumber": 2},
+        {"device": "ABC123", "data": v2_frame(25), "time": now, "seqNumber": 4},
+        # Out of order
+        {"device": "ABC123", "data": v2_frame(22), "time": start + 3600, "seqNumber": 3},
+        # Same uplink through another base station, dropped
+        {"device": "ABC123", "data": v2_frame(30), "time": start + 60, "seqNumber": 1},
+    ]
+
+    response = await client.post(f"/api/webhook/{entry.data['webhook_id']}", json=burst)
+    await hass.async_block_till_done()
+    await async_wait_recording_done(hass)
+
+    assert response.status == 200
+    # Only the latest frame becomes a state
+    assert hass.states.get("sensor.kitchen_temperature").state == "25.0"
+    rows = (await async_hourly_statistics(hass, hour))["sensor.kitchen_temperature"]
+    assert [(row["start"], row["mean"], row["min"], row["max"]) for row in rows] == [
+        (hour.timestamp(), 21.5, 20.0, 23.0),
+        (hour.timestamp() + 3600, 22.0, 22.0, 22.0),
+    ]
+
+
+async def test_recorded_hours_are_kept(hass, hass_client_no_auth):
+    assert await async_setup_component(hass, "http", {})
+    entry = await setup_entry(hass, device_entry())
+    client = await hass_client_no_auth()
+    hour = current_hour() - timedelta(hours=2)
+    start = int(hour.timestamp())
+    async_import_statistics(
+        hass,
+        {
+            "has_mean": True,
+            "has_sum": False,
+            "name": None,
+            "source": "recorder",
+            "statistic_id": "sensor.kitchen_temperature",
+            "unit_of_measurement": "°C",
+        },
+        [{"start": hour, "mean": 10.0, "min": 9.0, "max": 11.0}],
+    )
+    await async_wait_recording_done(hass)
+    burst = [
+        {"device": "ABC123", "data": v2_frame(20), "time": start + 60, "seqNumber": 1},
+        {"device": "ABC123", "data": v2_frame(22), "time": start + 3660, "seqNumber": 2},
+        {"device": "ABC123", "data": v2_frame(25), "time": int(dt_util.utcnow().timestamp()), "seqNumber": 3},
+    ]
+
+    await client.post(f"/api/webhook/{entry.data['webhook_id']}", json=burst)
+    await hass.async_block_till_done()
+    await async_wait_recording_done(hass)
+
+    rows = (await async_hourly_statistics(hass, hour))["sensor.kitchen_temperature"]
+    assert [(row["start"], row["mean"], row["min"], row["max"]) for row in rows] == [
+        (hour.timestamp(), 10.0, 9.0, 11.0),
+        (hour.timestamp() + 3600, 22.0, 22.0, 22.0),
+    ]
+
+
+async def test_statistics_are_imported_in_the_state_unit(hass, hass_client_no_auth):
+    hass.config.units = US_CUSTOMARY_SYSTEM
+    assert await async_setup_component(hass, "http", {})
+    entry = await setup_entry(hass, device_entry())
+    client = await hass_client_no_auth()
+    hour = current_hour() - timedelta(hours=2)
+    start = int(hour.timestamp())
+    burst = [
+        {"device": "ABC123", "data": v2_frame(20), "time": start + 60, "seqNumber": 1},
+        {"device": "ABC123", "data": v2_frame(25), "time": int(dt_util.utcnow().timestamp()), "seqNumber": 2},
+    ]
+
+    await client.post(f"/api/webhook/{entry.data['webhook_id']}", json=burst)
+    await hass.async_block_till_done()
+    await async_wait_recording_done(hass)
+
+    assert hass.states.get("sensor.kitchen_temperature").attributes["unit_of_measurement"] == "°F"
+    rows = (await async_hourly_statistics(hass, hour))["sensor.kitchen_temperature"]
+    assert [(row["start"], row["mean"], row["min"], row["max"]) for row in rows] == [
+        (hour.timestamp(), 68.0, 68.0, 68.0),
+    ]
+    metadata = await hass.async_add_executor_job(get_metadata, hass)
+    assert metadata["sensor.kitchen_temperature"][1]["unit_of_measurement"] == "°F"
@@ -0,0 +1,42 @@
+"""Tests of the cache of decoded frames."""
+import pytest
+
+from custom_components.sensit.decode_cache import DecodeCache
+from custom_components.sensit.frame_layout import DECODERS
+
+from .common import v3_frame
+
+# v1 temperature mode frame with history values
+V1_HISTORY = "0a0e2c2d2e2f3031"
+
+
+def test_short_frames_bypass_the_cache():
+    cache = DecodeCache()
+
+    data = cache.decode(3, v3_frame(20))
+
+    assert data == DECODERS[3](bytes.fromhex(v3_frame(20)))
+    assert cache.stats()["size"] == 0
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (0, 0)
+
+
+def test_long_frames_are_cached():
+    cache = DecodeCache(maxsize=1)
+
+    data = cache.decode(1, V1_HISTORY)
+
+    assert cache.decode(1, bytes.fromhex(V1_HISTORY)) is data
+    assert cache.decode(1, bytearray.fromhex(V1_HISTORY)) is data
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (2, 1)
+    cache.decode(1, V1_HISTORY[:-2])
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalid_frames_raise():
+    cache = DecodeCache(min_length=0)
+
+    with pytest.raises(ValueError):
+        cache.decode(3, "zz")
+    with pytest.raises(KeyError):
+        cache.decode(4, v3_frame(20))
+    assert cache.stats()["size"] == 0
@@ -0,0 +1,100 @@
+"""Tests of the decode pipeline of the frame bursts."""
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from custom_components.sensit import decode_pipeline, sensit_batch
+from custom_components.sensit.decode_pipeline import DecodePipeline, async_get_pipeline
+from custom_components.sensit.dispatcher import async_get_dispatcher
+
+from .common import device_entry, setup_entry, v2_frame
+
+
+class FakeDevice:
+    """ Device applying bursts without decoding them """
+
+    def __init__(self):
+        self.applied = []
+
+    def prepare_burst(self, frames):
+        return frames
+
+    def decode_history(self, frames):
+        time.sleep(0.01)
+
+    def apply_burst(self, frames, columns, latency=None):
+        self.applied.append(len(frames))
+
+
+def burst(start, count):
+    """ Frames `start` to `start + count` of a device, 10 minutes apart """
+    origin = int(time.time()) - 600 * 2000
+    return [
+        {"data": v2_frame(20 + index % 5), "time": origin + 600 * index, "seqNumber": index}
+        for index in range(start, start + count)
+    ]
+
+
+@pytest.fixture
+def numpy_not_loaded(monkeypatch):
+    monkeypatch.setattr(sensit_batch, "_numpy_loaded", False)
+    monkeypatch.setattr(sensit_batch, "np", None)
+
+
+async def test_large_bursts_are_decoded_in_the_executor(hass):
+    await setup_entry(hass, device_entry())
+    device = async_get_dispatcher(hass).async_get_device("abc123")
+    pipeline = async_get_pipeline(hass)
+
+    await pipeline.async_submit(device, burst(0, 1))
+    assert pipeline.inline == 1
+    assert device.frame_filter.accepted == 1
+
+    await pipeline.async_submit(device, burst(1, 1000))
+    # Submitted while the worker is busy, merged with the large burst
+    await pipeline.async_submit(device, burst(1001, 1))
+    await pipeline.async_join()
+    await hass.async_block_till_done()
+
+    assert pipeline.offloaded == 1
+    assert device.frame_filter.accepted == 1002
+    assert device.frame_filter.stale == 0
+
+
+async def test_numpy_is_imported_in_the_executor(hass, numpy_not_loaded):
+    await setup_entry(hass, device_entry())
+    device = async_get_dispatcher(hass).async_get_device("abc123")
+    pipeline = async_get_pipeline(hass)
+    threads = []
+
+    def load_numpy():
+        threads.append(threading.current_thread())
+        return sensit_batch.load_numpy()
+
+    with patch.object(decode_pipeline, "load_numpy", load_numpy):
+        # A single frame needs no batch decoder
+        await pipeline.async_submit(device, burst(0, 1))
+        assert sensit_batch.numpy_loaded() is False
+        await pipeline.async_submit(device, burst(1, 3))
+        await pipeline.async_join()
+        await pipeline.async_submit(device, burst(4, 3))
+
+    assert threads and threading.main_thread() not in threads
+    assert sensit_batch.numpy_loaded()
+    assert (pipeline.inline, pipeline.queued) == (2, 1)
+    assert device.frame_filter.accepted == 7
+
+
+async def test_backpressure(hass):
+    pipeline = DecodePipeline(hass, maxsize=2, threshold=0)
+    device = FakeDevice()
+
+    await asyncio.gather(*(pipeline.async_submit(device, [1, 2]) for _ in range(10)))
+    await pipeline.async_join()
+
+    assert sum(device.applied) == 20
+    assert pipeline.backpressure_waits > 0
+    assert pipeline.max_queue_depth <= 2
@@ -0,0 +1,25 @@
+"""Tests of the frame decoders."""
+import pytest
+
+from custom_components.sensit.sensit_batch import decode_batch
+from custom_components.sensit.sensit_parser import get_decoder
+
+from .common import v2_frame, v3_frame
+
+
+def test_humidity():
+    # Raw byte 0x19: in 0.5 % steps for v2, returned raw for v3 as by the original parser
+    assert get_decoder(2)(bytes.fromhex(v2_frame(21.5))).humidity == 12.5
+    assert get_decoder(3)(bytes.fromhex(v3_frame(21.5))).humidity == 25
+
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_batch_matches_the_decoders(use_numpy):
+    # The second frame reads 0 °C and a raw humidity of 0
+    frames = [v3_frame(20), "a808c800", v3_frame(-5), "zz"]
+
+    columns = decode_batch(3, frames, use_numpy=use_numpy)
+
+    assert list(columns["valid"]) == [True, True, True, False]
+    assert list(columns["humidity"])[:3] == [25, 0, 25]
+    assert list(columns["temperature"])[:3] == [20.0, 0.0, -5.0]
@@ -0,0 +1,76 @@
+"""Tests of the diagnostic sensors and the diagnostics download."""
+from homeassistant.helpers import entity_registry as er
+from homeassistant.const import EntityCategory
+
+from custom_components.sensit.const import DOMAIN
+from custom_components.sensit.diagnostics import METRICS_OFF, async_get_config_entry_diagnostics
+from custom_components.sensit.dispatcher import async_get_dispatcher
+from custom_components.sensit.sensor import DIAGNOSTIC_TYPES
+
+from .common import device_entry, hub_entry, setup_entry, v2_frame
+
+
+def diagnostic_entries(hass, entry):
+    return [
+        registry_entry
+        for registry_entry in er.async_entries_for_config_entry(er.async_get(hass), entry.entry_id)
+        if registry_entry.entity_category == EntityCategory.DIAGNOSTIC
+    ]
+
+
+async def test_no_diagnostic_sensors_by_default(hass):
+    entry = device_entry()
+    entry.add_to_hass(hass)
+    # Registered for every device by former versions
+    er.async_get(hass).async_get_or_create(
+        "sensor",
+        DOMAIN,
+        "ABC123_frames_received",
+        config_entry=entry,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        disabled_by=er.RegistryEntryDisabler.INTEGRATION,
+    )
+
+    await setup_entry(hass, entry)
+    hass.states.async_set("sensor.abc123", v2_frame(20))
+    await hass.async_block_till_done()
+
+    assert diagnostic_entries(hass, entry) == []
+    assert async_get_dispatcher(hass).async_get_device("abc123").metrics is None
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+    assert diagnostics["devices"]["ABC123"]["metrics"] == METRICS_OFF
+    assert diagnostics["total"]["frames"] == {"accepted": 1, "duplicates": 0, "stale": 0}
+    assert diagnostics["total"]["metrics"] == METRICS_OFF
+
+
+async def test_diagnostic_sensors_of_a_hub(hass):
+    entry = await setup_entry(
+        hass, hub_entry([("A1", "a1", 2, "local"), ("B2", "b2", 3, "local")], diagnostics=True)
+    )
+    hass.states.async_set("sensor.a1", v2_frame(20))
+    await hass.async_block_till_done()
+
+    assert len(diagnostic_entries(hass, entry)) == 2 * len(DIAGNOSTIC_TYPES)
+    assert not any(registry_entry.disabled for registry_entry in diagnostic_entries(hass, entry))
+    a1 = async_get_dispatcher(hass).async_get_device("a1")
+    assert a1.metrics is not None
+    assert a1.metrics.received == 1
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+    assert diagnostics["total"]["instrumented_devices"] == 2
+    assert diagnostics["total"]["metrics"]["received"] == 1
+    assert diagnostics["config"]["webhook_id"] == "**REDACTED**"
+
+
+async def test_diagnostics_turned_off(hass):
+    entry = await setup_entry(hass, device_entry(diagnostics=True))
+    assert len(diagnostic_entries(hass, entry)) == len(DIAGNOSTIC_TYPES)
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {"name": "kitchen", "mode": "local", "version": 2, "diagnostics": False}
+    )
+    await hass.config_entries.options.async_configure(result["flow_id"], {})
+    await hass.async_block_till_done()
+
+    assert diagnostic_entries(hass, entry) == []
+    assert hass.states.get("sensor.kitchen_frames_received") is None
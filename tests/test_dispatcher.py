@@ -0,0 +1,19 @@
+"""Tests of the state change dispatcher."""
+from unittest.mock import patch
+
+from custom_components.sensit.dispatcher import async_get_dispatcher
+
+from .common import device_entry, setup_entry, v2_frame
+
+
+async def test_raw_data_is_routed_to_its_device(hass):
+    await setup_entry(hass, device_entry())
+    device = async_get_dispatcher(hass).async_get_device("abc123")
+
+    with patch.object(device, "handle_event", wraps=device.handle_event) as handle_event:
+        hass.states.async_set("sensor.other", "on")
+        hass.states.async_set("sensor.abc123", v2_frame(20))
+        await hass.async_block_till_done()
+
+    handle_event.assert_called_once()
+    assert hass.states.get("sensor.kitchen_temperature").state == "20.0"
@@ -0,0 +1,70 @@
+"""Tests of the duplicate and stale frame filter."""
+from custom_components.sensit.frame_filter import FrameFilter, as_int
+
+
+def test_duplicates_are_dropped():
+    frame_filter = FrameFilter()
+
+    assert frame_filter.accept(1, 100)
+    # Same uplink through another base station, or a retried callback
+    assert not frame_filter.accept(1, 100)
+    assert frame_filter.accept(2, 200)
+
+    assert frame_filter.as_dict() == {
+        "accepted": 2,
+        "duplicates": 1,
+        "stale": 0,
+        "last_time": 200,
+        "last_seq_number": 2,
+    }
+
+
+def test_stale_frames_are_dropped():
+    frame_filter = FrameFilter()
+
+    assert frame_filter.accept(2, 200)
+    assert not frame_filter.accept(1, 100)
+    # Same time as the latest frame is not stale
+    assert frame_filter.accept(3, 200)
+
+    assert frame_filter.stale == 1
+    assert frame_filter.dropped == 1
+
+
+def test_window_is_bounded():
+    frame_filter = FrameFilter(window=2)
+
+    for seq_number in (1, 2, 3):
+        assert frame_filter.accept(seq_number)
+
+    # Forgotten, without time it can't be found stale either
+    assert frame_filter.accept(1)
+    assert not frame_filter.accept(3)
+
+
+def test_frames_without_seq_number_or_time():
+    frame_filter = FrameFilter()
+
+    assert frame_filter.accept()
+    assert frame_filter.accept()
+    assert frame_filter.accept(None, 100)
+    assert frame_filter.accept(1)
+    assert frame_filter.accepted == 4
+    assert frame_filter.last_time == 100
+
+
+def test_restore():
+    frame_filter = FrameFilter()
+    frame_filter.restore(1000, 7)
+
+    assert not frame_filter.accept(7, 1000)
+    assert not frame_filter.accept(6, 900)
+    assert frame_filter.accept(8, 1600)
+    assert frame_filter.accepted == 1
+
+
+def test_as_int():
+    assert as_int("1700000000") == 1700000000
+    assert as_int(12) == 12
+    assert as_int(None) is None
+    assert as_int("12a") is None
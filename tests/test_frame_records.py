@@ -0,0 +1,17 @@
+"""Tests of the frame record helpers shared with scripts/decode_frames.py."""
+from custom_components.sensit.frame_records import DEVICE_KEYS, frame_time, record_value
+
+
+def test_frame_time():
+    assert frame_time(1700000000) == 1700000000
+    assert frame_time("1700000000000") == 1700000000
+    assert frame_time("2023-11-14 22:13:20") == 1700000000
+    assert frame_time("2023-11-14T22:13:20Z") == 1700000000
+    assert frame_time("2023-11-15T00:13:20+02:00") == 1700000000
+    assert frame_time("") is None
+    assert frame_time("bad") is None
+
+
+def test_record_value():
+    assert record_value({"device": "", "device_id": "A1"}, DEVICE_KEYS) == "A1"
+    assert record_value({"data": "a8"}, DEVICE_KEYS) is None
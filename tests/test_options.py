@@ -0,0 +1,87 @@
+"""Tests of the options flow."""
+from unittest.mock import patch
+
+from homeassistant.data_entry_flow import FlowResultType
+from homeassistant.helpers import entity_registry as er
+
+from custom_components.sensit.const import DOMAIN
+from custom_components.sensit.dispatcher import async_get_dispatcher
+
+from .common import device_entry, hub_entry, setup_entry, v2_frame, v3_frame
+
+
+async def test_options_are_applied_in_place(hass):
+    entry = await setup_entry(hass, device_entry())
+    hass.states.async_set("sensor.abc123", v2_frame(20))
+    await hass.async_block_till_done()
+    device = async_get_dispatcher(hass).async_get_device("abc123")
+
+    with patch.object(hass.config_entries, "async_reload") as reload:
+        result = await hass.config_entries.options.async_init(entry.entry_id)
+        assert result["step_id"] == "init"
+        result = await hass.config_entries.options.async_configure(
+            result["flow_id"], {"name": "cuisine", "mode": "local", "version": 3}
+        )
+        assert result["step_id"] == "filters"
+        result = await hass.config_entries.options.async_configure(
+            result["flow_id"], {"temperature_deadband": 0.5}
+        )
+        await hass.async_block_till_done()
+
+    assert result["type"] == FlowResultType.CREATE_ENTRY
+    reload.assert_not_called()
+    assert async_get_dispatcher(hass).async_get_device("abc123") is device
+    assert device.name == "cuisine"
+    assert device.version == 3
+    assert hass.config_entries.async_get_entry(entry.entry_id).title == "cuisine"
+    state = hass.states.get("sensor.kitchen_temperature")
+    assert state.attributes["friendly_name"] == "cuisine_temperature"
+
+    # Frames are decoded as v3, changes under the new deadband are not written
+    hass.states.async_set("sensor.abc123", v3_frame(22))
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.kitchen_temperature").state == "22.0"
+    hass.states.async_set("sensor.abc123", v3_frame(22.25))
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.kitchen_temperature").state == "22.0"
+
+
+async def test_new_device_table_reloads_the_hub(hass):
+    entry = await setup_entry(hass, hub_entry([("A1", "a1", 2, "local")]))
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    assert result["step_id"] == "hub"
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {"devices": "device_id,version\nA1,2\nB2,3"}
+    )
+    assert result["step_id"] == "filters"
+    result = await hass.config_entries.options.async_configure(result["flow_id"], {})
+    await hass.async_block_till_done()
+
+    assert result["type"] == FlowResultType.CREATE_ENTRY
+    assert async_get_dispatcher(hass).async_get_device("b2", entry.entry_id) is not None
+
+
+async def test_version_change_removes_stale_sensors(hass):
+    entry = device_entry(version=3)
+    entry.add_to_hass(hass)
+    registry = er.async_get(hass)
+    for key in ("temperature", "button"):
+        registry.async_get_or_create(
+            "sensor", DOMAIN, f"ABC123_{key}", config_entry=entry, suggested_object_id=f"kitchen_{key}"
+        )
+    await setup_entry(hass, entry)
+    assert hass.states.get("sensor.kitchen_button") is not None
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {"name": "kitchen", "mode": "local", "version": 2}
+    )
+    await hass.config_entries.options.async_configure(result["flow_id"], {})
+    await hass.async_block_till_done()
+
+    # v2 devices have no button
+    assert registry.async_get("sensor.kitchen_button") is None
+    assert hass.states.get("sensor.kitchen_button") is None
+    assert "button" not in async_get_dispatcher(hass).async_get_device("abc123").sensors
+    assert hass.states.get("sensor.kitchen_temperature") is not None
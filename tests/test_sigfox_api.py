@@ -0,0 +1,133 @@
+"""Tests of the Sigfox API polling, against the fake backend of scripts/."""
+from datetime import timedelta
+from types import SimpleNamespace
+
+from aiohttp.test_utils import TestServer
+import pytest
+
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.sensit.dispatcher import async_get_dispatcher
+from custom_components.sensit.sigfox_api import (
+    BACKEND_DELAY,
+    DEFAULT_INTERVAL,
+    MAX_INTERVAL,
+    MIN_INTERVAL,
+    SigfoxApiClient,
+    poll_interval,
+)
+from custom_components.sensit.storage import SAVE_DELAY
+from fake_sigfox_backend import FakeBackend, make_app
+
+from .common import hub_entry, setup_entry
+
+HISTORY = 250
+
+
+@pytest.fixture
+async def backend(socket_enabled):
+    backend = FakeBackend({"A1": 2, "B2": 3}, history=HISTORY, interval=600)
+    server = TestServer(make_app(backend, "login", "secret"))
+    await server.start_server()
+    backend.url = str(server.make_url("/v2"))
+    yield backend
+    await server.close()
+
+
+def api_entry(backend):
+    return hub_entry(
+        [("A1", "a1", 2, "api"), ("B2", "b2", 3, "api"), ("C3", "c3", 3, "local")],
+        backend_url=backend.url,
+        username="login",
+        password="secret",
+    )
+
+
+async def async_poll(hass, seconds):
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=seconds))
+    await hass.async_block_till_done()
+
+
+async def test_paging(hass, backend):
+    client = SigfoxApiClient(async_get_clientsession(hass), backend.url, "login", "secret")
+    history = backend.messages["A1"]
+
+    messages = await client.async_get_messages("A1")
+    assert messages == history
+    assert backend.requests == 3
+
+    messages = await client.async_get_messages("A1", pages=1)
+    assert messages == history[-100:]
+    assert backend.requests == 4
+
+    messages = await client.async_get_messages("A1", history[-11]["time"])
+    assert messages == history[-10:]
+    assert backend.requests == 5
+
+
+async def test_first_poll_reads_the_latest_page(hass, hass_storage, backend):
+    await setup_entry(hass, api_entry(backend))
+    await async_poll(hass, 10)
+
+    # One request per device in api mode, not the whole history
+    assert backend.requests == 2
+    a1 = async_get_dispatcher(hass).async_get_device("a1")
+    assert a1.frame_filter.accepted == 100
+    assert hass.states.get("sensor.a1_temperature") is not None
+
+    await async_poll(hass, 10 + SAVE_DELAY)
+    cursors = hass_storage["sensit"]["data"]["cursors"]
+    assert cursors == {"a1": backend.messages["A1"][-1]["time"], "b2": backend.messages["B2"][-1]["time"]}
+
+
+async def test_cursor_carries_on(hass, hass_storage, backend):
+    hass_storage["sensit"] = {
+        "version": 1,
+        "key": "sensit",
+        "data": {"cursors": {"a1": backend.messages["A1"][-3]["time"]}, "frames": {}},
+    }
+    await setup_entry(hass, api_entry(backend))
+    await async_poll(hass, 10)
+    a1 = async_get_dispatcher(hass).async_get_device("a1")
+    assert a1.frame_filter.accepted == 2
+
+    # Polled again once the next message is due
+    backend.add_message("A1")
+    await async_poll(hass, MAX_INTERVAL + 10)
+    assert a1.frame_filter.accepted == 3
+
+
+async def test_first_poll_after_restored_frame(hass, hass_storage, backend):
+    last = backend.messages["B2"][-5]
+    hass_storage["sensit"] = {
+        "version": 1,
+        "key": "sensit",
+        "data": {"cursors": {}, "frames": {"b2": [last["data"], last["time"] // 1000, last["seqNumber"]]}},
+    }
+    await setup_entry(hass, api_entry(backend))
+    await async_poll(hass, 10)
+
+    b2 = async_get_dispatcher(hass).async_get_device("b2")
+    assert b2.frame_filter.accepted == 4
+    assert b2.frame_filter.last_seq_number == backend.messages["B2"][-1]["seqNumber"]
+
+
+def test_poll_interval():
+    now = 1_700_000_000
+    # v2 frame of a 1h timeframe
+    hourly = SimpleNamespace(period=1)
+
+    # Next message is due one period after the last one
+    assert poll_interval(2, hourly, now - 600, now) == 3000 + BACKEND_DELAY
+    # Late message, polled every quarter of the period
+    assert poll_interval(2, hourly, now - 3600, now) == 900
+    assert poll_interval(2, SimpleNamespace(period=0), now - 3600, now) == 150
+    assert poll_interval(2, SimpleNamespace(period=0), None, now) == 150
+    # Unknown period, the v1 one is not fully decoded
+    assert poll_interval(1, SimpleNamespace(period=0), now, now) == DEFAULT_INTERVAL
+    assert poll_interval(3, hourly, now, now) == DEFAULT_INTERVAL
+    assert poll_interval(2, None, now, now) == DEFAULT_INTERVAL
+    # Due in less than MIN_INTERVAL
+    assert poll_interval(2, SimpleNamespace(period=0), now - 590, now) == max(150, MIN_INTERVAL)
@@ -0,0 +1,61 @@
+"""Tests of the persistent state of the integration."""
+from datetime import timedelta
+
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.sensit.dispatcher import async_get_dispatcher
+from custom_components.sensit.storage import SAVE_DELAY, async_get_storage
+
+from .common import device_entry, setup_entry, v3_frame
+
+
+async def async_save(hass):
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=SAVE_DELAY + 1))
+    await hass.async_block_till_done()
+
+
+async def test_legacy_cursors_are_migrated(hass, hass_storage):
+    hass_storage["sensit.cursors"] = {"version": 1, "key": "sensit.cursors", "data": {"a1": 123}}
+
+    storage = await async_get_storage(hass)
+    await hass.async_block_till_done()
+
+    assert storage.get_cursor("A1") == 123
+    assert "sensit.cursors" not in hass_storage
+    await async_save(hass)
+    assert hass_storage["sensit"]["data"] == {"cursors": {"a1": 123}, "frames": {}}
+
+
+async def test_storage_is_loaded_once(hass, hass_storage):
+    hass_storage["sensit"] = {"version": 1, "key": "sensit", "data": {"cursors": {"a1": 5}}}
+
+    storage = await async_get_storage(hass)
+    storage.async_set_cursor("A1", 10)
+
+    assert await async_get_storage(hass) is storage
+    assert storage.get_cursor("a1") == 10
+
+
+async def test_last_frames_survive_restarts(hass, hass_storage):
+    hass_storage["sensit"] = {
+        "version": 1,
+        "key": "sensit",
+        "data": {"cursors": {}, "frames": {"abc123": [v3_frame(20), 1000, 7]}},
+    }
+    entry = await setup_entry(hass, device_entry(version=3))
+    device = async_get_dispatcher(hass).async_get_device("abc123")
+
+    # Duplicate of the last frame received before the restart
+    device.handle_frame(v3_frame(21), 1000, 7)
+    await hass.async_block_till_done()
+    assert device.frame_filter.duplicates == 1
+    assert hass.states.get("sensor.kitchen_temperature") is None
+
+    device.handle_frame(v3_frame(21), 1600, 8)
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.kitchen_temperature").state == "21.0"
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await async_save(hass)
+    assert hass_storage["sensit"]["data"]["frames"]["abc123"] == [v3_frame(21), 1600, 8]
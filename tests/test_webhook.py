@@ -0,0 +1,125 @@
+"""Tests of the Sigfox callback webhook."""
+from http import HTTPStatus
+
+import pytest
+
+from homeassistant.setup import async_setup_component
+
+from custom_components.sensit.dispatcher import async_get_dispatcher
+
+from .common import device_entry, hub_entry, setup_entry, v2_frame, v3_frame
+
+
+@pytest.fixture(autouse=True)
+async def setup_http(hass):
+    assert await async_setup_component(hass, "http", {})
+
+
+def url(entry):
+    return f"/api/webhook/{entry.data['webhook_id']}"
+
+
+async def test_callback_updates_sensors(hass, hass_client_no_auth):
+    entry = await setup_entry(hass, device_entry())
+    client = await hass_client_no_auth()
+
+    response = await client.post(url(entry), json={"device": "abc123", "data": v2_frame(21.5), "time": 100, "seqNumber": 1})
+    await hass.async_block_till_done()
+
+    assert response.status == HTTPStatus.OK
+    assert hass.states.get("sensor.kitchen_temperature").state == "21.5"
+    assert hass.states.get("sensor.kitchen_humidity").state == "12.5"
+    # No raw data entity
+    assert hass.states.get("sensor.abc123") is None
+
+
+@pytest.mark.parametrize(
+    ("body", "text"),
+    [
+        ("not json", "Invalid JSON"),
+        ({"device": "abc123"}, "Expected device and data"),
+        ({"data": "a9670d19"}, "Expected device and data"),
+        ({"device": "abc123", "data": "zz"}, "Invalid data"),
+    ],
+)
+async def test_invalid_callback(hass, hass_client_no_auth, body, text):
+    entry = await setup_entry(hass, device_entry())
+    client = await hass_client_no_auth()
+
+    if isinstance(body, str):
+        response = await client.post(url(entry), data=body)
+    else:
+        response = await client.post(url(entry), json=body)
+
+    assert response.status == HTTPStatus.BAD_REQUEST
+    assert await response.text() == text
+    assert hass.states.get("sensor.kitchen_temperature") is None
+
+
+async def test_unknown_device(hass, hass_client_no_auth):
+    entry = await setup_entry(hass, device_entry())
+    client = await hass_client_no_auth()
+
+    response = await client.post(url(entry), json={"device": "fff000", "data": v2_frame(21.5)})
+
+    assert response.status == HTTPStatus.NOT_FOUND
+
+
+async def test_devices_of_other_entries_are_not_updated(hass, hass_client_no_auth):
+    kitchen = await setup_entry(hass, device_entry())
+    garage = await setup_entry(hass, device_entry("DEF456", "garage", 3))
+    client = await hass_client_no_auth()
+
+    response = await client.post(url(kitchen), json={"device": "def456", "data": v3_frame(10)})
+    await hass.async_block_till_done()
+
+    assert response.status == HTTPStatus.NOT_FOUND
+    assert hass.states.get("sensor.garage_temperature") is None
+    response = await client.post(url(garage), json={"device": "def456", "data": v3_frame(10)})
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.garage_temperature").state == "10.0"
+
+
+async def test_burst_of_callbacks(hass, hass_client_no_auth):
+    entry = await setup_entry(hass, hub_entry([("A1", "a1", 2, "local"), ("B2", "b2", 3, "local")]))
+    await setup_entry(hass, device_entry("C3", "other", 3))
+    client = await hass_client_no_auth()
+    burst = [
+        {"device": "A1", "data": v2_frame(20), "time": 100, "seqNumber": 1},
+        {"device": "B2", "data": v3_frame(18), "time": 100, "seqNumber": 1},
+        {"device": "A1", "data": v2_frame(22), "time": 200, "seqNumber": 2},
+        # Ignored: not a frame, invalid data, device of another entry
+        {"device": "A1"},
+        {"device": "B2", "data": "zz"},
+        {"device": "C3", "data": v3_frame(5)},
+    ]
+
+    response = await client.post(url(entry), json=burst)
+    await hass.async_block_till_done()
+
+    assert response.status == HTTPStatus.OK
+    assert await response.text() == "3 frame(s) applied to 2 device(s)"
+    # The latest frame of each device is applied
+    assert hass.states.get("sensor.a1_temperature").state == "22.0"
+    assert hass.states.get("sensor.b2_temperature").state == "18.0"
+    assert hass.states.get("sensor.other_temperature") is None
+
+
+async def test_duplicate_callbacks_are_dropped(hass, hass_client_no_auth):
+    entry = await setup_entry(hass, device_entry())
+    client = await hass_client_no_auth()
+    device = async_get_dispatcher(hass).async_get_device("abc123")
+
+    for message in (
+        {"device": "abc123", "data": v2_frame(20), "time": 100, "seqNumber": 2},
+        # Same uplink through another base station
+        {"device": "abc123", "data": v2_frame(20), "time": 100, "seqNumber": 2},
+        # Older frame, delivered late
+        {"device": "abc123", "data": v2_frame(15), "time": 50, "seqNumber": 1},
+    ):
+        assert (await client.post(url(entry), json=message)).status == HTTPStatus.OK
+    await hass.async_block_till_done()
+
+    assert device.frame_filter.duplicates == 1
+    assert device.frame_filter.stale == 1
+    assert hass.states.get("sensor.kitchen_temperature").state == "20.0"